@@ -0,0 +1,75 @@
+"""
+Decode + preprocess time of the fast path against the torchvision transform.
+
+    python -m benchmarks.preprocess_benchmark --sizes 4000x3000 3264x2448 1600x1200
+
+Phone-photo sized JPEGs are made by upscaling a sample leaf photo (quality 90).
+For each size the old path (full decode, Resize/ToTensor/Normalize) and the fast
+path (JPEG draft decode, cv2 area resize, fused normalize into a reused buffer)
+are timed per image and the largest absolute difference between their model
+inputs is reported. With --model the top-1 agreement of both inputs is added.
+Results are printed as JSON.
+"""
+import argparse
+import json
+import os
+import time
+from io import BytesIO
+
+import torch
+from PIL import Image
+
+from core.predict import ImageClassifier, ImagePreprocessor
+
+
+def phone_photo(source, width, height, quality=90):
+    buffer = BytesIO()
+    Image.open(source).convert("RGB").resize((width, height), Image.BICUBIC).save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def per_image_ms(fn, contents, repeat):
+    fn(contents)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(contents)
+    return 1000 * (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default=os.path.join("..", "uploaded_image.jpg"))
+    parser.add_argument("--sizes", nargs="+", default=["4000x3000", "3264x2448", "1600x1200", "640x480"])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--model", help="cnn_model.pth, to also report top-1 agreement")
+    args = parser.parse_args()
+
+    slow, fast = ImagePreprocessor(fast_preprocess=False), ImagePreprocessor(fast_preprocess=True)
+    classifier = ImageClassifier(args.model) if args.model else None
+
+    results = []
+    for size in args.sizes:
+        width, height = (int(v) for v in size.split("x"))
+        contents = phone_photo(args.image, width, height)
+        slow_input, fast_input = slow.preprocess(contents), fast.preprocess(contents)
+        result = {
+            "size": size,
+            "jpeg_bytes": len(contents),
+            "torchvision_ms": per_image_ms(slow.preprocess, contents, args.repeat),
+            "fast_ms": per_image_ms(fast.preprocess, contents, args.repeat),
+            "max_abs_input_diff": float((slow_input - fast_input).abs().max()),
+        }
+        result["speedup"] = result["torchvision_ms"] / result["fast_ms"]
+        batch = [contents] * 8
+        result["fast_batch_of_8_ms"] = per_image_ms(fast.preprocess_batch, batch, args.repeat)
+        if classifier is not None:
+            with torch.no_grad():
+                logits = classifier.runner(torch.stack([slow_input, fast_input]))
+            result["same_top1"] = bool(logits[0].argmax() == logits[1].argmax())
+        results.append(result)
+
+    print(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
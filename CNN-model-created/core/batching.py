@@ -0,0 +1,119 @@
+import asyncio
+import os
+import time
+from collections import deque, Counter
+from dataclasses import dataclass
+
+
+@dataclass
+class MicroBatcherConfig:
+    max_batch_size: int = int(os.getenv("CNN_MAX_BATCH_SIZE", "32"))
+    max_wait_ms: float = float(os.getenv("CNN_MAX_WAIT_MS", "10"))
+
+
+class MicroBatcher:
+    """
+    Collects preprocessed image tensors from concurrent requests and runs them
+    through the CNN as one batch.
+
+    A batch is flushed when it reaches max_batch_size or when the oldest queued
+    tensor has waited max_wait_ms, whichever comes first. predict_fn takes a list
+    of tensors and returns one result per tensor, in order.
+    """
+    def __init__(self, predict_fn, config: MicroBatcherConfig = None, executor=None):
+        self.predict_fn = predict_fn
+        self.config = config or MicroBatcherConfig()
+        self.executor = executor
+        self._pending = deque()
+        self._has_items = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._worker = None
+
+        self.batches_total = 0
+        self.items_total = 0
+        self.flush_reasons = Counter()
+        self.batch_size_counts = Counter()
+
+    async def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while self._pending:
+            _, future, _ = self._pending.popleft()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    async def submit(self, image_tensor):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((image_tensor, future, time.monotonic()))
+        self._has_items.set()
+        if len(self._pending) >= self.config.max_batch_size:
+            self._batch_full.set()
+        return await future
+
+    async def _next_batch(self):
+        await self._has_items.wait()
+        oldest_enqueued_at = self._pending[0][2]
+        remaining = oldest_enqueued_at + self.config.max_wait_ms / 1000 - time.monotonic()
+        if len(self._pending) < self.config.max_batch_size and remaining > 0:
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+        reason = "size" if len(self._pending) >= self.config.max_batch_size else "timeout"
+
+        batch = []
+        while self._pending and len(batch) < self.config.max_batch_size:
+            batch.append(self._pending.popleft())
+        if len(self._pending) < self.config.max_batch_size:
+            self._batch_full.clear()
+        if not self._pending:
+            self._has_items.clear()
+        return batch, reason
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch, reason = await self._next_batch()
+            # requests cancelled while queued do not need a slot in the forward pass
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            self.batches_total += 1
+            self.items_total += len(batch)
+            self.flush_reasons[reason] += 1
+            self.batch_size_counts[len(batch)] += 1
+
+            tensors = [image_tensor for image_tensor, _, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.predict_fn, tensors)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def metrics(self):
+        return {
+            "queue_depth": len(self._pending),
+            "batches_total": self.batches_total,
+            "items_total": self.items_total,
+            "avg_batch_size": self.items_total / self.batches_total if self.batches_total else 0.0,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+            "flush_reasons": dict(self.flush_reasons),
+            "max_batch_size": self.config.max_batch_size,
+            "max_wait_ms": self.config.max_wait_ms,
+        }
@@ -0,0 +1,229 @@
+"""
+Offline disease scan of a folder or a zip/tar archive of leaf photos.
+
+    python -m core.bulk_scan survey_2024/ --output survey_2024.csv
+    python -m core.bulk_scan survey.zip --output survey.parquet --workers 8 --top-k 5
+    python -m core.bulk_scan survey.tar --output survey.csv --annotated-dir marked/
+
+Images are read and preprocessed by DataLoader worker processes while the
+model runs on the previous batch. Results (path, top-k labels and
+probabilities, uncertain flag, error) are appended to the output every batch. Re-running the
+same command after an interruption resumes: images already present in the
+output are skipped.
+
+A .csv output is a single file. A .parquet output is a directory of part files,
+one per flush, readable with pandas.read_parquet.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+from core.predict import ImageClassifier, ImagePreprocessor, INPUT_SIZE
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+ARCHIVE_SEPARATOR = "::"
+
+
+def list_images(source):
+    """Sorted image paths of a folder, or archive::member names of a zip/tar archive."""
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(IMAGE_EXTENSIONS))
+        return sorted(paths)
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            names = [name for name in archive.namelist() if name.lower().endswith(IMAGE_EXTENSIONS)]
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source) as archive:
+            names = [member.name for member in archive.getmembers()
+                     if member.isfile() and member.name.lower().endswith(IMAGE_EXTENSIONS)]
+    else:
+        raise ValueError(f"{source} is neither a folder nor a zip/tar archive")
+    return [f"{source}{ARCHIVE_SEPARATOR}{name}" for name in sorted(names)]
+
+
+class ScanDataset(Dataset):
+    """
+    Reads and preprocesses one image per item inside a DataLoader worker. Archive
+    handles are opened lazily per worker process, since they cannot be shared.
+    An unreadable image yields a zero tensor and its error message.
+    """
+    def __init__(self, paths, fast_preprocess=True):
+        self.paths = paths
+        self.fast_preprocess = fast_preprocess
+        self._preprocessor = None
+        self._archive = None
+        self._archive_lock = None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def read_bytes(self, path):
+        if ARCHIVE_SEPARATOR not in path:
+            with open(path, "rb") as file_obj:
+                return file_obj.read()
+        source, member = path.split(ARCHIVE_SEPARATOR, 1)
+        if self._archive is None:
+            self._archive = zipfile.ZipFile(source) if zipfile.is_zipfile(source) else tarfile.open(source)
+            self._archive_lock = threading.Lock()
+        # the annotation threads share one handle, archive readers are not thread-safe
+        with self._archive_lock:
+            if isinstance(self._archive, zipfile.ZipFile):
+                return self._archive.read(member)
+            return self._archive.extractfile(member).read()
+
+    def __getitem__(self, index):
+        if self._preprocessor is None:
+            self._preprocessor = ImagePreprocessor(self.fast_preprocess)
+        try:
+            return index, self._preprocessor.preprocess(self.read_bytes(self.paths[index])), ""
+        except Exception as e:
+            return index, torch.zeros((3, INPUT_SIZE, INPUT_SIZE)), f"{type(e).__name__}: {e}"
+
+
+class ResultWriter:
+    """Incremental CSV / Parquet-parts output that also tells which paths are already done."""
+    def __init__(self, output_path, top_k):
+        self.output_path = output_path
+        self.parquet = output_path.endswith(".parquet")
+        self.columns = ["path"] + [f"{kind}_{rank}" for rank in range(1, top_k + 1) for kind in ("label", "prob")] + ["uncertain", "error"]
+        self._parts = 0
+
+    def done_paths(self):
+        if self.parquet:
+            if not os.path.isdir(self.output_path):
+                return set()
+            import pyarrow.parquet as pq
+
+            parts = sorted(name for name in os.listdir(self.output_path) if name.endswith(".parquet"))
+            self._parts = len(parts)
+            return {path for name in parts
+                    for path in pq.read_table(os.path.join(self.output_path, name), columns=["path"]).column("path").to_pylist()}
+        if not os.path.exists(self.output_path):
+            return set()
+        # a crash can leave half a row behind; cut the file back to its last full line
+        with open(self.output_path, "rb+") as file_obj:
+            data = file_obj.read()
+            file_obj.truncate(data.rfind(b"\n") + 1)
+        with open(self.output_path, newline="", encoding="utf-8") as file_obj:
+            return {row["path"] for row in csv.DictReader(file_obj)}
+
+    def write(self, rows):
+        if not rows:
+            return
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            os.makedirs(self.output_path, exist_ok=True)
+            types = {"uncertain": pa.bool_()}
+            schema = pa.schema([(column, pa.float64() if column.startswith("prob_") else types.get(column, pa.string()))
+                                for column in self.columns])
+            table = pa.Table.from_pylist([dict(zip(self.columns, row)) for row in rows], schema=schema)
+            part_path = os.path.join(self.output_path, f"part-{self._parts:06d}.parquet")
+            pq.write_table(table, part_path + ".tmp")
+            os.replace(part_path + ".tmp", part_path)
+            self._parts += 1
+            return
+        new_file = not os.path.exists(self.output_path) or os.path.getsize(self.output_path) == 0
+        with open(self.output_path, "a", newline="", encoding="utf-8") as file_obj:
+            writer = csv.writer(file_obj)
+            if new_file:
+                writer.writerow(self.columns)
+            writer.writerows(rows)
+            file_obj.flush()
+            os.fsync(file_obj.fileno())
+
+
+def annotated_name(path):
+    stem = os.path.splitext(path)[0]
+    return stem.replace(ARCHIVE_SEPARATOR, "__").replace(os.sep, "__").replace("/", "__").lstrip("._") + ".jpg"
+
+
+def save_annotated(classifier, dataset, annotated_dir, path, label):
+    rgb = classifier.decode(dataset.read_bytes(path))
+    with open(os.path.join(annotated_dir, annotated_name(path)), "wb") as file_obj:
+        file_obj.write(classifier.annotate(np.ascontiguousarray(rgb), label))
+
+
+def scan(source, output_path, classifier, batch_size=64, workers=4, annotated_dir=None):
+    top_k = min(classifier.top_k, len(classifier.class_name))
+    paths = list_images(source)
+    writer = ResultWriter(output_path, top_k)
+    done = writer.done_paths()
+    pending = [path for path in paths if path not in done]
+    logger.info("%d images, %d already in %s, %d to scan", len(paths), len(done), output_path, len(pending))
+    if not pending:
+        return 0
+
+    dataset = ScanDataset(pending, classifier.preprocessor.fast_preprocess)
+    loader = DataLoader(
+        dataset, batch_size=batch_size, num_workers=workers, shuffle=False,
+        prefetch_factor=2 if workers else None, persistent_workers=False,
+    )
+    annotator = ThreadPoolExecutor(max_workers=2) if annotated_dir else None
+    if annotated_dir:
+        os.makedirs(annotated_dir, exist_ok=True)
+        annotate_source = ScanDataset(pending)
+
+    scanned = 0
+    started = time.perf_counter()
+    try:
+        for indices, batch, errors in loader:
+            predictions = classifier.classify_batch(batch)
+            rows = []
+            for index, error, prediction in zip(indices.tolist(), errors, predictions):
+                path = pending[index]
+                if error:
+                    rows.append([path] + [None] * (2 * top_k) + [None, error])
+                    continue
+                ranked = [value for label, score in prediction.top_k for value in (label, round(score, 6))]
+                rows.append([path] + ranked + [prediction.uncertain, None])
+                if annotator is not None:
+                    annotator.submit(save_annotated, classifier, annotate_source, annotated_dir, path, prediction.display_label)
+            writer.write(rows)
+            scanned += len(rows)
+            elapsed = time.perf_counter() - started
+            logger.info("%d/%d scanned (%.1f images/sec)", scanned, len(pending), scanned / elapsed)
+    finally:
+        if annotator is not None:
+            annotator.shutdown(wait=True)
+    return scanned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="folder, .zip or .tar(.gz) of leaf images")
+    parser.add_argument("--output", required=True, help="results .csv file or .parquet directory")
+    parser.add_argument("--model", default=os.path.join("model", "cnn_model.pth"))
+    parser.add_argument("--backend", help="eager | torchscript | onnxruntime | int8 (default CNN_BACKEND)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1))
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--confidence-threshold", type=float, help="flag top-1 below this as uncertain (default CNN_CONFIDENCE_THRESHOLD)")
+    parser.add_argument("--annotated-dir", help="also write label-annotated copies of every image here")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(lineno)d %(name)s - %(levelname)s - %(message)s")
+    classifier = ImageClassifier(args.model, backend=args.backend, top_k=args.top_k,
+                                 confidence_threshold=args.confidence_threshold)
+    scanned = scan(args.source, args.output, classifier, args.batch_size, args.workers, args.annotated_dir)
+    print(json.dumps({"scanned": scanned, "output": args.output}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass
+class CacheConfig:
+    backend: str = os.getenv("CACHE_BACKEND", "memory")
+    sqlite_path: str = os.getenv("CACHE_SQLITE_PATH", os.path.join("cache", "results.sqlite3"))
+    redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    max_entries: int = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    image_ttl_seconds: float = float(os.getenv("IMAGE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    solution_ttl_seconds: float = float(os.getenv("SOLUTION_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+
+class MemoryCache:
+    """In-process LRU cache with a per-entry TTL."""
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SqliteCache:
+    """On-disk cache shared by every worker on the host; LRU by last access time."""
+    def __init__(self, path: str, table: str, max_entries: int, ttl_seconds: float):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL, last_access REAL)"
+        )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now),
+            )
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} "
+                "ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+
+class FakeRedis:
+    """Local stand-in for the few Redis commands RedisCache uses (get / set with ex)."""
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            expires_at = time.monotonic() + ex if ex else None
+            self._data[key] = (value.encode() if isinstance(value, str) else value, expires_at)
+        return True
+
+
+class RedisCache:
+    """
+    Redis-compatible backend. TTL is set per key; LRU eviction is left to the
+    server (maxmemory-policy allkeys-lru).
+    """
+    def __init__(self, client, prefix: str, ttl_seconds: float):
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key):
+        value = self.client.get(f"{self.prefix}:{key}")
+        if value is None:
+            return None
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, key, value):
+        self.client.set(f"{self.prefix}:{key}", value, ex=max(1, int(self.ttl_seconds)))
+
+
+def build_cache_backend(name: str, ttl_seconds: float, config: CacheConfig = None, redis_client=None):
+    config = config or CacheConfig()
+    if config.backend == "sqlite":
+        return SqliteCache(config.sqlite_path, name, config.max_entries, ttl_seconds)
+    if config.backend in ("redis", "fakeredis"):
+        if redis_client is None:
+            if config.backend == "fakeredis":
+                redis_client = FakeRedis()
+            else:
+                import redis
+
+                redis_client = redis.Redis.from_url(config.redis_url)
+        return RedisCache(redis_client, name, ttl_seconds)
+    return MemoryCache(config.max_entries, ttl_seconds)
+
+
+class DiseaseResultCache:
+    """
+    Two cache levels for /classify_image:
+    image content hash -> predicted label, and (label, language) -> treatment text.
+    """
+    def __init__(self, config: CacheConfig = None):
+        config = config or CacheConfig()
+        redis_client = FakeRedis() if config.backend == "fakeredis" else None
+        self.labels = build_cache_backend("image_label", config.image_ttl_seconds, config, redis_client)
+        self.solutions = build_cache_backend("solution", config.solution_ttl_seconds, config, redis_client)
+
+    @staticmethod
+    def image_key(contents: bytes) -> str:
+        return hashlib.sha256(contents).hexdigest()
+
+    @staticmethod
+    def solution_key(label: str, language: str) -> str:
+        return json.dumps([label, language.lower()])
+
+    def get_label(self, image_hash: str):
+        return self.labels.get(image_hash)
+
+    def set_label(self, image_hash: str, label: str):
+        self.labels.set(image_hash, label)
+
+    def get_solution(self, label: str, language: str):
+        return self.solutions.get(self.solution_key(label, language))
+
+    def set_solution(self, label: str, language: str, solution: str):
+        self.solutions.set(self.solution_key(label, language), solution)
@@ -0,0 +1,98 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+
+@dataclass
+class UpstreamConfig:
+    llm_backend: str = os.getenv("LLM_BACKEND", "gemini")
+    llm_model_name: str = os.getenv("LLM_MODEL_NAME", "gemini-flash-latest")
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    llm_timeout_seconds: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+    translator_backend: str = os.getenv("TRANSLATOR_BACKEND", "google")
+    translator_max_concurrency: int = int(os.getenv("TRANSLATOR_MAX_CONCURRENCY", "8"))
+    translator_timeout_seconds: float = float(os.getenv("TRANSLATOR_TIMEOUT_SECONDS", "10"))
+    stub_latency_ms: float = float(os.getenv("STUB_LATENCY_MS", "0"))
+
+
+class GeminiClient:
+    """Async Gemini client with its own concurrency limit and timeout."""
+    def __init__(self, config: UpstreamConfig):
+        import google.generativeai as genai
+
+        genai.configure(api_key=os.getenv("GENAI_API_KEY"))
+        self.model = genai.GenerativeModel(config.llm_model_name)
+        self.timeout = config.llm_timeout_seconds
+        self._semaphore = asyncio.Semaphore(config.llm_max_concurrency)
+
+    async def generate(self, prompt: str) -> str:
+        async with self._semaphore:
+            response = await asyncio.wait_for(self.model.generate_content_async(prompt), timeout=self.timeout)
+        return response.text.strip()
+
+
+class GoogleTranslatorClient:
+    """
+    deep_translator only has a blocking API, so calls run on a dedicated thread
+    pool sized to the concurrency limit and are awaited with a timeout.
+    """
+    def __init__(self, config: UpstreamConfig):
+        self.timeout = config.translator_timeout_seconds
+        self._semaphore = asyncio.Semaphore(config.translator_max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.translator_max_concurrency, thread_name_prefix="translator"
+        )
+
+    @staticmethod
+    def _translate(text: str, target: str) -> str:
+        from deep_translator import GoogleTranslator
+
+        return GoogleTranslator(source='auto', target=target).translate(text)
+
+    async def translate(self, text: str, target: str) -> str:
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self._translate, text, target), timeout=self.timeout
+            )
+
+
+class StubLLMClient:
+    """Offline stand-in for Gemini, used for load tests (LLM_BACKEND=stub)."""
+    def __init__(self, config: UpstreamConfig):
+        self.latency = config.stub_latency_ms / 1000
+        self.timeout = config.llm_timeout_seconds
+        self._semaphore = asyncio.Semaphore(config.llm_max_concurrency)
+
+    async def generate(self, prompt: str) -> str:
+        async with self._semaphore:
+            await asyncio.wait_for(asyncio.sleep(self.latency), timeout=self.timeout)
+        return f"[stub treatment] {prompt}"
+
+
+class StubTranslatorClient:
+    """Offline stand-in for GoogleTranslator (TRANSLATOR_BACKEND=stub)."""
+    def __init__(self, config: UpstreamConfig):
+        self.latency = config.stub_latency_ms / 1000
+        self.timeout = config.translator_timeout_seconds
+        self._semaphore = asyncio.Semaphore(config.translator_max_concurrency)
+
+    async def translate(self, text: str, target: str) -> str:
+        async with self._semaphore:
+            await asyncio.wait_for(asyncio.sleep(self.latency), timeout=self.timeout)
+        return f"[{target}] {text}"
+
+
+def build_llm_client(config: UpstreamConfig = None):
+    config = config or UpstreamConfig()
+    if config.llm_backend == "stub":
+        return StubLLMClient(config)
+    return GeminiClient(config)
+
+
+def build_translator_client(config: UpstreamConfig = None):
+    config = config or UpstreamConfig()
+    if config.translator_backend == "stub":
+        return StubTranslatorClient(config)
+    return GoogleTranslatorClient(config)
@@ -0,0 +1,239 @@
+"""
+Build the optimized CPU inference artifacts for CustomeCnnModel.
+
+    python -m core.export --calibration-dir images/ --eval-dir dataset/valid
+
+Writes next to model/cnn_model.pth:
+  cnn_model.torchscript.pt       fp32, Conv+BN+ReLU fused, traced
+  cnn_model_int8.torchscript.pt  static INT8 conv stack + dynamic INT8 fc_layers
+  cnn_model.onnx                 fp32 fused graph for onnxruntime
+and an export report (JSON) with the top-1 agreement with the fp32 eager model,
+accuracy on --eval-dir (one sub-folder per class name) and batch latency of each
+backend, so CNN_BACKEND can be set to the fastest one within the accuracy budget.
+A backend is only recommended with --eval-dir; without labelled images the report
+names the fastest backend within the fp32 agreement budget, marked agreement-only.
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import time
+
+import torch
+import torch.nn as nn
+from PIL import Image, UnidentifiedImageError
+from torch.ao.quantization import DeQuantStub, QuantStub, convert, fuse_modules, get_default_qconfig, prepare, quantize_dynamic
+
+from core.predict import (
+    CLASS_NAME, CNN_BACKENDS, ImageClassifier, backend_artifact_path, default_transform,
+    load_fp32_model, select_quantized_engine,
+)
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class QuantizedCnn(nn.Module):
+    """Conv stack between quant/dequant stubs for static INT8; fc_layers stay float for dynamic INT8."""
+    def __init__(self, model):
+        super().__init__()
+        self.quant = QuantStub()
+        self.Conv_layers = model.Conv_layers
+        self.dequant = DeQuantStub()
+        self.fc_layers = model.fc_layers
+
+    def forward(self, x):
+        x = self.dequant(self.Conv_layers(self.quant(x)))
+        x = x.reshape(x.size(0), -1)
+        return self.fc_layers(x)
+
+
+def fuse_conv_bn_relu(model):
+    """Fold every BatchNorm into its Conv and fuse the ReLU (eval mode, returns a copy)."""
+    groups = []
+    modules = list(model.Conv_layers)
+    for i in range(len(modules) - 2):
+        if isinstance(modules[i], nn.Conv2d) and isinstance(modules[i + 1], nn.BatchNorm2d) and isinstance(modules[i + 2], nn.ReLU):
+            groups.append([f"Conv_layers.{i}", f"Conv_layers.{i + 1}", f"Conv_layers.{i + 2}"])
+    return fuse_modules(copy.deepcopy(model).eval(), groups)
+
+
+def quantize_int8(fused_model, calibration_batches):
+    engine = select_quantized_engine()
+    model = QuantizedCnn(copy.deepcopy(fused_model)).eval()
+    model.qconfig = get_default_qconfig(engine)
+    model.fc_layers.qconfig = None
+    prepare(model, inplace=True)
+    with torch.no_grad():
+        for batch in calibration_batches:
+            model(batch)
+    convert(model, inplace=True)
+    return quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def export_onnx(fused_model, example, output_path):
+    torch.onnx.export(
+        fused_model, example, output_path,
+        input_names=["input"], output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=17, dynamo=False,
+    )
+
+
+def image_files(folder):
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def load_batches(paths, transform, batch_size):
+    """
+    (batches, indices of the paths that loaded). Unreadable or corrupt images are
+    skipped, like bulk_scan does; it is an error only if none of them load.
+    """
+    tensors, loaded = [], []
+    for index, path in enumerate(paths):
+        try:
+            with Image.open(path) as image:
+                tensors.append(transform(image.convert("RGB")))
+        except (OSError, UnidentifiedImageError) as e:
+            logger.warning("Skipping unreadable image %s: %s", path, e)
+            continue
+        loaded.append(index)
+    if paths and not tensors:
+        raise RuntimeError(f"None of the {len(paths)} images could be read")
+    return [torch.stack(tensors[i:i + batch_size]) for i in range(0, len(tensors), batch_size)], loaded
+
+
+def labelled_eval_set(eval_dir):
+    """(paths, class indices) from an eval_dir/<class name>/*.jpg layout."""
+    index_of = {name: index for index, name in CLASS_NAME.items()}
+    paths, targets = [], []
+    for class_name in sorted(os.listdir(eval_dir)):
+        if class_name in index_of:
+            for path in image_files(os.path.join(eval_dir, class_name)):
+                paths.append(path)
+                targets.append(index_of[class_name])
+    return paths, torch.tensor(targets, dtype=torch.long)
+
+
+def predictions(runner, batches):
+    with torch.no_grad():
+        return torch.cat([runner(batch).argmax(dim=1) for batch in batches]) if batches else torch.empty(0, dtype=torch.long)
+
+
+def batch_latency_ms(runner, batch, repeat):
+    with torch.no_grad():
+        runner(batch)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            runner(batch)
+    return 1000 * (time.perf_counter() - started) / repeat
+
+
+def fastest_backend(results, flag):
+    candidates = [name for name, result in results.items() if result.get(flag)]
+    return min(candidates, key=lambda name: results[name]["batch_latency_ms"]) if candidates else None
+
+
+def recommendation(results, evaluated):
+    """
+    Report fields for choosing CNN_BACKEND. Only accuracy on labelled images can
+    justify a recommendation; agreement with fp32 is reported as just that.
+    """
+    if evaluated:
+        return {"recommended_backend": fastest_backend(results, "within_budget") or "eager"}
+    return {
+        "recommended_backend": None,
+        "agreement_only_fastest_backend": fastest_backend(results, "within_agreement_budget"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.path.join("model", "cnn_model.pth"))
+    parser.add_argument("--calibration-dir", help="leaf images used to calibrate INT8 activation ranges")
+    parser.add_argument("--calibration-limit", type=int, default=256)
+    parser.add_argument("--eval-dir", help="labelled images, one sub-folder per class name")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01,
+                        help="budget for accuracy (without --eval-dir: fp32 agreement) lost by a backend")
+    parser.add_argument("--report", default=os.path.join("model", "export_report.json"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(lineno)d %(name)s - %(levelname)s - %(message)s")
+    torch.manual_seed(0)
+    transform = default_transform()
+    model = load_fp32_model(args.model)
+    fused = fuse_conv_bn_relu(model)
+    example = torch.zeros(1, 3, 128, 128)
+
+    calibration_paths = list(image_files(args.calibration_dir))[:args.calibration_limit] if args.calibration_dir else []
+    calibration, calibration_loaded = load_batches(calibration_paths, transform, args.batch_size)
+    if not calibration:
+        logger.warning("No calibration images given, calibrating INT8 on random inputs (ranges will be poor)")
+        calibration = [torch.rand(args.batch_size, 3, 128, 128) * 2 - 1]
+
+    torch.jit.trace(fused, example).save(backend_artifact_path(args.model, "torchscript"))
+    torch.jit.trace(quantize_int8(fused, calibration), example).save(backend_artifact_path(args.model, "int8"))
+    exported = ["eager", "torchscript", "int8"]
+    try:
+        export_onnx(fused, example, backend_artifact_path(args.model, "onnxruntime"))
+        exported.append("onnxruntime")
+    except Exception as e:
+        logger.warning("ONNX export skipped: %s", e)
+
+    eval_paths, eval_targets = labelled_eval_set(args.eval_dir) if args.eval_dir else ([], None)
+    eval_batches, eval_loaded = load_batches(eval_paths, transform, args.batch_size)
+    if eval_targets is not None:
+        eval_targets = eval_targets[eval_loaded]
+    latency_batch = torch.cat(calibration)[:args.batch_size]
+
+    reference = predictions(model, calibration)
+    reference_accuracy = None
+    results = {}
+    for backend in CNN_BACKENDS:
+        if backend not in exported:
+            continue
+        try:
+            runner = ImageClassifier(args.model, backend=backend).runner
+        except ImportError as e:
+            results[backend] = {"error": str(e)}
+            continue
+        result = {
+            "agreement_with_fp32": float((predictions(runner, calibration) == reference).float().mean()),
+            "batch_latency_ms": batch_latency_ms(runner, latency_batch, args.repeat),
+            "artifact_bytes": os.path.getsize(backend_artifact_path(args.model, backend)),
+        }
+        if eval_batches:
+            result["accuracy"] = float((predictions(runner, eval_batches) == eval_targets).float().mean())
+            if backend == "eager":
+                reference_accuracy = result["accuracy"]
+            result["accuracy_delta"] = result["accuracy"] - reference_accuracy
+            result["within_budget"] = -result["accuracy_delta"] <= args.max_accuracy_drop
+        else:
+            # agreement with fp32 says how close a backend is, not how accurate it is
+            result["within_agreement_budget"] = 1.0 - result["agreement_with_fp32"] <= args.max_accuracy_drop
+        results[backend] = result
+
+    report = {
+        "calibration_images": len(calibration_loaded),
+        "eval_images": len(eval_loaded),
+        "max_accuracy_drop": args.max_accuracy_drop,
+        "backends": results,
+        **recommendation(results, evaluated=bool(eval_batches)),
+    }
+    if not eval_batches:
+        logger.warning("No --eval-dir: accuracy was not measured, so no backend is recommended. "
+                       "agreement_only_fastest_backend is based on fp32 agreement only")
+    with open(args.report, "w") as file_obj:
+        json.dump(report, file_obj, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Stage timings, request metrics and an on-demand sampling profiler of the disease API.
+
+    from core.metrics import timed
+
+    with timed("decode"):
+        ...
+
+    @timed("annotate")
+    def annotate(...):
+        ...
+
+instrument_app(app) records count, latency and in-flight requests for every
+route and serves them, with the stage histograms, on GET /metrics in the
+Prometheus text format. It also serves POST /profiler/start and POST
+/profiler/stop; both answer 403 unless PROFILER_ENABLED=1 and, when
+PROFILER_TOKEN is set, the request carries it in X-Profiler-Token.
+
+This service deploys on its own, so this is a copy of the fertilizer API's
+src/metrics.py bound to the "disease" namespace; keep the two in step.
+"""
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+NAMESPACE = "disease"
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_STAGE_METRICS = {}
+
+
+def stage_metrics(namespace):
+    """(seconds, errors, in-flight) stage metrics of a namespace, registered once per process."""
+    if namespace not in _STAGE_METRICS:
+        _STAGE_METRICS[namespace] = (
+            Histogram(f"{namespace}_stage_seconds", "Time spent in each pipeline stage", ["stage"], buckets=LATENCY_BUCKETS),
+            Counter(f"{namespace}_stage_errors", "Pipeline stages that raised", ["stage"]),
+            Gauge(f"{namespace}_stage_in_flight", "Calls currently inside a pipeline stage", ["stage"]),
+        )
+    return _STAGE_METRICS[namespace]
+
+
+def stage_timer(namespace):
+    """The timed() helper of a namespace."""
+    stage_seconds, stage_errors, stage_in_flight = stage_metrics(namespace)
+
+    @contextmanager
+    def timed(stage):
+        """Time a block, or (as a decorator) every call of a sync function, as one stage."""
+        in_flight = stage_in_flight.labels(stage)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            stage_errors.labels(stage).inc()
+            raise
+        finally:
+            stage_seconds.labels(stage).observe(time.perf_counter() - started)
+            in_flight.dec()
+
+    return timed
+
+
+timed = stage_timer(NAMESPACE)
+
+
+class SamplingProfiler:
+    """
+    Snapshots the stack of every thread each interval from a background thread
+    and counts identical stacks. Costs nothing while stopped.
+    """
+    def __init__(self):
+        self.samples = StackCounter()
+        self.interval_seconds = 0.01
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, interval_seconds=0.01):
+        if self.running:
+            return False
+        self.samples = StackCounter()
+        self.interval_seconds = interval_seconds
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop sampling and return the stacks collected since start()."""
+        if self.running:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        return self.collapsed()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval_seconds):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        """One 'frame;frame;frame count' line per distinct stack, most frequent first."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+PROFILER = SamplingProfiler()
+
+
+def require_profiler_access(request: Request):
+    """403 unless PROFILER_ENABLED=1 and, if PROFILER_TOKEN is set, X-Profiler-Token matches it."""
+    if os.getenv("PROFILER_ENABLED", "0") != "1":
+        raise HTTPException(status_code=403, detail="profiler is disabled")
+    token = os.getenv("PROFILER_TOKEN", "")
+    if token and not hmac.compare_digest(request.headers.get("X-Profiler-Token", "").encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="invalid profiler token")
+
+
+def build_metrics_router() -> APIRouter:
+    router = APIRouter()
+
+    @router.get("/metrics")
+    def metrics():
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+    @router.post("/profiler/start", dependencies=[Depends(require_profiler_access)])
+    def start_profiler(interval_ms: float = 10.0):
+        return {"started": PROFILER.start(interval_ms / 1000), "interval_ms": PROFILER.interval_seconds * 1000}
+
+    @router.post("/profiler/stop", dependencies=[Depends(require_profiler_access)])
+    def stop_profiler():
+        return PlainTextResponse(PROFILER.stop())
+
+    return router
+
+
+_HTTP_METRICS = {}
+
+
+def http_metrics(namespace):
+    """(requests, latency, in-flight) metrics of a namespace, registered once per process."""
+    if namespace not in _HTTP_METRICS:
+        _HTTP_METRICS[namespace] = (
+            Counter(f"{namespace}_http_requests", "HTTP requests by route and status", ["method", "route", "status"]),
+            Histogram(f"{namespace}_http_request_seconds", "HTTP request latency by route", ["method", "route"],
+                      buckets=LATENCY_BUCKETS),
+            Gauge(f"{namespace}_http_requests_in_flight", "HTTP requests being handled"),
+        )
+    return _HTTP_METRICS[namespace]
+
+
+def instrument_app(app, namespace=NAMESPACE):
+    """Request metrics for every route of app, plus the /metrics (and profiler) routes."""
+    requests_total, request_seconds, in_flight = http_metrics(namespace)
+
+    @app.middleware("http")
+    async def record_request(request: Request, call_next):
+        in_flight.inc()
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            in_flight.dec()
+            # the route template, not the raw path, keeps label cardinality bounded
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            request_seconds.labels(request.method, route).observe(time.perf_counter() - started)
+            requests_total.labels(request.method, route, str(status)).inc()
+
+    app.include_router(build_metrics_router())
@@ -4,10 +4,47 @@ import torchvision.transforms as transforms
 from PIL import Image
 import cv2
 import os
+import hashlib
+import threading
+import numpy as np
+from dataclasses import dataclass, field
+from io import BytesIO
+from core.metrics import timed
 # CUstom CNN Archetecture
 import torch.nn as nn
 import torch.optim as optim
 
+CLASS_NAME = {0: 'Tomato_Early_blight', 1: 'Tomato_Septoria_leaf_spot', 2: 'Tomato_healthy', 3: 'Pepper__bell___Bacterial_spot', 4: 'Tomato_Spider_mites_Two_spotted_spider_mite', 5: 'Pepper__bell___healthy', 6: 'Tomato__Tomato_YellowLeaf__Curl_Virus', 7: 'Apple___healthy', 8: 'Tomato_Leaf_Mold', 9: 'Potato___Late_blight', 10: 'Corn_(maize)___Common_rust_', 11: 'Corn_(maize)___healthy', 12: 'Apple___Black_rot', 13: 'Potato___Early_blight', 14: 'Apple___Apple_scab', 15: 'Apple___Cedar_apple_rust', 16: 'Corn_(maize)___Northern_Leaf_Blight', 17: 'Tomato_Late_blight', 18: 'Tomato__Target_Spot', 19: 'Potato___healthy', 20: 'Tomato_Bacterial_spot', 21: 'Corn_(maize)___Cercospora_leaf_spot Gray_leaf_spot', 22: 'Tomato__Tomato_mosaic_virus'}
+
+UNCERTAIN_LABEL = "uncertain"
+
+
+@dataclass
+class Prediction:
+    """Top-1 label with its softmax confidence and the k most likely (label, probability) pairs."""
+    label: str
+    confidence: float
+    top_k: list = field(default_factory=list)
+    uncertain: bool = False
+    
+    @property
+    def display_label(self):
+        return UNCERTAIN_LABEL if self.uncertain else self.label
+    
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "confidence": self.confidence,
+            "top_k": [{"label": label, "probability": probability} for label, probability in self.top_k],
+            "uncertain": self.uncertain,
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        top_k = [(item["label"], item["probability"]) for item in data["top_k"]]
+        return cls(data["label"], data["confidence"], top_k, data["uncertain"])
+
+
 class CustomeCnnModel(nn.Module):
     def __init__(self, input_dim, num_classes):
         super(CustomeCnnModel, self).__init__()
@@ -59,24 +96,173 @@ class CustomeCnnModel(nn.Module):
         x = self.fc_layers(x)
         return x
 
+INPUT_SIZE = 128
+
+
+def default_transform():
+    return transforms.Compose([
+        transforms.Resize((INPUT_SIZE, INPUT_SIZE)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.5, 0.5, 0.5], std=[0.5, 0.5, 0.5])]
+    )
+
+
+CNN_BACKENDS = ("eager", "torchscript", "onnxruntime", "int8")
+
+
+def backend_artifact_path(model_path, backend):
+    """Where core.export writes the artifact for a backend, next to the .pth weights."""
+    stem = os.path.splitext(model_path)[0]
+    return {
+        "eager": model_path,
+        "torchscript": stem + ".torchscript.pt",
+        "int8": stem + "_int8.torchscript.pt",
+        "onnxruntime": stem + ".onnx",
+    }[backend]
+
+
+def load_fp32_model(model_path, device="cpu"):
+    model = CustomeCnnModel(input_dim=128, num_classes=23).to(device)
+    model.load_state_dict(torch.load(model_path, map_location=device))
+    return model.eval()
+
+
+def select_quantized_engine():
+    engines = torch.backends.quantized.supported_engines
+    for engine in ("x86", "fbgemm", "qnnpack"):
+        if engine in engines:
+            torch.backends.quantized.engine = engine
+            return engine
+    raise RuntimeError("No quantized engine available in this torch build")
+
+
+class ImagePreprocessor():
+    """
+    Upload bytes / paths / PIL images -> (3, 128, 128) model input.
+    
+    In fast mode (CNN_FAST_PREPROCESS, on by default) JPEGs are decoded in draft
+    mode near the model size and resized/normalized with one cv2 + NumPy pass,
+    instead of running the torchvision transform on the full-resolution image.
+    """
+    def __init__(self, fast_preprocess=None):
+        if fast_preprocess is None:
+            fast_preprocess = os.getenv("CNN_FAST_PREPROCESS", "1") == "1"
+        self.fast_preprocess = fast_preprocess
+        self.transform = default_transform()
+        self._buffers = threading.local()
+    
+    def decode(self, image):
+        """
+        Decode raw upload bytes once into an RGB uint8 array; arrays pass straight through.
+        In fast mode a JPEG is decoded at the smallest 1/2, 1/4 or 1/8 scale that is
+        still at least twice the model input, so a 12 MP photo never decodes in full.
+        """
+        if isinstance(image, np.ndarray):
+            return image
+        if isinstance(image, Image.Image):
+            return np.asarray(image.convert("RGB"))
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            image = BytesIO(image)
+        img = Image.open(image)
+        if self.fast_preprocess and img.format == "JPEG":
+            img.draft("RGB", (2 * INPUT_SIZE, 2 * INPUT_SIZE))
+        return np.asarray(img.convert("RGB"))
+    
+    def batch_buffer(self, size):
+        """Per-thread preallocated (size, 3, 128, 128) float32 input, grown on demand."""
+        buffer = getattr(self._buffers, "batch", None)
+        if buffer is None or len(buffer) < size:
+            buffer = torch.empty((max(size, 32), 3, INPUT_SIZE, INPUT_SIZE), dtype=torch.float32)
+            self._buffers.batch = buffer
+        return buffer[:size]
+    
+    def preprocess_into(self, rgb, out):
+        """Area resize + (x / 255 - 0.5) / 0.5 written straight into out, a (3, 128, 128) float32 array."""
+        resized = cv2.resize(rgb, (INPUT_SIZE, INPUT_SIZE), interpolation=cv2.INTER_AREA)
+        np.multiply(resized.transpose(2, 0, 1), 2.0 / 255.0, out=out, casting="unsafe")
+        out -= 1.0
+        return out
+    
+    def preprocess(self, image):
+        """Model tensor from bytes, a file path or an already decoded RGB array."""
+        rgb = self.decode(image)
+        if not self.fast_preprocess:
+            return self.transform(Image.fromarray(rgb))
+        return torch.from_numpy(self.preprocess_into(rgb, np.empty((3, INPUT_SIZE, INPUT_SIZE), dtype=np.float32)))
+    
+    def preprocess_batch(self, images):
+        """Preprocess several images into this thread's reusable batch buffer (fast mode)."""
+        batch = self.batch_buffer(len(images))
+        for slot, image in zip(batch.numpy(), images):
+            if self.fast_preprocess:
+                self.preprocess_into(self.decode(image), slot)
+            else:
+                slot[...] = self.preprocess(image).numpy()
+        return batch
+    
+
 class ImageClassifier():
     
-    def __init__(self, model_path, class_name=None):
-        self.device=torch.device("Cuda" if torch.cuda.is_available() else "cpu")
-        self.model = CustomeCnnModel(input_dim=128, num_classes=23).to(self.device)
-        self.model.load_state_dict(torch.load(model_path, map_location = self.device))
-        self.model.eval()
+    def __init__(self, model_path, class_name=None, backend=None, fast_preprocess=None,
+                 top_k=None, confidence_threshold=None):
+        """
+        backend picks the inference runtime (CNN_BACKEND env by default):
+        eager (the .pth weights), torchscript, onnxruntime or int8, the last three
+        loaded from the artifacts written by `python -m core.export`.
+        fast_preprocess selects the ImagePreprocessor mode.
+        
+        Predictions carry the top_k (CNN_TOP_K) most likely labels; a top-1
+        probability below confidence_threshold (CNN_CONFIDENCE_THRESHOLD) marks the
+        prediction uncertain so callers can skip the treatment lookup. The default 0
+        leaves every prediction as it was; deployments opt in once their clients
+        handle the "uncertain" label.
+        """
+        self.top_k = top_k if top_k is not None else int(os.getenv("CNN_TOP_K", "3"))
+        self.confidence_threshold = (
+            confidence_threshold if confidence_threshold is not None
+            else float(os.getenv("CNN_CONFIDENCE_THRESHOLD", "0"))
+        )
+        if not 0.0 <= self.confidence_threshold <= 1.0:
+            raise ValueError(f"confidence_threshold must be between 0 and 1, got {self.confidence_threshold}")
+        self.preprocessor = ImagePreprocessor(fast_preprocess)
+        self.backend = backend or os.getenv("CNN_BACKEND", "eager")
+        if self.backend not in CNN_BACKENDS:
+            raise ValueError(f"Unknown CNN backend {self.backend}, expected one of {CNN_BACKENDS}")
+        self.device=torch.device("cuda" if torch.cuda.is_available() and self.backend in ("eager", "torchscript") else "cpu")
+        self.model, self.runner = self._load_backend(model_path)
         
         if class_name is None:
-            self.class_name = {0: 'Tomato_Early_blight', 1: 'Tomato_Septoria_leaf_spot', 2: 'Tomato_healthy', 3: 'Pepper__bell___Bacterial_spot', 4: 'Tomato_Spider_mites_Two_spotted_spider_mite', 5: 'Pepper__bell___healthy', 6: 'Tomato__Tomato_YellowLeaf__Curl_Virus', 7: 'Apple___healthy', 8: 'Tomato_Leaf_Mold', 9: 'Potato___Late_blight', 10: 'Corn_(maize)___Common_rust_', 11: 'Corn_(maize)___healthy', 12: 'Apple___Black_rot', 13: 'Potato___Early_blight', 14: 'Apple___Apple_scab', 15: 'Apple___Cedar_apple_rust', 16: 'Corn_(maize)___Northern_Leaf_Blight', 17: 'Tomato_Late_blight', 18: 'Tomato__Target_Spot', 19: 'Potato___healthy', 20: 'Tomato_Bacterial_spot', 21: 'Corn_(maize)___Cercospora_leaf_spot Gray_leaf_spot', 22: 'Tomato__Tomato_mosaic_virus'}
+            self.class_name = CLASS_NAME
         else:
             self.class_name = class_name
         
-        self.transform=transforms.Compose([
-        transforms.Resize((128, 128)),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.5, 0.5, 0.5], std=[0.5, 0.5, 0.5])]
-        )
+        self.transform=self.preprocessor.transform
+    
+    def _load_backend(self, model_path):
+        """Returns (model object, callable mapping a batch tensor to logits)."""
+        artifact_path = backend_artifact_path(model_path, self.backend)
+        if self.backend == "eager":
+            model = load_fp32_model(artifact_path, self.device)
+            return model, model
+        if not os.path.exists(artifact_path):
+            raise FileNotFoundError(
+                f"CNN_BACKEND={self.backend} needs {artifact_path}, which has not been exported; "
+                f"run `python -m core.export` (ONNX is skipped when the onnx package is missing) "
+                f"or use CNN_BACKEND=eager"
+            )
+        if self.backend == "onnxruntime":
+            import onnxruntime as ort
+            
+            session = ort.InferenceSession(artifact_path, providers=["CPUExecutionProvider"])
+            input_name = session.get_inputs()[0].name
+            
+            def run_onnx(batch):
+                return torch.from_numpy(session.run(None, {input_name: batch.numpy()})[0])
+            return session, run_onnx
+        if self.backend == "int8":
+            select_quantized_engine()
+        model = torch.jit.load(artifact_path, map_location=self.device).eval()
+        return model, model
         
         
         
@@ -89,21 +275,95 @@ class ImageClassifier():
     #CNN()
     #CNN load_dict()
     
-    def predict(self, image_path):
-        image = Image.open(image_path).convert("RGB")
-        image_tensor=self.transform(image).unsqueeze(0).to(self.device)
+    @timed("decode")
+    def decode(self, image):
+        return self.preprocessor.decode(image)
+    
+    @timed("preprocess")
+    def preprocess(self, image):
+        return self.preprocessor.preprocess(image)
+    
+    @timed("preprocess")
+    def preprocess_batch(self, images):
+        return self.preprocessor.preprocess_batch(images)
+    
+    def _as_batch(self, image_tensors):
+        """Preprocessed (3, 128, 128) tensors, a list or a stacked batch, as one device tensor."""
+        if isinstance(image_tensors, torch.Tensor):
+            batch = image_tensors
+        else:
+            image_tensors = list(image_tensors)
+            batch = self.preprocessor.batch_buffer(len(image_tensors))
+            for slot, tensor in zip(batch, image_tensors):
+                slot.copy_(tensor)
+        return batch.to(self.device)
+    
+    @timed("cnn_forward")
+    def predict_batch(self, image_tensors):
+        """Run one forward pass over preprocessed (3, 128, 128) tensors, a list or a stacked batch."""
+        batch = self._as_batch(image_tensors)
         
         with torch.no_grad():
-            output=self.model(image_tensor)
+            output=self.runner(batch)
             _, predicted = torch.max(output, 1)
             
-        labels= self.class_name[predicted.item()]
+        return [self.class_name[index] for index in predicted.tolist()]
+    
+    @timed("cnn_forward")
+    def predict_topk_batch(self, image_tensors, k=3):
+        """Like predict_batch, but each image gets its k most likely (label, softmax probability) pairs."""
+        batch = self._as_batch(image_tensors)
+        
+        with torch.no_grad():
+            probabilities = torch.softmax(self.runner(batch).float(), dim=1)
+            scores, indices = probabilities.topk(min(k, probabilities.shape[1]), dim=1)
         
-        img = cv2.imread(image_path)
+        return [
+            [(self.class_name[index], score) for index, score in zip(row_indices, row_scores)]
+            for row_indices, row_scores in zip(indices.tolist(), scores.tolist())
+        ]
+    
+    def classify_batch(self, image_tensors):
+        """Prediction objects for a batch: top-k scores plus the confidence threshold check."""
+        return [
+            Prediction(ranked[0][0], ranked[0][1], ranked, ranked[0][1] < self.confidence_threshold)
+            for ranked in self.predict_topk_batch(image_tensors, k=self.top_k)
+        ]
+    
+    @timed("annotate")
+    def annotate(self, rgb, labels):
+        """Draw the label on a copy of the decoded image and return it JPEG encoded."""
+        img = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
         cv2.putText(img, labels, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
-        output_path = "labled_image.jpg"
-        cv2.imwrite(output_path, img)
-        cwd=os.getcwd()
-        output_path = os.path.join(cwd, output_path)
+        ok, encoded = cv2.imencode(".jpg", img)
+        if not ok:
+            raise ValueError("Could not encode annotated image")
+        return encoded.tobytes()
+    
+    @staticmethod
+    def save_annotated(annotated_jpeg, output_dir):
+        """Opt-in disk mode: content-addressed file name, so concurrent requests never collide."""
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, f"{hashlib.sha256(annotated_jpeg).hexdigest()}.jpg")
+        if not os.path.exists(output_path):
+            with open(output_path, "wb") as file_obj:
+                file_obj.write(annotated_jpeg)
+        return output_path
+    
+    def predict_image(self, image, annotate=True):
+        """
+        Decode once and derive both the model input and the annotated image from
+        that buffer. Returns (Prediction, annotated JPEG bytes or None).
+        """
+        rgb = self.decode(image)
+        prediction = self.classify_batch([self.preprocess(rgb)])[0]
+        annotated = self.annotate(rgb, prediction.display_label) if annotate else None
+        return prediction, annotated
+    
+    @timed("predict")
+    def predict(self, image_path, output_dir=None):
+        """Label and annotated image path, as before; classify_batch/predict_image return the full Prediction."""
+        prediction, annotated = self.predict_image(image_path)
+        output_path = self.save_annotated(annotated, output_dir or os.getcwd())
         
-        return labels, output_path 
\ No newline at end of file
+        return prediction.label, output_path 
\ No newline at end of file
@@ -0,0 +1,188 @@
+import asyncio
+import base64
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import APIRouter, Form, UploadFile
+from fastapi.responses import JSONResponse
+
+from core.batching import MicroBatcher
+from core.cache import DiseaseResultCache
+from core.clients import build_llm_client, build_translator_client
+from core.metrics import timed
+from core.predict import CLASS_NAME, ImageClassifier, Prediction
+from core.solutions import SolutionService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model", "cnn_model.pth")
+
+# Shown instead of a treatment when the top-1 confidence is below CNN_CONFIDENCE_THRESHOLD
+RETAKE_MESSAGE = {
+    "English": "The image could not be classified with confidence. Please retake a clear, close photo of a single leaf.",
+    "Hindi": "छवि को विश्वास के साथ पहचाना नहीं जा सका। कृपया एक पत्ती की साफ़, नज़दीक से फ़ोटो दोबारा लें।",
+}
+
+
+def log_warm_up_result(task):
+    """Done-callback of the background warm-up, so a failure is not lost with the task."""
+    if task.cancelled():
+        logger.info("Solution cache warm-up cancelled")
+    elif task.exception() is not None:
+        logger.error("Solution cache warm-up failed", exc_info=task.exception())
+    else:
+        logger.info("Warmed %d (label, language) solution cache entries", task.result())
+
+
+class DiseaseService:
+    """
+    Everything /classify_image needs, split by lifetime.
+
+    The classifier is loaded in __init__, so a preloading server (gunicorn
+    --preload) loads the weights once and forked workers share them
+    copy-on-write. Thread pools, the micro-batcher, upstream clients and the
+    result cache are created in start(), inside each worker: threads, event-loop
+    tasks, sockets and sqlite handles do not survive fork().
+    """
+    def __init__(self, model_path=None, classifier=None):
+        self.classifier = classifier or ImageClassifier(
+            model_path=os.getenv("CNN_MODEL_PATH", model_path or DEFAULT_MODEL_PATH), class_name=CLASS_NAME
+        )
+        # Annotated images are returned inline; set MARKED_IMAGE_DIR to also keep them on disk
+        self.marked_image_dir = os.getenv("MARKED_IMAGE_DIR")
+        self.inference_executor = None
+        self.image_executor = None
+        self.batcher = None
+        self.result_cache = None
+        self.solution_service = None
+        self.warm_up_task = None
+        self._owns_image_executor = False
+
+    async def start(self, image_executor=None):
+        """Per-process setup; image_executor lets a host app share its CPU pool."""
+        # CPU-bound work runs on bounded thread pools so the event loop only does I/O.
+        # torch, PIL and cv2 release the GIL for the heavy parts.
+        self.inference_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("CNN_INFERENCE_WORKERS", "1")), thread_name_prefix="cnn-inference"
+        )
+        self._owns_image_executor = image_executor is None
+        self.image_executor = image_executor or ThreadPoolExecutor(
+            max_workers=int(os.getenv("IMAGE_WORKERS", str(os.cpu_count() or 1))), thread_name_prefix="image-io"
+        )
+
+        # Concurrent uploads share one CNN forward pass through the micro-batcher
+        self.batcher = MicroBatcher(self.classifier.classify_batch, executor=self.inference_executor)
+        await self.batcher.start()
+
+        # Gemini and the translator each get their own concurrency limit and timeout;
+        # LLM_BACKEND=stub / TRANSLATOR_BACKEND=stub swap in offline fakes for load tests.
+        # image hash -> prediction and (label, language) -> treatment, backend picked by CACHE_BACKEND
+        self.result_cache = DiseaseResultCache()
+        self.solution_service = SolutionService(build_llm_client(), build_translator_client(), self.result_cache)
+
+        if os.getenv("WARM_SOLUTION_CACHE", "0") == "1":
+            # fill the (label, language) cache in the background so the LLM leaves the hot path
+            self.warm_up_task = asyncio.create_task(
+                self.solution_service.warm_up(list(self.classifier.class_name.values()))
+            )
+            self.warm_up_task.add_done_callback(log_warm_up_result)
+
+    async def stop(self):
+        if self.warm_up_task is not None:
+            self.warm_up_task.cancel()
+            await asyncio.gather(self.warm_up_task, return_exceptions=True)
+        if self.batcher is not None:
+            await self.batcher.stop()
+        if self.inference_executor is not None:
+            self.inference_executor.shutdown(wait=False)
+        if self._owns_image_executor and self.image_executor is not None:
+            self.image_executor.shutdown(wait=False)
+
+    async def translate_solution(self, text, language: str):
+        """Translate the solution text if Hindi selected."""
+        return await self.solution_service.translate_solution(text, language)
+
+    async def get_disease_solution(self, disease_name: str, language: str):
+        """Use Gemini AI to get treatment solution (cached per label and language)."""
+        # cache hits included; the Gemini call itself is the "llm" stage
+        with timed("solution"):
+            return await self.solution_service.get_disease_solution(disease_name, language)
+
+    def cached_prediction(self, image_hash):
+        """Cached Prediction for an image hash; entries from before top-k caching count as misses."""
+        cached = self.result_cache.get_label(image_hash)
+        if cached is None:
+            return None
+        try:
+            prediction = Prediction.from_dict(json.loads(cached))
+        except (ValueError, TypeError, KeyError):
+            return None
+        # the threshold may have changed since the entry was written
+        prediction.uncertain = prediction.confidence < self.classifier.confidence_threshold
+        return prediction
+
+    async def classify(self, contents: bytes, language: str):
+        loop = asyncio.get_running_loop()
+        classifier = self.classifier
+        image_hash = self.result_cache.image_key(contents)
+        # decode once, the same buffer feeds the model and the annotation
+        rgb = await loop.run_in_executor(self.image_executor, classifier.decode, contents)
+
+        # Predict using CNN, unless this exact photo was classified before
+        prediction = self.cached_prediction(image_hash)
+        if prediction is None:
+            image_tensor = await loop.run_in_executor(self.image_executor, classifier.preprocess, rgb)
+            # queueing for a batch plus the forward pass it lands in
+            with timed("cnn_batch"):
+                prediction = await self.batcher.submit(image_tensor)
+            self.result_cache.set_label(image_hash, json.dumps(prediction.to_dict()))
+        annotated = await loop.run_in_executor(self.image_executor, classifier.annotate, rgb, prediction.display_label)
+
+        # Get AI solution, skipped for low-confidence pictures (blurry, not a leaf, ...)
+        if prediction.uncertain:
+            solution = RETAKE_MESSAGE["Hindi" if language.lower() == "hindi" else "English"]
+        else:
+            solution = await self.get_disease_solution(prediction.label, language)
+
+        response = {
+            "disease": prediction.display_label,
+            "solution": solution,
+            "confidence": prediction.confidence,
+            "uncertain": prediction.uncertain,
+            "top_k": prediction.to_dict()["top_k"],
+            "marked_image": "data:image/jpeg;base64," + base64.b64encode(annotated).decode("ascii")
+        }
+        if self.marked_image_dir:
+            response["marked_image_path"] = await loop.run_in_executor(
+                self.image_executor, classifier.save_annotated, annotated, self.marked_image_dir
+            )
+        return response
+
+
+def build_disease_router(service: DiseaseService) -> APIRouter:
+    router = APIRouter()
+
+    @router.post("/classify_image")
+    async def classify_image(image: UploadFile, language: str = Form("English")):
+        """
+        Upload a plant leaf image and get:
+        - Disease name, its confidence and the top-k alternatives
+        - Marked image (inline base64 JPEG data URL)
+        - AI-based treatment suggestion
+        """
+        try:
+            contents = await image.read()
+            return JSONResponse(await service.classify(contents, language))
+        except asyncio.TimeoutError:
+            return JSONResponse({"error": "Upstream service timed out"}, status_code=504)
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=500)
+
+    @router.get("/batcher_metrics")
+    def batcher_metrics():
+        """Queue depth and batch size distribution of the CNN micro-batcher."""
+        return service.batcher.metrics()
+
+    return router
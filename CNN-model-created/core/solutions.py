@@ -0,0 +1,67 @@
+import asyncio
+
+from core.cache import DiseaseResultCache
+from core.metrics import timed
+
+LANGUAGES = ("English", "Hindi")
+
+
+class SolutionService:
+    """
+    Treatment text for a detected disease, served from the (label, language)
+    cache. Concurrent misses for the same key share one upstream call, and the
+    Hindi text is a translation of the cached English one, so each label costs
+    at most one LLM request.
+    """
+    def __init__(self, llm_client, translator_client, cache: DiseaseResultCache):
+        self.llm_client = llm_client
+        self.translator_client = translator_client
+        self.cache = cache
+        self._in_flight = {}
+
+    @staticmethod
+    def _language(language: str) -> str:
+        return "Hindi" if language.lower() == "hindi" else "English"
+
+    async def translate_solution(self, text, language: str):
+        """Translate the solution text if Hindi selected."""
+        if language.lower() == "hindi":
+            with timed("translate"):
+                return await self.translator_client.translate(text, target='hi')
+        return text
+
+    async def _generate(self, disease_name: str, language: str):
+        if language == "Hindi":
+            english = await self.get_disease_solution(disease_name, "English")
+            return await self.translate_solution(english, language)
+        prompt = f"I detected a plant disease named '{disease_name}'. Suggest a suitable organic or chemical treatment, prevention tips, and fertilizers."
+        with timed("llm"):
+            return await self.llm_client.generate(prompt)
+
+    async def get_disease_solution(self, disease_name: str, language: str):
+        """Use Gemini AI to get treatment solution, cached per (label, language)."""
+        language = self._language(language)
+        solution = self.cache.get_solution(disease_name, language)
+        if solution is not None:
+            return solution
+
+        key = (disease_name, language)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._generate(disease_name, language))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        solution = await asyncio.shield(task)
+        self.cache.set_solution(disease_name, language, solution)
+        return solution
+
+    async def warm_up(self, labels, languages=LANGUAGES, concurrency: int = 4):
+        """Pre-generate every (label, language) pair so the LLM stays off the hot path."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def warm(label, language):
+            async with semaphore:
+                await self.get_disease_solution(label, language)
+
+        await asyncio.gather(*(warm(label, language) for label in labels for language in languages))
+        return len(labels) * len(languages)
@@ -0,0 +1,52 @@
+"""
+Pre-generate the treatment text for every (label, language) pair.
+
+    python -m core.warmup --concurrency 4
+
+Requires a shared backend (CACHE_BACKEND=sqlite or redis): the memory backend
+lives in this process, so the serving workers would never see the warmed
+entries. To warm an in-process cache, set WARM_SOLUTION_CACHE=1 on the server.
+"""
+import argparse
+import asyncio
+import logging
+
+from dotenv import load_dotenv
+
+from core.cache import CacheConfig, DiseaseResultCache
+from core.clients import build_llm_client, build_translator_client
+from core.predict import CLASS_NAME
+from core.solutions import SolutionService, LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+SHARED_BACKENDS = ("sqlite", "redis")
+
+
+async def warm_solution_cache(concurrency: int, config: CacheConfig = None):
+    config = config or CacheConfig()
+    if config.backend not in SHARED_BACKENDS:
+        raise ValueError(
+            f"CACHE_BACKEND={config.backend} keeps entries in this process, so serving workers would not see them; "
+            f"use one of {', '.join(SHARED_BACKENDS)}"
+        )
+    service = SolutionService(build_llm_client(), build_translator_client(), DiseaseResultCache(config))
+    return await service.warm_up(list(CLASS_NAME.values()), LANGUAGES, concurrency=concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the (label, language) treatment cache")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(lineno)d %(name)s - %(levelname)s - %(message)s")
+    try:
+        warmed = asyncio.run(warm_solution_cache(args.concurrency))
+    except ValueError as e:
+        parser.error(str(e))
+    logger.info("Warmed %d (label, language) entries", warmed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# the disease API imports its modules as core.*, relative to CNN-model-created
+CNN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if CNN_ROOT not in sys.path:
+    sys.path.insert(0, CNN_ROOT)
+
+# offline stand-ins for Gemini and the translator (core.clients); read when core is first imported
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("TRANSLATOR_BACKEND", "stub")
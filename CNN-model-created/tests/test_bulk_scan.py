@@ -0,0 +1,75 @@
+import csv
+import os
+import shutil
+import zipfile
+
+import pandas as pd
+import pytest
+import torch
+
+from core.bulk_scan import ARCHIVE_SEPARATOR, scan
+from core.predict import CLASS_NAME, CustomeCnnModel, ImageClassifier
+
+CNN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEAF_IMAGE = os.path.join(CNN_ROOT, "uploaded_image.jpg")
+
+
+@pytest.fixture(scope="module")
+def classifier(tmp_path_factory):
+    path = tmp_path_factory.mktemp("model") / "cnn_model.pth"
+    torch.manual_seed(0)
+    torch.save(CustomeCnnModel(input_dim=128, num_classes=len(CLASS_NAME)).state_dict(), path)
+    return ImageClassifier(str(path), backend="eager", top_k=2, confidence_threshold=0)
+
+
+@pytest.fixture
+def survey(tmp_path):
+    folder = tmp_path / "survey"
+    (folder / "field_b").mkdir(parents=True)
+    for name in ("a.jpg", "b.jpg", "field_b/c.jpg"):
+        shutil.copy(LEAF_IMAGE, folder / name)
+    (folder / "broken.jpg").write_bytes(b"not a jpeg")
+    (folder / "notes.txt").write_text("ignored")
+    return folder
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as file_obj:
+        return list(csv.DictReader(file_obj))
+
+
+def test_folder_scan_records_errors_and_resumes(survey, classifier, tmp_path):
+    output = str(tmp_path / "scan.csv")
+    assert scan(str(survey), output, classifier, batch_size=2, workers=0) == 4
+
+    rows = {os.path.basename(row["path"]): row for row in read_csv(output)}
+    assert sorted(rows) == ["a.jpg", "b.jpg", "broken.jpg", "c.jpg"]
+    assert rows["broken.jpg"]["error"] and not rows["broken.jpg"]["label_1"]
+    assert rows["a.jpg"]["label_1"] in CLASS_NAME.values() and not rows["a.jpg"]["error"]
+    assert rows["a.jpg"]["label_1"] == rows["c.jpg"]["label_1"]
+
+    # an interrupted run leaves half a row: it is cut off and nothing is scanned twice
+    with open(output, "a", encoding="utf-8") as file_obj:
+        file_obj.write(str(survey / "a.jpg") + ",Tomato")
+    assert scan(str(survey), output, classifier, batch_size=2, workers=0) == 0
+    assert len(read_csv(output)) == 4
+
+    shutil.copy(LEAF_IMAGE, survey / "d.jpg")
+    assert scan(str(survey), output, classifier, batch_size=2, workers=0) == 1
+
+
+def test_zip_scan_to_parquet_in_a_worker_process_with_annotations(survey, classifier, tmp_path):
+    archive_path = str(tmp_path / "survey.zip")
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        for name in ("a.jpg", "b.jpg", "field_b/c.jpg", "broken.jpg"):
+            archive.write(survey / name, name)
+    output = str(tmp_path / "scan.parquet")
+    annotated_dir = str(tmp_path / "marked")
+
+    assert scan(archive_path, output, classifier, batch_size=3, workers=1, annotated_dir=annotated_dir) == 4
+    results = pd.read_parquet(output)
+    assert sorted(results["path"]) == sorted(f"{archive_path}{ARCHIVE_SEPARATOR}{name}"
+                                            for name in ("a.jpg", "b.jpg", "broken.jpg", "field_b/c.jpg"))
+    assert results["error"].notna().sum() == 1
+    assert len(os.listdir(annotated_dir)) == 3
+    assert scan(archive_path, output, classifier, batch_size=3, workers=1) == 0
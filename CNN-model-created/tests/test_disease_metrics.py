@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+CNN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_core_metrics_does_not_need_the_fertilizer_package():
+    # the disease API is deployed from CNN-model-created alone
+    script = (
+        "import sys; from core.metrics import timed\n"
+        "with timed('decode'): pass\n"
+        "print(sorted(name for name in sys.modules if name == 'src' or name.startswith('src.')))"
+    )
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONPATH"}
+    output = subprocess.run([sys.executable, "-c", script], cwd=CNN_ROOT, env=env, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
+
+
+def test_disease_stages_and_profiler_routes(monkeypatch):
+    from core.metrics import instrument_app, timed
+
+    with timed("test_stage"):
+        pass
+    assert REGISTRY.get_sample_value("disease_stage_seconds_count", {"stage": "test_stage"}) == 1
+
+    app = FastAPI()
+    instrument_app(app, namespace="test_disease")
+    monkeypatch.delenv("PROFILER_ENABLED", raising=False)
+    with TestClient(app) as client:
+        assert client.post("/profiler/stop").status_code == 403
+        monkeypatch.setenv("PROFILER_ENABLED", "1")
+        assert client.post("/profiler/stop").status_code == 200
@@ -0,0 +1,90 @@
+import asyncio
+import os
+import time
+
+import pytest
+import torch
+
+from core.clients import GoogleTranslatorClient, UpstreamConfig
+from core.predict import CLASS_NAME, CustomeCnnModel, ImageClassifier
+from core.service import DiseaseService
+
+CNN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEAF_IMAGE = os.path.join(CNN_ROOT, "uploaded_image.jpg")
+BLOCKING_SECONDS = 0.3
+
+
+class SlowRunner:
+    """Runner that holds its thread like a slow CNN forward pass."""
+    def __call__(self, batch):
+        time.sleep(BLOCKING_SECONDS)
+        return torch.zeros(len(batch), len(CLASS_NAME))
+
+
+async def run_with_heartbeat(coro):
+    """Await coro while a heartbeat task measures the longest gap between event-loop turns."""
+    gaps = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    task = asyncio.create_task(heartbeat())
+    try:
+        return await coro, max(gaps)
+    finally:
+        done.set()
+        await task
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("model") / "cnn_model.pth"
+    torch.manual_seed(0)
+    torch.save(CustomeCnnModel(input_dim=128, num_classes=len(CLASS_NAME)).state_dict(), path)
+    return str(path)
+
+
+def test_classify_keeps_the_event_loop_free_during_the_forward_pass(model_path):
+    classifier = ImageClassifier(model_path, backend="eager")
+    classifier.runner = SlowRunner()
+    service = DiseaseService(classifier=classifier)
+    with open(LEAF_IMAGE, "rb") as file_obj:
+        contents = file_obj.read()
+
+    async def main():
+        await service.start()
+        try:
+            return await run_with_heartbeat(service.classify(contents, "English"))
+        finally:
+            await service.stop()
+
+    response, longest_gap = asyncio.run(main())
+    assert response["confidence"] == pytest.approx(1 / len(CLASS_NAME))
+    assert longest_gap < BLOCKING_SECONDS / 3
+
+
+def test_blocking_translator_runs_on_its_own_pool(monkeypatch):
+    def slow_translate(text, target):
+        time.sleep(BLOCKING_SECONDS)
+        return f"{target}:{text}"
+
+    monkeypatch.setattr(GoogleTranslatorClient, "_translate", staticmethod(slow_translate))
+    client = GoogleTranslatorClient(UpstreamConfig(translator_timeout_seconds=5))
+
+    translated, longest_gap = asyncio.run(run_with_heartbeat(client.translate("leaf spot", "hi")))
+    assert translated == "hi:leaf spot"
+    assert longest_gap < BLOCKING_SECONDS / 3
+
+
+def test_translator_timeout_is_enforced(monkeypatch):
+    monkeypatch.setattr(GoogleTranslatorClient, "_translate", staticmethod(lambda text, target: time.sleep(1)))
+    client = GoogleTranslatorClient(UpstreamConfig(translator_timeout_seconds=0.05))
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(client.translate("leaf spot", "hi"))
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+import torch
+
+from core.export import load_batches, recommendation
+from core.predict import ImageClassifier, default_transform
+
+CNN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEAF_IMAGE = os.path.join(CNN_ROOT, "uploaded_image.jpg")
+
+
+def test_unreadable_calibration_images_are_skipped(tmp_path, caplog):
+    corrupt = tmp_path / "corrupt.jpg"
+    corrupt.write_bytes(b"not a jpeg")
+    paths = [LEAF_IMAGE, str(corrupt), str(tmp_path / "missing.jpg"), LEAF_IMAGE]
+
+    batches, loaded = load_batches(paths, default_transform(), batch_size=8)
+    assert loaded == [0, 3]
+    assert caplog.text.count("Skipping unreadable image") == 2
+    assert [batch.shape for batch in batches] == [torch.Size([2, 3, 128, 128])]
+
+
+def test_export_fails_only_when_no_image_loads(tmp_path):
+    corrupt = tmp_path / "corrupt.jpg"
+    corrupt.write_bytes(b"not a jpeg")
+    with pytest.raises(RuntimeError):
+        load_batches([str(corrupt)], default_transform(), batch_size=8)
+    assert load_batches([], default_transform(), batch_size=8) == ([], [])
+
+
+@pytest.mark.parametrize("backend", ["onnxruntime", "torchscript", "int8"])
+def test_backend_without_an_exported_artifact_names_the_export_command(tmp_path, backend):
+    with pytest.raises(FileNotFoundError, match="python -m core.export"):
+        ImageClassifier(str(tmp_path / "cnn_model.pth"), backend=backend)
+
+
+def backend_results(**latency_and_budget):
+    return {name: {"batch_latency_ms": latency, flag: ok} for name, (latency, flag, ok) in latency_and_budget.items()}
+
+
+def test_backend_is_recommended_on_measured_accuracy():
+    results = backend_results(eager=(10.0, "within_budget", True), int8=(4.0, "within_budget", True),
+                              torchscript=(6.0, "within_budget", False))
+    assert recommendation(results, evaluated=True) == {"recommended_backend": "int8"}
+    assert recommendation(backend_results(int8=(4.0, "within_budget", False)), evaluated=True) == {"recommended_backend": "eager"}
+
+
+def test_agreement_alone_is_reported_but_not_recommended():
+    results = backend_results(eager=(10.0, "within_agreement_budget", True), int8=(4.0, "within_agreement_budget", True))
+    assert recommendation(results, evaluated=False) == {
+        "recommended_backend": None,
+        "agreement_only_fastest_backend": "int8",
+    }
@@ -0,0 +1,69 @@
+import io
+import os
+
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
+from core.predict import CLASS_NAME, INPUT_SIZE, CustomeCnnModel, ImageClassifier, ImagePreprocessor
+
+CNN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEAF_IMAGE = os.path.join(CNN_ROOT, "uploaded_image.jpg")
+
+
+def camera_jpeg(width=2000, height=1600):
+    """Smooth synthetic photo, large enough for draft decoding to kick in."""
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    rgb = np.stack([
+        127 + 100 * np.sin(x / 150),
+        127 + 100 * np.cos(y / 120),
+        127 + 60 * np.sin((x + y) / 200),
+    ], axis=-1).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(rgb).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def images():
+    with open(LEAF_IMAGE, "rb") as file_obj:
+        return [camera_jpeg(), file_obj.read()]
+
+
+def test_draft_decode_shrinks_large_jpegs_but_not_below_twice_the_input(images):
+    fast = ImagePreprocessor(fast_preprocess=True).decode(images[0])
+    full = ImagePreprocessor(fast_preprocess=False).decode(images[0])
+    assert full.shape == (1600, 2000, 3)
+    assert min(fast.shape[:2]) >= 2 * INPUT_SIZE
+    assert fast.shape[0] < full.shape[0] and fast.dtype == np.uint8
+
+
+def test_fast_input_matches_the_torchvision_transform(images):
+    fast, slow = ImagePreprocessor(fast_preprocess=True), ImagePreprocessor(fast_preprocess=False)
+    for image in images:
+        expected = slow.preprocess(image)
+        actual = fast.preprocess(image)
+        assert actual.shape == (3, INPUT_SIZE, INPUT_SIZE) and actual.dtype == torch.float32
+        assert -1.0 <= actual.min() and actual.max() <= 1.0
+        assert (actual - expected).abs().mean() < 0.03
+
+
+def test_fast_and_reference_preprocessing_give_the_same_label(images, tmp_path):
+    model_path = tmp_path / "cnn_model.pth"
+    torch.manual_seed(0)
+    torch.save(CustomeCnnModel(input_dim=128, num_classes=len(CLASS_NAME)).state_dict(), model_path)
+    fast = ImageClassifier(str(model_path), backend="eager", fast_preprocess=True)
+    slow = ImageClassifier(str(model_path), backend="eager", fast_preprocess=False)
+
+    for image in images:
+        assert fast.predict_image(image, annotate=False)[0].label == slow.predict_image(image, annotate=False)[0].label
+
+
+def test_batch_buffer_is_reused_and_filled_like_preprocess(images):
+    preprocessor = ImagePreprocessor(fast_preprocess=True)
+    first = preprocessor.preprocess_batch(images)
+    pointer = first.data_ptr()
+    second = preprocessor.preprocess_batch(images[::-1])
+    assert second.data_ptr() == pointer
+    torch.testing.assert_close(second[0], preprocessor.preprocess(images[1]))
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.batching import MicroBatcher, MicroBatcherConfig
+
+
+class RecordingModel:
+    """predict_fn that remembers every batch it was called with."""
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, tensors):
+        with self.lock:
+            self.batches.append(list(tensors))
+        if self.fail:
+            raise ValueError("forward pass failed")
+        return [f"label-{tensor}" for tensor in tensors]
+
+
+def run_with_batcher(model, config, scenario):
+    async def main():
+        batcher = MicroBatcher(model, config)
+        await batcher.start()
+        try:
+            return await scenario(batcher), batcher.metrics()
+        finally:
+            await batcher.stop()
+    return asyncio.run(main())
+
+
+def test_full_batch_flushes_by_size_without_waiting():
+    model = RecordingModel()
+    config = MicroBatcherConfig(max_batch_size=4, max_wait_ms=10_000)
+
+    async def scenario(batcher):
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(8))), timeout=5)
+
+    results, metrics = run_with_batcher(model, config, scenario)
+    assert results == [f"label-{i}" for i in range(8)]
+    assert model.batches == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert metrics["flush_reasons"] == {"size": 2}
+
+
+def test_partial_batch_flushes_after_max_wait():
+    model = RecordingModel()
+    config = MicroBatcherConfig(max_batch_size=32, max_wait_ms=20)
+
+    async def scenario(batcher):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+        return results, loop.time() - started
+
+    (results, elapsed), metrics = run_with_batcher(model, config, scenario)
+    assert results == ["label-0", "label-1", "label-2"]
+    assert model.batches == [[0, 1, 2]]
+    assert metrics["flush_reasons"] == {"timeout": 1}
+    assert 0.015 <= elapsed < 1.0
+
+
+def test_results_go_back_to_their_own_requests():
+    model = RecordingModel()
+    config = MicroBatcherConfig(max_batch_size=5, max_wait_ms=5)
+
+    async def scenario(batcher):
+        async def request(i):
+            await asyncio.sleep(0.001 * (i % 3))
+            return i, await batcher.submit(i)
+        return await asyncio.gather(*(request(i) for i in range(23)))
+
+    results, metrics = run_with_batcher(model, config, scenario)
+    assert all(result == f"label-{i}" for i, result in results)
+    assert all(len(batch) <= 5 for batch in model.batches)
+    assert metrics["items_total"] == 23
+
+
+def test_forward_pass_error_reaches_every_request_in_the_batch():
+    config = MicroBatcherConfig(max_batch_size=2, max_wait_ms=5)
+
+    async def scenario(batcher):
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results, _ = run_with_batcher(RecordingModel(fail=True), config, scenario)
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_stop_fails_requests_still_queued():
+    async def main():
+        batcher = MicroBatcher(RecordingModel(), MicroBatcherConfig(max_batch_size=8, max_wait_ms=10_000))
+        pending = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0)
+        await batcher.stop()
+        with pytest.raises(RuntimeError):
+            await pending
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+import os
+
+import pytest
+
+from core import cache
+from core.cache import CacheConfig, DiseaseResultCache, FakeRedis, MemoryCache, RedisCache, SqliteCache, build_cache_backend
+
+
+class Clock:
+    """Stands in for the time module inside core.cache."""
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def redis_client():
+    url = os.getenv("TEST_REDIS_URL")
+    if not url:
+        return FakeRedis()
+    redis = pytest.importorskip("redis")
+    client = redis.Redis.from_url(url)
+    client.flushdb()
+    return client
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_backend(request, tmp_path):
+    def make(max_entries, ttl_seconds):
+        if request.param == "memory":
+            return MemoryCache(max_entries, ttl_seconds)
+        if request.param == "sqlite":
+            return SqliteCache(str(tmp_path / "results.sqlite3"), "image_label", max_entries, ttl_seconds)
+        return RedisCache(redis_client(), "image_label", ttl_seconds)
+    make.backend = request.param
+    return make
+
+
+def test_round_trip(make_backend):
+    backend = make_backend(max_entries=10, ttl_seconds=60)
+    assert backend.get("missing") is None
+    backend.set("leaf", "Tomato_healthy")
+    assert backend.get("leaf") == "Tomato_healthy"
+    backend.set("leaf", "Tomato_Leaf_Mold")
+    assert backend.get("leaf") == "Tomato_Leaf_Mold"
+
+
+def test_entries_expire_after_their_ttl(make_backend, clock):
+    if make_backend.backend == "redis" and os.getenv("TEST_REDIS_URL"):
+        pytest.skip("a real server keeps its own clock")
+    backend = make_backend(max_entries=10, ttl_seconds=30)
+    backend.set("leaf", "Tomato_healthy")
+    clock.advance(29)
+    assert backend.get("leaf") == "Tomato_healthy"
+    clock.advance(2)
+    assert backend.get("leaf") is None
+
+
+def test_least_recently_used_entry_is_evicted_first(make_backend, clock):
+    if make_backend.backend == "redis":
+        pytest.skip("eviction is the server's maxmemory-policy")
+    backend = make_backend(max_entries=2, ttl_seconds=60)
+    backend.set("a", "1")
+    clock.advance(1)
+    backend.set("b", "2")
+    clock.advance(1)
+    assert backend.get("a") == "1"  # a is now more recent than b
+    clock.advance(1)
+    backend.set("c", "3")
+    assert backend.get("b") is None
+    assert backend.get("a") == "1"
+    assert backend.get("c") == "3"
+
+
+def test_sqlite_cache_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "results.sqlite3")
+    SqliteCache(path, "solution", 10, 60).set("key", "treatment")
+    assert SqliteCache(path, "solution", 10, 60).get("key") == "treatment"
+
+
+def test_redis_ttl_is_at_least_one_second():
+    client = FakeRedis()
+    calls = []
+    client_set = client.set
+    client.set = lambda key, value, ex=None: calls.append(ex) or client_set(key, value, ex=ex)
+    RedisCache(client, "solution", 0.2).set("key", "value")
+    assert calls == [1]
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite", "fakeredis"])
+def test_result_cache_keys_labels_and_solutions_separately(backend, tmp_path):
+    result_cache = DiseaseResultCache(CacheConfig(backend=backend, sqlite_path=str(tmp_path / "results.sqlite3")))
+    image_hash = DiseaseResultCache.image_key(b"leaf bytes")
+    result_cache.set_label(image_hash, "Tomato_healthy")
+    result_cache.set_solution("Tomato_healthy", "English", "No treatment needed")
+
+    assert result_cache.get_label(image_hash) == "Tomato_healthy"
+    assert result_cache.get_label(DiseaseResultCache.image_key(b"other bytes")) is None
+    # the language is matched case-insensitively, the label is not shared with the image level
+    assert result_cache.get_solution("Tomato_healthy", "english") == "No treatment needed"
+    assert result_cache.get_solution("Tomato_healthy", "Hindi") is None
+
+
+def test_unknown_backend_name_falls_back_to_memory():
+    assert isinstance(build_cache_backend("x", 60, CacheConfig(backend="unknown")), MemoryCache)
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+
+import pytest
+
+from core.cache import CacheConfig, DiseaseResultCache
+from core.service import DiseaseService
+from core.warmup import warm_solution_cache
+
+LABELS = {0: "Tomato_healthy", 1: "Potato___Late_blight"}
+
+
+class StubClassifier:
+    class_name = LABELS
+    confidence_threshold = 0.0
+
+    def classify_batch(self, batch):
+        raise AssertionError("not used")
+
+
+def run_service(monkeypatch, warm_up):
+    """Start a DiseaseService with WARM_SOLUTION_CACHE=1 and the given warm_up, let it run, stop it."""
+    monkeypatch.setenv("WARM_SOLUTION_CACHE", "1")
+    monkeypatch.setattr("core.solutions.SolutionService.warm_up", warm_up)
+    service = DiseaseService(classifier=StubClassifier())
+
+    async def main():
+        await service.start()
+        await asyncio.sleep(0.05)
+        await service.stop()
+
+    asyncio.run(main())
+    return service
+
+
+def test_stop_cancels_a_running_warm_up(monkeypatch, caplog):
+    async def slow_warm_up(self, labels, *args, **kwargs):
+        await asyncio.sleep(10)
+
+    with caplog.at_level(logging.INFO, logger="core.service"):
+        service = run_service(monkeypatch, slow_warm_up)
+    assert service.warm_up_task.cancelled()
+    assert "warm-up cancelled" in caplog.text
+
+
+def test_failed_warm_up_is_logged(monkeypatch, caplog):
+    async def failing_warm_up(self, labels, *args, **kwargs):
+        raise RuntimeError("LLM quota exceeded")
+
+    with caplog.at_level(logging.INFO, logger="core.service"):
+        service = run_service(monkeypatch, failing_warm_up)
+    assert isinstance(service.warm_up_task.exception(), RuntimeError)
+    assert "warm-up failed" in caplog.text and "LLM quota exceeded" in caplog.text
+
+
+def test_warmup_cli_refuses_the_in_process_memory_backend():
+    with pytest.raises(ValueError, match="CACHE_BACKEND=memory"):
+        asyncio.run(warm_solution_cache(1, CacheConfig(backend="memory")))
+
+
+def test_warmup_cli_fills_a_shared_sqlite_cache(tmp_path):
+    config = CacheConfig(backend="sqlite", sqlite_path=str(tmp_path / "results.sqlite3"))
+    warmed = asyncio.run(warm_solution_cache(4, config))
+
+    # a serving worker opening the same file sees the entries
+    served = DiseaseResultCache(config)
+    assert warmed > 0
+    assert served.get_solution("Tomato_healthy", "English") is not None
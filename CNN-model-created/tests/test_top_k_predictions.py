@@ -0,0 +1,145 @@
+import asyncio
+import os
+
+import pytest
+import torch
+
+from core.predict import CLASS_NAME, UNCERTAIN_LABEL, CustomeCnnModel, ImageClassifier, Prediction
+from core.service import RETAKE_MESSAGE, DiseaseService
+
+CNN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEAF_IMAGE = os.path.join(CNN_ROOT, "uploaded_image.jpg")
+
+
+class FixedLogits:
+    """Runner returning the same logits for every image of the batch."""
+    def __init__(self, logits):
+        self.logits = torch.tensor(logits, dtype=torch.float32)
+
+    def __call__(self, batch):
+        return self.logits.repeat(len(batch), 1)
+
+
+def peaked(index, margin=10.0):
+    logits = [0.0] * len(CLASS_NAME)
+    logits[index] = margin
+    return logits
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("model") / "cnn_model.pth"
+    torch.manual_seed(0)
+    torch.save(CustomeCnnModel(input_dim=128, num_classes=len(CLASS_NAME)).state_dict(), path)
+    return str(path)
+
+
+@pytest.fixture
+def classifier(model_path):
+    return ImageClassifier(model_path, backend="eager", top_k=3, confidence_threshold=0.5)
+
+
+def test_top_k_is_sorted_softmax_output(classifier):
+    logits = [float(i % 5) for i in range(len(CLASS_NAME))]
+    classifier.runner = FixedLogits(logits)
+    ranked = classifier.predict_topk_batch(torch.zeros(2, 3, 128, 128), k=3)[0]
+
+    expected = torch.softmax(torch.tensor(logits), dim=0).topk(3)
+    assert [label for label, _ in ranked] == [CLASS_NAME[i] for i in expected.indices.tolist()]
+    assert [p for _, p in ranked] == pytest.approx(expected.values.tolist())
+    assert len(classifier.predict_topk_batch(torch.zeros(1, 3, 128, 128), k=100)[0]) == len(CLASS_NAME)
+
+
+def test_confidence_threshold_marks_predictions_uncertain(classifier):
+    classifier.runner = FixedLogits(peaked(4))
+    confident = classifier.classify_batch(torch.zeros(1, 3, 128, 128))[0]
+    assert confident.label == CLASS_NAME[4]
+    assert confident.confidence > 0.5 and not confident.uncertain
+    assert len(confident.top_k) == 3
+
+    classifier.runner = FixedLogits([0.0] * len(CLASS_NAME))
+    unsure = classifier.classify_batch(torch.zeros(1, 3, 128, 128))[0]
+    assert unsure.uncertain
+    assert unsure.display_label == UNCERTAIN_LABEL
+    assert Prediction.from_dict(unsure.to_dict()) == unsure
+
+
+class RecordingSolutions:
+    def __init__(self):
+        self.calls = []
+
+    async def get_disease_solution(self, disease_name, language):
+        self.calls.append((disease_name, language))
+        return f"treatment for {disease_name}"
+
+
+def classify_twice(service, contents, language, between=None):
+    async def main():
+        await service.start()
+        service.solution_service = RecordingSolutions()
+        try:
+            first = await service.classify(contents, language)
+            if between is not None:
+                between()
+            second = await service.classify(contents, language)
+            return first, second, service.solution_service.calls
+        finally:
+            await service.stop()
+    return asyncio.run(main())
+
+
+def test_uncertain_prediction_skips_the_treatment_lookup(classifier):
+    classifier.runner = FixedLogits([0.0] * len(CLASS_NAME))
+    with open(LEAF_IMAGE, "rb") as file_obj:
+        contents = file_obj.read()
+
+    first, second, calls = classify_twice(DiseaseService(classifier=classifier), contents, "Hindi")
+    assert calls == []
+    for response in (first, second):
+        assert response["disease"] == UNCERTAIN_LABEL
+        assert response["solution"] == RETAKE_MESSAGE["Hindi"]
+        assert response["uncertain"] is True
+        assert len(response["top_k"]) == 3
+
+
+def test_cached_prediction_is_rechecked_against_the_current_threshold(classifier):
+    classifier.runner = FixedLogits(peaked(7, margin=3.0))  # top-1 probability of about 0.48
+    with open(LEAF_IMAGE, "rb") as file_obj:
+        contents = file_obj.read()
+
+    def lower_threshold():
+        classifier.confidence_threshold = 0.3
+
+    first, second, calls = classify_twice(DiseaseService(classifier=classifier), contents, "English", lower_threshold)
+    assert first["uncertain"] is True
+    assert second["uncertain"] is False
+    assert second["disease"] == CLASS_NAME[7]
+    assert calls == [(CLASS_NAME[7], "English")]
+
+
+def test_predict_still_returns_label_and_image_path(classifier, tmp_path):
+    classifier.runner = FixedLogits(peaked(2))
+    label, output_path = classifier.predict(LEAF_IMAGE, output_dir=str(tmp_path))
+    assert label == CLASS_NAME[2]
+    assert os.path.isfile(output_path) and os.path.dirname(output_path) == str(tmp_path)
+
+
+def test_default_threshold_leaves_low_confidence_responses_unchanged(model_path, monkeypatch):
+    monkeypatch.delenv("CNN_CONFIDENCE_THRESHOLD", raising=False)
+    classifier = ImageClassifier(model_path, backend="eager")
+    classifier.runner = FixedLogits(peaked(7, margin=1.0))  # top-1 probability of about 0.11
+    with open(LEAF_IMAGE, "rb") as file_obj:
+        contents = file_obj.read()
+
+    first, _, calls = classify_twice(DiseaseService(classifier=classifier), contents, "English")
+    assert classifier.confidence_threshold == 0
+    assert first["disease"] == CLASS_NAME[7]
+    assert first["uncertain"] is False
+    assert first["solution"] == f"treatment for {CLASS_NAME[7]}"
+    assert calls == [(CLASS_NAME[7], "English")] * 2
+
+
+@pytest.mark.parametrize("threshold", [-0.1, 1.5])
+def test_out_of_range_threshold_is_rejected(model_path, threshold):
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        ImageClassifier(model_path, backend="eager", confidence_threshold=threshold)
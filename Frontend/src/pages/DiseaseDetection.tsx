@@ -142,7 +142,7 @@ export default function DiseaseDetection() {
 
                   {result.marked_image && (
                     <img
-                      src={`https://agriguard-ai-nckd.onrender.com/${result.marked_image}`}
+                      src={result.marked_image}
                       alt="Processed Leaf"
                       className="mt-4 rounded-lg border border-gray-200"
                     />
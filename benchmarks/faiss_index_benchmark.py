@@ -0,0 +1,104 @@
+"""
+Recall vs latency of the FAISS index types against the exact flat baseline.
+
+    python -m benchmarks.faiss_index_benchmark --n 100000 --queries 1000
+    python -m benchmarks.faiss_index_benchmark --vectorstore artifact/vectorstore
+
+With --vectorstore the stored chunk vectors are used as the corpus and
+perturbed copies of them as queries; otherwise a clustered synthetic corpus of
+384-dim vectors (the MiniLM size) is generated. Results are printed as JSON.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.components.rag_indexing import build_faiss_index, set_search_params
+
+
+def synthetic_corpus(n, dim, clusters, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, size=n)] + 0.3 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors.astype(np.float32)
+
+
+def stored_corpus(vectorstore_path):
+    import faiss
+    import os
+
+    index = faiss.read_index(os.path.join(vectorstore_path, "index.faiss"))
+    return index.reconstruct_n(0, index.ntotal).astype(np.float32)
+
+
+def make_queries(corpus, count, seed):
+    rng = np.random.default_rng(seed + 1)
+    picks = corpus[rng.integers(0, len(corpus), size=count)]
+    return (picks + 0.1 * rng.normal(size=picks.shape)).astype(np.float32)
+
+
+def index_bytes(index):
+    import faiss
+
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def run(index, queries, k, ground_truth):
+    started = time.perf_counter()
+    _, found = index.search(queries, k)
+    elapsed = time.perf_counter() - started
+    recall = np.mean([len(set(row) & set(truth)) / k for row, truth in zip(found, ground_truth)])
+    return {
+        f"recall@{k}": round(float(recall), 4),
+        "latency_ms_per_query": round(1000 * elapsed / len(queries), 4),
+        "index_bytes": index_bytes(index),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectorstore", help="use the vectors of a saved FAISS store as the corpus")
+    parser.add_argument("--n", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--pq-m", type=int, default=16)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--train-sample", type=int, default=20000)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 128, 256])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = stored_corpus(args.vectorstore) if args.vectorstore else synthetic_corpus(
+        args.n, args.dim, args.clusters, args.seed
+    )
+    queries = make_queries(corpus, args.queries, args.seed)
+    train = corpus[np.random.default_rng(args.seed).permutation(len(corpus))[:args.train_sample]]
+
+    flat = build_faiss_index("flat", train)
+    flat.add(corpus)
+    _, ground_truth = flat.search(queries, args.k)
+    results = [dict(index_type="flat", **run(flat, queries, args.k, ground_truth))]
+
+    for index_type in ("ivf_flat", "ivf_pq"):
+        index = build_faiss_index(index_type, train, nlist=args.nlist, pq_m=args.pq_m)
+        index.add(corpus)
+        for nprobe in args.nprobe:
+            set_search_params(index, nprobe=nprobe)
+            results.append(dict(index_type=index_type, nprobe=nprobe, **run(index, queries, args.k, ground_truth)))
+
+    index = build_faiss_index("hnsw", train, hnsw_m=args.hnsw_m)
+    index.add(corpus)
+    for ef_search in args.ef_search:
+        set_search_params(index, ef_search=ef_search)
+        results.append(dict(index_type="hnsw", ef_search=ef_search, **run(index, queries, args.k, ground_truth)))
+
+    print(json.dumps({"corpus_size": len(corpus), "dim": corpus.shape[1], "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Parity and latency of the compiled fertilizer model against the sklearn path.
+
+    python -m benchmarks.fertilizer_inference_benchmark
+
+Checks that artifact/model_compiled.npz predicts exactly what preprocessor.pkl +
+model.pkl predict on the committed train/test rows (exit code 1 otherwise), then
+reports artifact load time, single-row latency and batch throughput of both.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from src.components.model_compiler import CompiledFertilizerModel, verify_parity
+from src.utils import load_obj, read_split
+
+
+def cold_start_seconds(statement):
+    """Fresh interpreter: import + artifact load, so module import cost is included."""
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def per_call_us(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return 1e6 * (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artifact-dir", default="artifact")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--batch-rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    model = load_obj(os.path.join(args.artifact_dir, "model.pkl"))
+    preprocessor = load_obj(os.path.join(args.artifact_dir, "preprocessor.pkl"))
+    compiled_path = os.path.join(args.artifact_dir, "model_compiled.npz")
+    compiled = CompiledFertilizerModel.load(compiled_path)
+
+    frame = pd.concat([
+        read_split(os.path.join(args.artifact_dir, name)) for name in ("train.parquet", "test.parquet")
+    ]).drop(columns=["Fertilizer_Name"], errors="ignore").reset_index(drop=True)
+    try:
+        rows_checked = verify_parity(compiled, preprocessor, model, frame)
+    except Exception as e:
+        print(f"PARITY FAILED: {e}")
+        sys.exit(1)
+
+    one_row = frame.iloc[[0]]
+    record = frame.to_dict("records")[0]
+    batch = pd.concat([frame] * (args.batch_rows // len(frame) + 1)).iloc[:args.batch_rows]
+    numeric = batch[compiled.num_columns].to_numpy(dtype=float)
+    categorical = [batch[column].tolist() for column in compiled.cat_columns]
+
+    started = time.perf_counter()
+    model.predict(preprocessor.transform(batch))
+    sklearn_batch = time.perf_counter() - started
+    started = time.perf_counter()
+    compiled.predict(numeric, categorical)
+    compiled_batch = time.perf_counter() - started
+
+    report = {
+        "parity_rows": rows_checked,
+        "cold_start_seconds": {
+            "sklearn": cold_start_seconds(
+                "from src.utils import load_obj, read_split; "
+                f"load_obj({os.path.join(args.artifact_dir, 'model.pkl')!r}); "
+                f"load_obj({os.path.join(args.artifact_dir, 'preprocessor.pkl')!r})"
+            ),
+            "compiled": cold_start_seconds(
+                "from src.components.model_compiler import CompiledFertilizerModel; "
+                f"CompiledFertilizerModel.load({compiled_path!r})"
+            ),
+        },
+        "single_row_us": {
+            "sklearn": per_call_us(lambda: model.predict(preprocessor.transform(one_row)), args.repeat),
+            "compiled": per_call_us(lambda: compiled.predict_one(record), args.repeat * 10),
+        },
+        "batch_rows_per_sec": {
+            "sklearn": len(batch) / sklearn_batch,
+            "compiled": len(batch) / compiled_batch,
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
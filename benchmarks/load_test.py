@@ -0,0 +1,299 @@
+"""
+Load test of /prediction, /rag_info and /classify_image at several concurrency levels.
+
+    python -m benchmarks.load_test                                  # gateway app, in-process
+    python -m benchmarks.load_test --spawn                          # uvicorn gateway:app subprocess
+    python -m benchmarks.load_test --url http://127.0.0.1:10000 --server-pid 4242
+    python -m benchmarks.load_test --concurrency 1 8 32 --requests 300 --output load.json
+    python -m benchmarks.load_test --baseline load.json             # exit 1 on regression
+
+Request bodies come from the repository: rows of Ferlilizer_Data/Fertilizer
+Prediction.csv for /prediction, the fertilizer labels for /rag_info and the
+sample leaf photos of CNN-model-created (uploaded_image.jpg, labled_image.jpg,
+images/) for /classify_image. Every upload gets a few random trailing bytes
+so the image-hash cache does not turn the CNN path into cache hits
+(--repeat-images keeps them identical).
+
+Gemini and the translator are stubbed (LLM_BACKEND=stub,
+TRANSLATOR_BACKEND=stub, latency from STUB_LATENCY_MS) for the in-process and
+--spawn modes; a server given with --url has to be started that way.
+
+In-process the client shares the event loop with the app, so numbers are
+lower than against a server, but comparable between runs. For each endpoint and
+concurrency level, closed-loop workers send --requests requests (after
+--warmup unmeasured ones) and throughput, p50/p95/p99 latency, errors and the
+peak RSS of the serving process (Linux /proc, reset per level) are reported as
+JSON. Responses other than 200, or with an "error" key, count as errors.
+"""
+import argparse
+import asyncio
+import csv
+import glob
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from src.utils import FERTILIZER_LABELS
+
+CNN_DIR = "CNN-model-created"
+FERTILIZER_CSV = os.path.join("Ferlilizer_Data", "Fertilizer Prediction.csv")
+STUB_ENV = {"LLM_BACKEND": "stub", "TRANSLATOR_BACKEND": "stub"}
+# CSV header -> /prediction form field
+FORM_FIELDS = {
+    "Temparature": "temperature", "Humidity": "humidity", "Moisture": "moisture", "Soil Type": "soil_type",
+    "Crop Type": "crop_type", "Nitrogen": "nitrogen", "Potassium": "potassium", "Phosphorous": "phosphorous",
+}
+
+
+def prediction_forms(path, limit=1000):
+    with open(path, newline="", encoding="utf-8") as file_obj:
+        reader = csv.DictReader(file_obj)
+        forms = []
+        for row in reader:
+            forms.append({FORM_FIELDS[key.strip()]: value for key, value in row.items() if key.strip() in FORM_FIELDS})
+            if len(forms) == limit:
+                break
+    return forms
+
+
+def leaf_images():
+    paths = [os.path.join(CNN_DIR, name) for name in ("uploaded_image.jpg", "labled_image.jpg")]
+    paths += sorted(glob.glob(os.path.join(CNN_DIR, "images", "*.png")) + glob.glob(os.path.join(CNN_DIR, "images", "*.jpg")))
+    images = []
+    for path in paths:
+        with open(path, "rb") as file_obj:
+            images.append((os.path.basename(path), file_obj.read()))
+    return images
+
+
+def build_requests(args):
+    """endpoint -> function(index) returning the keyword arguments of one httpx request."""
+    forms = prediction_forms(FERTILIZER_CSV)
+    labels = list(FERTILIZER_LABELS.values())
+    images = leaf_images()
+
+    def prediction(index):
+        return {"method": "POST", "url": "/prediction", "data": forms[index % len(forms)]}
+
+    def rag_info(index):
+        return {"method": "GET", "url": "/rag_info", "params": {"fertilizer": labels[index % len(labels)]}}
+
+    def classify_image(index):
+        name, contents = images[index % len(images)]
+        if not args.repeat_images:
+            # decoders ignore bytes after the end of the image, the cache key does not
+            contents += random.randbytes(16)
+        return {"method": "POST", "url": "/classify_image", "files": {"image": (name, contents)},
+                "data": {"language": args.language}}
+
+    return {"prediction": prediction, "rag_info": rag_info, "classify_image": classify_image}
+
+
+def reset_peak_rss(pid):
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as file_obj:
+            file_obj.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as file_obj:
+            for line in file_obj:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid == os.getpid():
+        # lifetime peak, not per level
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+
+def is_error(response):
+    if response.status_code != 200:
+        return True
+    try:
+        body = response.json()
+    except ValueError:
+        return True
+    return isinstance(body, dict) and "error" in body
+
+
+async def run_level(client, make_request, concurrency, total, warmup, pid):
+    for index in range(warmup):
+        await client.request(**make_request(index))
+
+    latencies, errors = [], 0
+    next_index = iter(range(warmup, warmup + total))
+
+    async def worker():
+        nonlocal errors
+        for index in next_index:
+            started = time.perf_counter()
+            try:
+                failed = is_error(await client.request(**make_request(index)))
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    reset_peak_rss(pid)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": total / elapsed,
+        "mean_ms": float(latencies_ms.mean()),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_ms": float(latencies_ms.max()),
+        "peak_rss_mb": peak_rss_mb(pid),
+    }
+
+
+async def run_all(client, args, pid):
+    requests = build_requests(args)
+    results = []
+    for endpoint in args.endpoints:
+        for concurrency in args.concurrency:
+            result = await run_level(client, requests[endpoint], concurrency, args.requests, args.warmup, pid)
+            result["endpoint"] = endpoint
+            results.append(result)
+            print(f"{endpoint:15} c={concurrency:<4} {result['throughput_rps']:8.1f} req/s  "
+                  f"p50 {result['p50_ms']:7.1f} ms  p99 {result['p99_ms']:7.1f} ms  errors {result['errors']}",
+                  file=sys.stderr)
+    return results
+
+
+async def run_in_process(args):
+    for key, value in STUB_ENV.items():
+        os.environ.setdefault(key, value)
+    from gateway import app
+
+    # on_event startup/shutdown hooks run through the router's lifespan
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=args.timeout) as client:
+            return await run_all(client, args, os.getpid())
+
+
+async def run_against(url, args, pid):
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        return await run_all(client, args, pid)
+
+
+def spawn_server(port):
+    env = {**os.environ, **STUB_ENV}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "gateway:app", "--host", "127.0.0.1", "--port", str(port)], env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(url + "/", timeout=1).status_code == 200:
+                return server, url
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("uvicorn did not come up within 120s")
+
+
+def regressions(results, baseline_path, tolerance):
+    """Levels whose p95 grew or whose throughput dropped by more than tolerance against a previous run."""
+    with open(baseline_path) as file_obj:
+        baseline = {(r["endpoint"], r["concurrency"]): r for r in json.load(file_obj)["results"]}
+    failures = []
+    for result in results:
+        before = baseline.get((result["endpoint"], result["concurrency"]))
+        if before is None:
+            continue
+        level = f"{result['endpoint']} c={result['concurrency']}"
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            failures.append(f"{level}: p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+        if result["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            failures.append(f"{level}: throughput {before['throughput_rps']:.1f} -> {result['throughput_rps']:.1f} req/s")
+        if result["errors"] > before["errors"]:
+            failures.append(f"{level}: errors {before['errors']} -> {result['errors']}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="base URL of a running server (gateway, or one of the two apps)")
+    target.add_argument("--spawn", action="store_true", help="start uvicorn gateway:app with stub upstreams")
+    parser.add_argument("--server-pid", type=int, help="with --url, pid whose peak RSS is reported")
+    parser.add_argument("--port", type=int, default=10099, help="port for --spawn")
+    parser.add_argument("--endpoints", nargs="+", default=["prediction", "rag_info", "classify_image"],
+                        choices=["prediction", "rag_info", "classify_image"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint and level")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--language", default="English")
+    parser.add_argument("--repeat-images", action="store_true", help="send identical image bytes (cache hits)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="previous --output report; exit 1 when a level regressed")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression vs --baseline")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    if args.spawn:
+        mode = "spawn"
+        server, url = spawn_server(args.port)
+        try:
+            results = asyncio.run(run_against(url, args, server.pid))
+        finally:
+            server.terminate()
+            server.wait()
+    elif args.url:
+        mode, url = "url", args.url
+        results = asyncio.run(run_against(url, args, args.server_pid))
+    else:
+        mode, url = "in_process", "gateway:app"
+        results = asyncio.run(run_in_process(args))
+
+    report = {
+        "mode": mode,
+        "target": url,
+        "stub_latency_ms": float(os.getenv("STUB_LATENCY_MS", "0")),
+        "repeat_images": args.repeat_images,
+        "results": results,
+    }
+    failures = regressions(results, args.baseline, args.tolerance) if args.baseline else []
+    report["failures"] = failures
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file_obj:
+            file_obj.write(output + "\n")
+    else:
+        print(output)
+    if failures:
+        print("\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Cost of a log call on the request path: synchronous file handler vs the queue.
+
+    python -m benchmarks.logging_benchmark
+    python -m benchmarks.logging_benchmark --threads 16 --calls 20000 --slow-disk-ms 2
+
+Each of --threads threads makes --calls logging.info calls (with arguments, like
+the components do) and every call is timed. "sync" is the old setup, a
+FileHandler written by the calling thread; "queue" is src.logger's bounded
+queue drained by a listener thread. --slow-disk-ms adds a sleep to every file
+write to stand in for a loaded or network disk. Reports per-call p50/p99/max
+latency, calls/sec, the time the listener needed to drain the backlog and the
+number of dropped records, as JSON.
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import replace
+
+import numpy as np
+
+from src.logger import LogQueueListener, LoggerConfig, NonBlockingQueueHandler, build_file_handler
+
+
+class SlowDisk(logging.Handler):
+    """Wraps a handler and sleeps before every write."""
+    def __init__(self, handler, delay_seconds):
+        super().__init__()
+        self.handler = handler
+        self.delay_seconds = delay_seconds
+
+    def emit(self, record):
+        time.sleep(self.delay_seconds)
+        self.handler.emit(record)
+
+    def close(self):
+        self.handler.close()
+        super().close()
+
+
+def hammer(logger, threads, calls):
+    latencies = np.empty((threads, calls), dtype=np.int64)
+
+    def worker(index):
+        for call in range(calls):
+            started = time.perf_counter_ns()
+            logger.info("prediction %s for %s took %.3f ms", call, "Maize", 0.25)
+            latencies[index, call] = time.perf_counter_ns() - started
+
+    pool = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return latencies.ravel() / 1000, time.perf_counter() - started
+
+
+def run(mode, config, threads, calls, slow_disk_ms):
+    logger = logging.getLogger(f"benchmark.{mode}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    file_handler = build_file_handler(config, os.path.join(config.log_dir, f"{mode}.log"))
+    target = SlowDisk(file_handler, slow_disk_ms / 1000) if slow_disk_ms else file_handler
+
+    listener = queue_handler = None
+    if mode == "queue":
+        queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=config.queue_size))
+        listener = LogQueueListener(queue_handler.queue, target)
+        listener.start()
+        logger.addHandler(queue_handler)
+    else:
+        logger.addHandler(target)
+
+    latencies_us, elapsed = hammer(logger, threads, calls)
+    drain_started = time.perf_counter()
+    if listener is not None:
+        listener.stop()
+    drain_seconds = time.perf_counter() - drain_started
+    target.close()
+
+    return {
+        "mode": mode,
+        "calls": threads * calls,
+        "calls_per_second": threads * calls / elapsed,
+        "p50_us": float(np.percentile(latencies_us, 50)),
+        "p99_us": float(np.percentile(latencies_us, 99)),
+        "max_us": float(latencies_us.max()),
+        "drain_seconds": drain_seconds,
+        "dropped": queue_handler.dropped if queue_handler is not None else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=10000, help="log calls per thread")
+    parser.add_argument("--queue-size", type=int, default=LoggerConfig().queue_size)
+    parser.add_argument("--slow-disk-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    log_dir = tempfile.mkdtemp(prefix="logging_benchmark_")
+    config = replace(LoggerConfig(), log_dir=log_dir, queue_size=args.queue_size, max_bytes=0)
+    try:
+        results = [run(mode, config, args.threads, args.calls, args.slow_disk_ms) for mode in ("sync", "queue")]
+    finally:
+        shutil.rmtree(log_dir, ignore_errors=True)
+    print(json.dumps({"threads": args.threads, "slow_disk_ms": args.slow_disk_ms, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
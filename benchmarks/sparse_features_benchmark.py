@@ -0,0 +1,82 @@
+"""
+Memory of the transformed fertilizer feature matrix: dense np.c_ vs CSR.
+
+    python -m benchmarks.sparse_features_benchmark --rows 200000 --cardinality 10 100 1000 10000
+
+For each Soil_Type/Crop_Type cardinality a synthetic frame with the training
+columns is pushed through the real preprocessor, then stored the old way
+(densified and stacked with the target via np.c_) and the new way (float32 CSR
+plus a separate target vector). Reports result size and tracemalloc peak of
+each path as JSON.
+"""
+import argparse
+import json
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.components.data_transformation import DataTransformation, RAW_NUMERIC_FEATURES, CATEGORICAL_FEATURES
+
+
+def synthetic_frame(rows, cardinality, seed):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({column: rng.uniform(0, 100, rows).astype(np.float32) for column in RAW_NUMERIC_FEATURES})
+    for column in CATEGORICAL_FEATURES:
+        frame[column] = pd.Categorical(np.char.add(f"{column}_", rng.integers(0, cardinality, rows).astype(str)))
+    return frame, rng.integers(0, 7, rows)
+
+
+def measure(fn):
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+
+def nbytes(matrix):
+    if sparse.issparse(matrix):
+        return int(matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes)
+    return int(matrix.nbytes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--cardinality", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = []
+    for cardinality in args.cardinality:
+        frame, target = synthetic_frame(args.rows, cardinality, args.seed)
+        preprocessor = DataTransformation().get_transformed_object()
+        preprocessor.fit(frame)
+
+        def dense_path():
+            transformed = preprocessor.transform(frame)
+            transformed = transformed.toarray() if sparse.issparse(transformed) else transformed
+            return np.c_[transformed, target]
+
+        def sparse_path():
+            return sparse.csr_matrix(preprocessor.transform(frame), dtype=np.float32), np.asarray(target)
+
+        dense, dense_peak = measure(dense_path)
+        (features, y), sparse_peak = measure(sparse_path)
+        results.append({
+            "cardinality": cardinality,
+            "n_features": features.shape[1],
+            "dense_bytes": nbytes(dense),
+            "dense_peak_bytes": dense_peak,
+            "csr_bytes": nbytes(features) + int(y.nbytes),
+            "csr_peak_bytes": sparse_peak,
+        })
+        del dense, features
+
+    print(json.dumps({"rows": args.rows, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Cold start of the fertilizer API: import time and time to the first /prediction.
+
+    python -m benchmarks.startup_benchmark
+    python -m benchmarks.startup_benchmark --backend compiled --max-import-seconds 1.0
+
+Every run is a fresh interpreter. The first one runs `python -X importtime -c
+"import app"` and reports the slowest packages it imports, plus any heavy
+module (torch, transformers, langchain, ...) that importing the API pulled in.
+The others import the app, run its startup hooks and post one /prediction,
+timing each step; the median over --repeat runs is reported as JSON. The
+forbidden modules are checked again once startup has completed and after the
+first /prediction, since a startup hook can import what the module import did not.
+
+Exit code 1 when a forbidden module is imported, the first prediction fails, or
+the median import time or time to first prediction exceeds its --max-* budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# never needed to answer /prediction; they may only load on first use of the endpoint that needs them
+FORBIDDEN_MODULES = [
+    "torch", "transformers", "sentence_transformers", "langchain_google_genai",
+    "langchain_huggingface", "langchain_community", "faiss", "sklearn.metrics",
+]
+# the compiled backend scores rows with NumPy alone
+FORBIDDEN_COMPILED = ["sklearn", "pandas", "scipy"]
+# unpickling an sklearn tree imports sklearn.metrics (through sklearn.neighbors), so with
+# the sklearn backend it is kept out of the import only, not out of startup
+LOADED_BY_SKLEARN_ARTIFACTS = ["sklearn.metrics"]
+
+SAMPLE_FORM = {
+    "temperature": "26", "humidity": "52", "moisture": "38", "crop_type": "Maize",
+    "soil_type": "Sandy", "nitrogen": "37", "phosphorous": "0", "potassium": "0",
+}
+
+FIRST_PREDICTION = """
+import json, sys, time
+started = time.perf_counter()
+module_name, attr = {app!r}.split(":")
+app = getattr(__import__(module_name, fromlist=[attr]), attr)
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+loaded = lambda: sorted(name for name in {forbidden!r} if name in sys.modules)
+with TestClient(app) as client:
+    ready = time.perf_counter()
+    loaded_after_startup = loaded()
+    response = client.post("/prediction", data={form!r})
+    done = time.perf_counter()
+    loaded_after_first_prediction = loaded()
+body = response.json()
+print(json.dumps({{
+    "loaded_after_startup": loaded_after_startup,
+    "loaded_after_first_prediction": loaded_after_first_prediction,
+    "import_seconds": imported - started,
+    "startup_seconds": ready - imported,
+    "first_prediction_seconds": done - ready,
+    "time_to_first_prediction_seconds": done - started,
+    "ok": response.status_code == 200 and "prediction" in body,
+    "response": body,
+}}))
+"""
+
+LOADED_MODULES = """
+import json, sys
+__import__({module!r})
+print(json.dumps(sorted(name for name in {forbidden!r} if name in sys.modules)))
+"""
+
+
+def run_python(args, env):
+    return subprocess.run([sys.executable] + args, capture_output=True, text=True, env=env, check=True)
+
+
+def slowest_packages(importtime_stderr, module, top):
+    """(cumulative seconds, package) of the slowest top-level packages in an -X importtime log."""
+    imports = []
+    for line in importtime_stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        # a package is timed where it is first imported, whatever the nesting depth
+        if "." not in name and not name.startswith("_") and name != module:
+            imports.append((int(cumulative) / 1e6, name))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="app:app", help="module:attribute of the ASGI app")
+    parser.add_argument("--backend", help="FERTILIZER_BACKEND for the runs (default: the environment's)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-import-seconds", type=float, default=1.5)
+    parser.add_argument("--max-time-to-first-prediction", type=float, default=5.0,
+                        help="seconds from interpreter start to the first /prediction response")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.backend:
+        env["FERTILIZER_BACKEND"] = args.backend
+    module = args.app.split(":")[0]
+    compiled = env.get("FERTILIZER_BACKEND") == "compiled"
+    forbidden = FORBIDDEN_MODULES + (FORBIDDEN_COMPILED if compiled else [])
+    forbidden_after_startup = [name for name in forbidden if compiled or name not in LOADED_BY_SKLEARN_ARTIFACTS]
+
+    importtime = run_python(["-X", "importtime", "-c", f"import {module}"], env)
+    loaded = json.loads(run_python(["-c", LOADED_MODULES.format(module=module, forbidden=forbidden)], env).stdout)
+
+    runs = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        output = run_python(["-c", FIRST_PREDICTION.format(app=args.app, form=SAMPLE_FORM, forbidden=forbidden_after_startup)], env)
+        run = json.loads(output.stdout.strip().splitlines()[-1])
+        run["process_seconds"] = time.perf_counter() - started
+        runs.append(run)
+
+    report = {
+        "app": args.app,
+        "backend": env.get("FERTILIZER_BACKEND", "sklearn"),
+        "import_seconds_by_package": {name: seconds for seconds, name in slowest_packages(importtime.stderr, module, args.top)},
+        "forbidden_modules_loaded": loaded,
+        "forbidden_modules_loaded_by_startup": sorted({name for run in runs for name in run["loaded_after_startup"]}),
+        "forbidden_modules_loaded_by_first_prediction": sorted(
+            {name for run in runs for name in run["loaded_after_first_prediction"]}
+        ),
+        "first_response": runs[0]["response"],
+    }
+    for key in ("import_seconds", "startup_seconds", "first_prediction_seconds", "time_to_first_prediction_seconds",
+                "process_seconds"):
+        report[key] = statistics.median(run[key] for run in runs)
+
+    failures = []
+    if loaded:
+        failures.append(f"importing {module} loaded {', '.join(loaded)}")
+    # each module is reported at the earliest stage that loaded it
+    reported = set(loaded)
+    for stage in ("startup", "first_prediction"):
+        late = [name for name in report[f"forbidden_modules_loaded_by_{stage}"] if name not in reported]
+        if late:
+            failures.append(f"{stage.replace('_', ' ')} of {module} loaded {', '.join(late)}")
+        reported.update(late)
+    if not all(run["ok"] for run in runs):
+        failures.append(f"/prediction failed: {runs[0]['response']}")
+    if report["import_seconds"] > args.max_import_seconds:
+        failures.append(f"import took {report['import_seconds']:.2f}s > {args.max_import_seconds}s")
+    if report["time_to_first_prediction_seconds"] > args.max_time_to_first_prediction:
+        failures.append(f"first /prediction after {report['time_to_first_prediction_seconds']:.2f}s "
+                        f"> {args.max_time_to_first_prediction}s")
+    report["failures"] = failures
+
+    print(json.dumps(report, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+One process serving the fertilizer API and the plant disease API.
+
+    uvicorn gateway:app --port 10000
+    gunicorn gateway:app -k uvicorn.workers.UvicornWorker --preload -w 4 -b 0.0.0.0:10000
+
+create_app() loads the CNN, the sklearn artifacts and (GATEWAY_PRELOAD_VECTORSTORE=1)
+the RAG vectorstore up front. With gunicorn --preload that happens once in the
+master, and the forked workers share those pages copy-on-write instead of each
+loading its own copy. Anything that does not survive fork() - thread pools, the
+artifact watcher, the micro-batcher task, upstream clients, the result cache -
+is created per worker in the startup hook. Both routers share one CPU pool.
+"""
+import gc
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+CNN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "CNN-model-created")
+if CNN_DIR not in sys.path:
+    sys.path.append(CNN_DIR)
+
+from core.service import DiseaseService, build_disease_router
+from src.api.fertilizer import FertilizerService, build_fertilizer_router
+from src.logger import configure_logging
+from src.metrics import instrument_app
+
+
+def create_app(preload_vectorstore=None):
+    load_dotenv()
+    configure_logging()
+    if preload_vectorstore is None:
+        preload_vectorstore = os.getenv("GATEWAY_PRELOAD_VECTORSTORE", "0") == "1"
+
+    fertilizer_service = FertilizerService()
+    fertilizer_service.load(preload_vectorstore=preload_vectorstore)
+    disease_service = DiseaseService()
+
+    app = FastAPI(
+        title="AgriGuard AI API",
+        description="Fertilizer recommendation and plant disease detection in one service.",
+    )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    @app.on_event("startup")
+    async def start_services():
+        # per worker, after the fork
+        app.state.cpu_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("GATEWAY_CPU_WORKERS", str(os.cpu_count() or 1))), thread_name_prefix="gateway-cpu"
+        )
+        fertilizer_service.start(executor=app.state.cpu_executor)
+        await disease_service.start(image_executor=app.state.cpu_executor)
+
+    @app.on_event("shutdown")
+    async def stop_services():
+        await disease_service.stop()
+        fertilizer_service.stop()
+        app.state.cpu_executor.shutdown(wait=False)
+
+    @app.get("/")
+    def read_root():
+        return {"message": "Welcome to the AgriGuard AI API", "services": ["fertilizer", "disease"]}
+
+    app.include_router(build_fertilizer_router(fertilizer_service), tags=["fertilizer"])
+    app.include_router(build_disease_router(disease_service), tags=["disease"])
+    # one /metrics for the process: it renders the fertilizer_* and disease_* stage metrics alike
+    instrument_app(app, namespace="gateway")
+
+    app.state.fertilizer_service = fertilizer_service
+    app.state.disease_service = disease_service
+    # move everything loaded so far out of the GC's generations, so collections in
+    # the workers do not write to (and un-share) the preloaded pages
+    gc.freeze()
+    return app
+
+
+app = create_app()
@@ -0,0 +1,155 @@
+import os
+import json
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, Form, Request
+from fastapi.responses import StreamingResponse
+from src.pipeline.prediction_pipeline import CustomData, PredictPipeline
+from src.pipeline.model_registry import get_model_registry
+
+# upload bytes read per await while spooling a batch request
+SPOOL_BLOCK_SIZE = 1 << 20
+
+
+class FertilizerService:
+    """
+    Fertilizer artifacts plus the pool the endpoints run on.
+
+    load() reads the model, preprocessor and (optionally) the vectorstore and is
+    safe to call before a preloading server forks; start() runs in every worker
+    and starts the threads (artifact watcher, CPU pool), which do not survive fork().
+    """
+    def __init__(self, registry=None):
+        self.registry = registry or get_model_registry()
+        self.executor = None
+        self._owns_executor = False
+        self._loaded = False
+
+    def load(self, preload_vectorstore=False):
+        self.registry.load()
+        if preload_vectorstore:
+            self.registry.get_vectorstore()
+        self._loaded = True
+
+    def start(self, executor=None):
+        if not self._loaded:
+            self.load()
+        self.registry.start_watching()
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=int(os.getenv("FERTILIZER_WORKERS", str(os.cpu_count() or 1))), thread_name_prefix="fertilizer"
+        )
+
+    def stop(self):
+        self.registry.stop_watching()
+        if self._owns_executor and self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def predict_with_guidance(self, data):
+        predict_pipeline = PredictPipeline(self.registry)
+        results = predict_pipeline.predict_record(data)
+        steps = predict_pipeline.rag_predict()
+        return {
+            "prediction": str(results),
+            "rag_steps": steps
+        }
+
+    def rag_info(self, fertilizer=None, question=None):
+        predict_pipeline = PredictPipeline(self.registry)
+        if question:
+            return predict_pipeline.rag_query(question)
+        return predict_pipeline.rag_predict(fertilizer)
+
+
+def build_fertilizer_router(service: FertilizerService) -> APIRouter:
+    router = APIRouter()
+
+    # Prediction endpoint
+    @router.post("/prediction")
+    async def predict_datapoint(
+        temperature: float = Form(...),
+        humidity: float = Form(...),
+        moisture: float = Form(...),
+        crop_type: str = Form(...),
+        soil_type: str = Form(...),
+        nitrogen: float = Form(...),
+        phosphorous: float = Form(...),
+        potassium: float = Form(...)
+    ):
+        try:
+            data = CustomData(
+                Temperature=temperature,
+                Humidity=humidity,
+                Moisture=moisture,
+                Crop_Type=crop_type,
+                Soil_Type=soil_type,
+                Nitrogen=nitrogen,
+                Phosphorous=phosphorous,
+                Potassium=potassium
+            )
+            return await service.run(service.predict_with_guidance, data)
+
+        except Exception as e:
+            return {"error": str(e)}
+
+    # Batch prediction endpoint: JSON array, NDJSON or CSV body, or a CSV/Parquet/JSON file upload; NDJSON out
+    @router.post("/prediction/batch")
+    async def predict_batch(request: Request):
+        try:
+            # pandas/pyarrow are only needed here, so they load on the first batch request
+            from src.pipeline.batch_prediction import BatchPredictPipeline
+
+            batch_pipeline = BatchPredictPipeline(service.registry)
+            content_type = request.headers.get("content-type", "")
+
+            # spool the body to a temp file we own so it outlives the request and is parsed in chunks
+            spool = tempfile.TemporaryFile()
+            filename = ""
+            try:
+                if content_type.startswith("multipart/form-data"):
+                    form = await request.form()
+                    upload = form["file"]
+                    filename = upload.filename or ""
+                    while True:
+                        body_chunk = await upload.read(SPOOL_BLOCK_SIZE)
+                        if not body_chunk:
+                            break
+                        spool.write(body_chunk)
+                else:
+                    async for body_chunk in request.stream():
+                        spool.write(body_chunk)
+            except Exception:
+                spool.close()
+                raise
+            spool.seek(0)
+            chunks = batch_pipeline.iter_upload(spool, filename, content_type)
+
+            def ndjson_lines():
+                try:
+                    yield from batch_pipeline.stream_ndjson(chunks)
+                except Exception as e:
+                    yield json.dumps({"error": str(e)}) + "\n"
+                finally:
+                    # close the reader generator first; it may still hold the spool open
+                    chunks.close()
+                    spool.close()
+
+            return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+        except Exception as e:
+            return {"error": str(e)}
+
+    # RAG info endpoint
+    @router.get("/rag_info")
+    async def rag_info(fertilizer: str = None, question: str = None):
+        try:
+            steps = await service.run(service.rag_info, fertilizer, question)
+            return {"rag_steps": steps}
+        except Exception as e:
+            return {"error": str(e)}
+
+    return router
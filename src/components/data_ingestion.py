@@ -1,73 +1,106 @@
 import os
 import sys
 from src.exception import CustomException
-from src.logger import logging
+from src.logger import configure_logging, logging
+from src.utils import file_sha256
 import pandas as pd
 import numpy as np
 from dataclasses import dataclass
 import shutil
 
-from sklearn.model_selection import train_test_split
 from src.components.data_transformation import DataTransformation
 from src.components.data_transformation import DataTransformationConfig
 
 from src.components.model_trainer import ModelTraining
 from src.components.model_trainer import ModelTrainingConfig
 
+NUMERIC_COLUMNS = ['Temparature', 'Humidity', 'Moisture', 'Nitrogen', 'Potassium', 'Phosphorous']
+CATEGORICAL_COLUMNS = ['Soil_Type', 'Crop_Type', 'Fertilizer_Name']
+
 @dataclass
 class DataIngesionConfig:
-    train_data_path: str =os.path.join('artifact', 'train.csv')
-    test_data_path: str =os.path.join('artifact', 'test.csv')
-    raw_data_path: str =os.path.join('artifact', 'fertilizer.csv')
+    source_data_path: str =os.getenv("FERTILIZER_DATA_PATH", os.path.join('Ferlilizer_Data', 'Fertilizer Prediction.csv'))
+    source_pdf_path: str =os.getenv("FERTILIZER_PDF_PATH", os.path.join('Ferlilizer_Data', 'Raw_pdfs'))
+    train_data_path: str =os.path.join('artifact', 'train.parquet')
+    test_data_path: str =os.path.join('artifact', 'test.parquet')
     rag_docs_path: str=os.path.join('artifact', 'rag_docs')
+    chunk_size: int =int(os.getenv("INGESTION_CHUNK_SIZE", "100000"))
+    test_size: float =0.2
+    random_state: int =42
 
 class DataIngesion:
     def __init__(self):
         self.data_ingestion_config = DataIngesionConfig()
         
+    def read_source_chunks(self):
+        """
+        Read the raw CSV in chunks of chunk_size rows with only the feature and target
+        columns, float32 numerics and categorical soil/crop/fertilizer names.
+        """
+        config=self.data_ingestion_config
+        wanted=set(NUMERIC_COLUMNS + CATEGORICAL_COLUMNS)
+        normalize=lambda column: column.strip().replace(" ", "_")
+        dtypes={column: np.float32 for column in NUMERIC_COLUMNS}
+        dtypes.update({column: "category" for column in CATEGORICAL_COLUMNS})
+        
+        header=pd.read_csv(config.source_data_path, nrows=0).columns
+        source_dtypes={column: dtypes[normalize(column)] for column in header if normalize(column) in wanted}
+        for chunk in pd.read_csv(config.source_data_path, usecols=list(source_dtypes), dtype=source_dtypes,
+                                 chunksize=config.chunk_size):
+            chunk.columns=[normalize(column) for column in chunk.columns]
+            yield chunk
+    
     def initiate_data_ingestion(self):
+        """
+        Stream the raw CSV into train/test Parquet splits. Each row goes to the test
+        split with probability test_size from one seeded generator, so the split does
+        not depend on chunk_size and the full dataset is never held in memory. Like the
+        train_test_split it replaces, the split is not stratified; it selects different
+        rows than train_test_split(random_state=42) did.
+        """
         logging.info("Data Ingestion Method and Component")
         try:
-            df=pd.read_csv("Ferlilizer_Data\Fertilizer Prediction.csv")
-            df.columns = df.columns.str.strip()
-            df.columns = df.columns.str.replace(" ", "_")
-            df["soil_health_score"] = (
-                df['Temparature']*0.2 +
-                df['Humidity']*0.1 +
-                df['Moisture']*0.2 +
-                df['Nitrogen']*0.2 +
-                df['Potassium']*0.15 +
-                df['Phosphorous']*0.15
-                )
-            logging.info("Data Readed Sucessfully")
-            os.makedirs(os.path.dirname(self.data_ingestion_config.train_data_path), exist_ok=True)
+            import pyarrow as pa
+            import pyarrow.parquet as pq
             
-            df.to_csv(self.data_ingestion_config.raw_data_path, index=False, header=True)
-            logging.info("raw data loaded")
+            config=self.data_ingestion_config
+            os.makedirs(os.path.dirname(config.train_data_path), exist_ok=True)
             
-            train_set, test_set=train_test_split(df, test_size=0.2, random_state=42)
-            train_set.to_csv(self.data_ingestion_config.train_data_path, index=False, header=True)
+            # derived features (soil_health_score) are computed by the preprocessor, not stored
+            fields=[pa.field(column, pa.float32()) for column in NUMERIC_COLUMNS]
+            fields+=[pa.field(column, pa.dictionary(pa.int32(), pa.string())) for column in CATEGORICAL_COLUMNS]
+            schema=pa.schema(fields)
             
-            test_set.to_csv(self.data_ingestion_config.test_data_path, index=False, header=True)
+            rng=np.random.default_rng(config.random_state)
+            rows={"train": 0, "test": 0}
+            with pq.ParquetWriter(config.train_data_path, schema) as train_writer, \
+                    pq.ParquetWriter(config.test_data_path, schema) as test_writer:
+                for chunk in self.read_source_chunks():
+                    is_test=rng.random(len(chunk)) < config.test_size
+                    for split, writer, part in (("train", train_writer, chunk[~is_test]), ("test", test_writer, chunk[is_test])):
+                        if len(part):
+                            writer.write_table(pa.Table.from_pandas(part[schema.names], schema=schema, preserve_index=False))
+                            rows[split]+=len(part)
             
-            logging.info("Ingestion of data is Completed")
+            logging.info(f"Ingestion of data is Completed: {rows['train']} train rows, {rows['test']} test rows")
             
             return (
-                self.data_ingestion_config.train_data_path,
-                self.data_ingestion_config.test_data_path
-                # self.data_ingestion_config.raw_data_path
+                config.train_data_path,
+                config.test_data_path
             )
         except Exception as e:
             raise CustomException(e,sys)
-    def rag_ingestion_initialize(self, source_folder="Ferlilizer_Data\Raw_pdfs"):
+    def rag_ingestion_initialize(self, source_folder=None):
         logging.info("Rag_pipeline Startd")
         try:
+            source_folder=source_folder or self.data_ingestion_config.source_pdf_path
             os.makedirs(self.data_ingestion_config.rag_docs_path, exist_ok=True)
             for file in os.listdir(source_folder):
                 if file.endswith(".pdf"):
                     src=os.path.join(source_folder, file)
                     dst=os.path.join(self.data_ingestion_config.rag_docs_path, file)
-                    if not os.path.exists(dst):
+                    # copy new PDFs and updated versions of existing ones
+                    if not os.path.exists(dst) or file_sha256(src) != file_sha256(dst):
                         shutil.copy(src, dst)
                         
             logging.info("PDF copied to artifact")
@@ -79,16 +112,19 @@ class DataIngesion:
                         
     
 if __name__=="__main__":
+    configure_logging()
     obj=DataIngesion()
     train_df, test_df=obj.initiate_data_ingestion()
     docs_rag=obj.rag_ingestion_initialize()
     
     
     data_transformation=DataTransformation()
-    train_arr, test_arr, _=data_transformation.initate_data_transformation(train_df, test_df)
-    
-    
     Model_trainer=ModelTraining()
-    print(Model_trainer.initiate_model_trainer(train_arr, test_arr))
+    if os.getenv("TRAINING_MODE", "in_memory") == "streaming":
+        train_mm, test_mm, _=data_transformation.initate_streaming_data_transformation(train_df, test_df)
+        print(Model_trainer.initiate_streaming_model_trainer(train_mm, test_mm))
+    else:
+        train_arr, test_arr, _=data_transformation.initate_data_transformation(train_df, test_df)
+        print(Model_trainer.initiate_model_trainer(train_arr, test_arr))
     data_transformation.initate_rag_transformation(docs_rag)
     
\ No newline at end of file
@@ -1,47 +1,87 @@
 import os
 import sys
+import json
 from src.exception import CustomException
 from src.logger import logging
 # from src.components.data_ingestion import DataIngesion
-from src.utils import save_obj
+from src.utils import (
+    save_obj, read_split, iter_split_batches, split_num_rows, file_sha256, FERTILIZER_LABELS, fertilizer_guidance_query
+)
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
+from src.components.feature_engineering import (
+    RAW_NUMERIC_FEATURES, NUMERIC_FEATURES, add_derived_features, derived_feature_names
+)
+from src.components.rag_indexing import (
+    RagManifest, IngestionStats, chunk_ids_for, iter_pdf_chunks,
+    build_faiss_index, index_needs_training, set_search_params, load_vector_store
+)
 
 
 from sklearn.compose import ColumnTransformer
+from sklearn.frozen import FrozenEstimator
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
 from sklearn.preprocessing import LabelEncoder
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from dataclasses import dataclass
 
 # from src.components.data_ingestion import DataIngesion
 
+CATEGORICAL_FEATURES=['Soil_Type', 'Crop_Type']
+TARGET_COLUMN="Fertilizer_Name"
+
 @dataclass
 class DataTransformationConfig:
     preprocessor_obj_file_path = os.path.join('artifact', "preprocessor.pkl")
     rag_obj_file_path = os.path.join('artifact', 'vectorstore')
+    rag_guidance_file_path = os.path.join('artifact', 'rag_guidance.json')
+    rag_guidance_top_k = 4
+    rag_manifest_file_path = os.path.join('artifact', 'vectorstore', 'manifest.json')
+    embedding_cache_file_path = os.path.join('artifact', 'embedding_cache', 'embeddings.sqlite3')
+    embedding_model_name = "sentence-transformers/all-MiniLM-L6-v2"
+    rag_chunk_size = 1000
+    rag_chunk_overlap = 200
+    rag_parse_workers = int(os.getenv("RAG_PARSE_WORKERS", str(os.cpu_count() or 1)))
+    embedding_batch_size = int(os.getenv("RAG_EMBEDDING_BATCH_SIZE", "256"))
+    # flat | ivf_flat | ivf_pq | hnsw, see benchmarks/faiss_index_benchmark.py for choosing
+    faiss_index_type = os.getenv("RAG_INDEX_TYPE", "flat")
+    faiss_nlist = int(os.getenv("RAG_INDEX_NLIST", "100"))
+    faiss_pq_m = int(os.getenv("RAG_INDEX_PQ_M", "16"))
+    faiss_pq_nbits = int(os.getenv("RAG_INDEX_PQ_NBITS", "8"))
+    faiss_hnsw_m = int(os.getenv("RAG_INDEX_HNSW_M", "32"))
+    faiss_hnsw_ef_construction = int(os.getenv("RAG_INDEX_HNSW_EF_CONSTRUCTION", "200"))
+    faiss_nprobe = int(os.getenv("RAG_NPROBE", "8"))
+    faiss_ef_search = int(os.getenv("RAG_EF_SEARCH", "64"))
+    faiss_train_sample_size = int(os.getenv("RAG_INDEX_TRAIN_SAMPLE_SIZE", "10000"))
+    # streaming (out-of-core) training mode
+    streaming_dir = os.path.join('artifact', 'streaming')
+    streaming_chunk_size = int(os.getenv("TRAINING_CHUNK_SIZE", "50000"))
 class DataTransformation:
     def __init__(self):
         self.data_transformation_config = DataTransformationConfig()
         
-    def get_transformed_object(self):
+    def get_transformed_object(self, categories='auto', scaler=None):
+        """
+        Unfitted preprocessor. categories fixes the one-hot columns and a fitted
+        scaler is kept as is (frozen) instead of being refitted by fit().
+        """
         try:
-            num_feature=['Temparature','Humidity','Moisture','Nitrogen','Potassium','Phosphorous','soil_health_score']
-            cat_feature=['Soil_Type', 'Crop_Type']
+            num_feature=RAW_NUMERIC_FEATURES
+            cat_feature=CATEGORICAL_FEATURES
             
+            # soil_health_score is derived inside the saved preprocessor, so serving
+            # only sends the raw columns and cannot drift from the training formula
             num_pipeline= Pipeline(
                 steps=[
-                    ("scalar", StandardScaler())
+                    ("derived_features", FunctionTransformer(add_derived_features, feature_names_out=derived_feature_names)),
+                    ("scalar", StandardScaler() if scaler is None else FrozenEstimator(scaler))
                 ]
             )
             cat_pipeline=Pipeline(
                 steps=[
-                    ("ohe_encoder", OneHotEncoder(handle_unknown='ignore')),
+                    ("ohe_encoder", OneHotEncoder(categories=categories, handle_unknown='ignore')),
                     # ("scalar", StandardScaler(with_mean=False))
                 ]
             )
@@ -49,11 +89,13 @@ class DataTransformation:
             logging.info(f"Catagorical columns:{cat_feature}")
             logging.info(f"numerical_feature: {num_feature}")
             
+            # sparse_threshold=1.0 keeps the one-hot output as CSR whatever its density
             preprocessor=ColumnTransformer(
                 [
                     ("num_pipeline", num_pipeline, num_feature),
                     ("cat_pipeline", cat_pipeline, cat_feature)
-                ]
+                ],
+                sparse_threshold=1.0
             )
             logging.info("Pipeline processed sucessfully")
             return preprocessor
@@ -61,9 +103,14 @@ class DataTransformation:
             raise CustomException(e, sys)
     
     def initate_data_transformation(self, train_pth, test_path):
+        """
+        Fit the preprocessor on the train split and transform both splits.
+        Returns ((x_train, y_train), (x_test, y_test), preprocessor path) with the
+        features as float32 CSR matrices and the encoded targets as separate vectors.
+        """
         try:
-            train_df=pd.read_csv(train_pth)
-            test_df=pd.read_csv(test_path)
+            train_df=read_split(train_pth)
+            test_df=read_split(test_path)
             
             logging.info("Read train test data completed")
             logging.info("Read test completed")
@@ -71,28 +118,24 @@ class DataTransformation:
             preprocessor_obj=self.get_transformed_object()
             le=LabelEncoder()
             
-            target_column="Fertilizer_Name"
+            target_column=TARGET_COLUMN
             
-            input_feature_train_df=train_df.drop(columns=[target_column], axis=True)
+            input_feature_train_df=train_df.drop(columns=[target_column])
             target_column_train_df=train_df[target_column]
             target_column_train_df=le.fit_transform(target_column_train_df)
             
-            input_feature_test_df=test_df.drop(columns=[target_column], axis=True)
+            input_feature_test_df=test_df.drop(columns=[target_column])
             target_column_test_df=test_df[target_column]
             target_column_test_df=le.transform(target_column_test_df)
             
             logging.info(f"train and test transformed")
             logging.info("Applying the preprocessor on the data")
             
-            input_feature_train_array=preprocessor_obj.fit_transform(input_feature_train_df)
-            input_feature_test_array=preprocessor_obj.transform(input_feature_test_df)
+            input_feature_train_array=sparse.csr_matrix(preprocessor_obj.fit_transform(input_feature_train_df), dtype=np.float32)
+            input_feature_test_array=sparse.csr_matrix(preprocessor_obj.transform(input_feature_test_df), dtype=np.float32)
             
-            train_arr=np.c_[
-                input_feature_train_array, np.array(target_column_train_df)
-            ]
-            test_arr=np.c_[
-                input_feature_test_array, np.array(target_column_test_df)
-            ]
+            train_arr=(input_feature_train_array, np.asarray(target_column_train_df))
+            test_arr=(input_feature_test_array, np.asarray(target_column_test_df))
             
             logging.info(f"Saved Preprocessing object")
             
@@ -109,39 +152,250 @@ class DataTransformation:
         except Exception as e:
             raise CustomException(e, sys)
         
-    def initate_rag_transformation(self, docs_path : str):
+    def fit_streaming_preprocessor(self, train_path):
+        """
+        Fit the preprocessor in one pass over the train split: the scaler from running
+        mean/variance (partial_fit) and the encoder from the union of categories over
+        every chunk. Returns (preprocessor, target classes).
+        """
+        try:
+            chunk_size=self.data_transformation_config.streaming_chunk_size
+            scaler=StandardScaler()
+            categories={column: set() for column in CATEGORICAL_FEATURES}
+            classes=set()
+            sample=None
+            for batch in iter_split_batches(train_path, chunk_size):
+                scaler.partial_fit(add_derived_features(batch[RAW_NUMERIC_FEATURES]))
+                for column in CATEGORICAL_FEATURES:
+                    categories[column].update(batch[column].dropna().astype(str).unique())
+                classes.update(batch[TARGET_COLUMN].dropna().astype(str).unique())
+                if sample is None:
+                    sample=batch.drop(columns=[TARGET_COLUMN]).head(1)
+            if sample is None:
+                raise ValueError(f"No rows in {train_path}")
+            
+            # built from the full-pass statistics: with the scaler frozen and the categories
+            # given, fit() learns nothing from its one-row sample beyond the input columns
+            preprocessor=self.get_transformed_object(
+                categories=[sorted(categories[column]) for column in CATEGORICAL_FEATURES], scaler=scaler
+            )
+            preprocessor.fit(sample)
+            logging.info(f"Streaming preprocessor fitted on {int(scaler.n_samples_seen_)} rows")
+            return preprocessor, np.array(sorted(classes))
+        except Exception as e:
+            raise CustomException(e, sys)
+    
+    def transform_split_to_memmap(self, preprocessor, classes, split_path, name):
+        """
+        Transform a split chunk by chunk into a float32 .npy memmap (features) and an
+        int64 .npy (encoded target) under streaming_dir. Returns read-only memmaps.
+        """
+        try:
+            config=self.data_transformation_config
+            os.makedirs(config.streaming_dir, exist_ok=True)
+            features_path=os.path.join(config.streaming_dir, f"{name}_features.npy")
+            target_path=os.path.join(config.streaming_dir, f"{name}_target.npy")
+            
+            n_rows=split_num_rows(split_path)
+            n_features=sum(len(c) for c in preprocessor.named_transformers_['cat_pipeline'][-1].categories_) + len(NUMERIC_FEATURES)
+            features=np.lib.format.open_memmap(features_path, mode='w+', dtype=np.float32, shape=(n_rows, n_features))
+            target=np.lib.format.open_memmap(target_path, mode='w+', dtype=np.int64, shape=(n_rows,))
+            
+            start=0
+            for batch in iter_split_batches(split_path, config.streaming_chunk_size):
+                transformed=preprocessor.transform(batch.drop(columns=[TARGET_COLUMN]))
+                if hasattr(transformed, "toarray"):
+                    transformed=transformed.toarray()
+                end=start+len(batch)
+                features[start:end]=transformed
+                target[start:end]=np.searchsorted(classes, batch[TARGET_COLUMN].astype(str).to_numpy())
+                start=end
+            features.flush()
+            target.flush()
+            del features, target
+            
+            logging.info(f"{name} split transformed to {features_path} ({n_rows} x {n_features} float32)")
+            return np.load(features_path, mmap_mode='r'), np.load(target_path, mmap_mode='r')
+        except Exception as e:
+            raise CustomException(e, sys)
+    
+    def initate_streaming_data_transformation(self, train_path, test_path):
+        """
+        Out-of-core counterpart of initate_data_transformation: peak memory is bounded by
+        streaming_chunk_size rows instead of the dataset size.
+        Returns ((x_train, y_train), (x_test, y_test), preprocessor path) as memmaps.
+        """
+        try:
+            preprocessor_obj, classes=self.fit_streaming_preprocessor(train_path)
+            train=self.transform_split_to_memmap(preprocessor_obj, classes, train_path, "train")
+            test=self.transform_split_to_memmap(preprocessor_obj, classes, test_path, "test")
+            
+            save_obj(
+                file_path=self.data_transformation_config.preprocessor_obj_file_path,
+                obj=preprocessor_obj
+            )
+            logging.info(f"Saved Preprocessing object")
+            return train, test, self.data_transformation_config.preprocessor_obj_file_path
+        except Exception as e:
+            raise CustomException(e, sys)
     
+    def initate_rag_transformation(self, docs_path : str):
+        """
+        Incremental index build: only PDFs whose content hash changed since the
+        last run are parsed and embedded, vectors of removed or changed PDFs are
+        deleted, and chunk embeddings are reused from the on-disk cache.
+        
+        Changed PDFs are parsed and split in a process pool and their chunks are
+        embedded and added to the index in batches of embedding_batch_size, so
+        peak memory is bounded by the batch rather than the corpus.
+        """
         try:
+            from langchain_huggingface import HuggingFaceEmbeddings
+            from src.components.embedding_cache import CachedEmbeddings
+
             logging.info("Started Rag Application")
             if not os.path.exists(docs_path):
                 raise FileNotFoundError(f"Document folder not found: {docs_path}")
             
-            all_docs=[]
-            for file in os.listdir(docs_path):
-                if file.endswith(".pdf"):
-                    pdf_file=os.path.join(docs_path, file)
-                    loader=PyPDFLoader(pdf_file)
-                    all_docs.extend(loader.load())
-            logging.info(f"all pages form {len(all_docs)} loaded")
+            config = self.data_transformation_config
+            current_hashes = {
+                file: file_sha256(os.path.join(docs_path, file))
+                for file in sorted(os.listdir(docs_path)) if file.endswith(".pdf")
+            }
+            
+            manifest = RagManifest.load(
+                config.rag_manifest_file_path, config.embedding_model_name, config.faiss_index_type
+            )
+            embedding = CachedEmbeddings(
+                HuggingFaceEmbeddings(
+                    model_name=config.embedding_model_name,
+                    encode_kwargs={"batch_size": config.embedding_batch_size}
+                ),
+                config.embedding_cache_file_path,
+                config.embedding_model_name
+            )
+            
+            vector_store = None
+            if manifest.files and os.path.exists(os.path.join(config.rag_obj_file_path, "index.faiss")):
+                vector_store = load_vector_store(
+                    config.rag_obj_file_path, embedding, nprobe=config.faiss_nprobe, ef_search=config.faiss_ef_search
+                )
+            else:
+                manifest.files = {}
+            
+            changed, removed = manifest.diff(current_hashes)
+            if removed and vector_store is not None and config.faiss_index_type != "flat":
+                # HNSW cannot remove vectors and IVF keeps the removed ids, which breaks the
+                # sequential id mapping of the langchain store; chunk embeddings are cached,
+                # so the rebuild only re-parses PDFs
+                logging.info(f"{config.faiss_index_type} index cannot delete vectors in place, rebuilding it")
+                vector_store = None
+                manifest.files = {}
+                changed, removed = manifest.diff(current_hashes)
+            logging.info(f"RAG docs: {len(changed)} new or changed, {len(removed)} removed, "
+                         f"{len(current_hashes) - len(changed)} unchanged")
+            if not changed and not removed and vector_store is not None:
+                logging.info("Vector DB is up to date")
+                return config.rag_obj_file_path
             
-            splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-            chunk=splitter.split_documents(all_docs)
-            logging.info(f"created {len(chunk)} text chunks")
+            stale_ids = [chunk_id for file in removed for chunk_id in manifest.files.pop(file)["chunk_ids"]]
+            if stale_ids and vector_store is not None:
+                vector_store.delete(ids=stale_ids)
+                logging.info(f"deleted {len(stale_ids)} stale chunks")
             
-            embedding=HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-            vector_store=FAISS.from_documents(chunk, embedding)
+            stats = IngestionStats()
+            pending_chunks, pending_ids = [], []
             
-            os.makedirs(self.data_transformation_config.rag_obj_file_path, exist_ok=True)
-            vector_store.save_local(self.data_transformation_config.rag_obj_file_path)
-            logging.info(f"Vector DB saved at {self.data_transformation_config.rag_obj_file_path}")
+            def next_batch_size(vector_store):
+                # IVF indexes are trained on the first batch, so that one is sample sized
+                if vector_store is None and index_needs_training(config.faiss_index_type):
+                    return max(config.embedding_batch_size, config.faiss_train_sample_size)
+                return config.embedding_batch_size
             
-            return self.data_transformation_config.rag_obj_file_path
+            def flush(vector_store, count):
+                batch, batch_ids = pending_chunks[:count], pending_ids[:count]
+                del pending_chunks[:count], pending_ids[:count]
+                if vector_store is None:
+                    vector_store = self.create_vector_store(batch, batch_ids, embedding)
+                else:
+                    vector_store.add_documents(batch, ids=batch_ids)
+                stats.log("RAG ingestion progress")
+                return vector_store
             
+            changed_files = [os.path.join(docs_path, file) for file in changed]
+            for pdf_file, page_count, chunk in iter_pdf_chunks(
+                changed_files, config.rag_parse_workers, config.rag_chunk_size, config.rag_chunk_overlap
+            ):
+                file = os.path.basename(pdf_file)
+                ids = chunk_ids_for(file, current_hashes[file], chunk)
+                manifest.files[file] = {"sha256": current_hashes[file], "chunk_ids": ids}
+                stats.files += 1
+                stats.pages += page_count
+                stats.chunks += len(chunk)
+                
+                pending_chunks.extend(chunk)
+                pending_ids.extend(ids)
+                while len(pending_chunks) >= next_batch_size(vector_store):
+                    vector_store = flush(vector_store, next_batch_size(vector_store))
+            if pending_chunks:
+                vector_store = flush(vector_store, len(pending_chunks))
+            stats.log()
+            logging.info(f"embedding cache: {embedding.hits} hits, {embedding.misses} newly embedded chunks")
             
+            if vector_store is None:
+                raise ValueError(f"No PDF content found in {docs_path}")
+            
+            os.makedirs(config.rag_obj_file_path, exist_ok=True)
+            vector_store.save_local(config.rag_obj_file_path)
+            manifest.save()
+            logging.info(f"Vector DB saved at {config.rag_obj_file_path}")
+            
+            self.initate_rag_guidance_index(vector_store)
+            
+            return config.rag_obj_file_path
         
         except Exception as e:
             raise CustomException(e, sys)
+    
+    def create_vector_store(self, chunks, ids, embedding):
+        """New FAISS store of the configured index type, trained on this first batch of chunks."""
+        from langchain_community.vectorstores import FAISS
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+
+        config = self.data_transformation_config
+        texts = [chunk.page_content for chunk in chunks]
+        vectors = embedding.embed_documents(texts)
+        index = build_faiss_index(
+            config.faiss_index_type, vectors,
+            nlist=config.faiss_nlist, pq_m=config.faiss_pq_m, pq_nbits=config.faiss_pq_nbits,
+            hnsw_m=config.faiss_hnsw_m, hnsw_ef_construction=config.faiss_hnsw_ef_construction
+        )
+        set_search_params(index, config.faiss_nprobe, config.faiss_ef_search)
+        vector_store = FAISS(embedding, index, InMemoryDocstore(), {})
+        vector_store.add_embeddings(
+            list(zip(texts, vectors)), metadatas=[chunk.metadata for chunk in chunks], ids=ids
+        )
+        return vector_store
+    
+    def initate_rag_guidance_index(self, vector_store):
+        """
+        The serving query only depends on the predicted fertilizer label, so the
+        top-k passages for every label are retrieved once here and written to a
+        small JSON artifact that rag_predict reads instead of embedding a query.
+        """
+        try:
+            guidance = {}
+            for fertilizer_name in FERTILIZER_LABELS.values():
+                result = vector_store.similarity_search(
+                    query=fertilizer_guidance_query(fertilizer_name),
+                    k=self.data_transformation_config.rag_guidance_top_k
+                )
+                guidance[fertilizer_name] = [doc.page_content for doc in result]
             
+            with open(self.data_transformation_config.rag_guidance_file_path, 'w', encoding='utf-8') as file_obj:
+                json.dump(guidance, file_obj, ensure_ascii=False)
+            logging.info(f"RAG guidance for {len(guidance)} fertilizers saved at {self.data_transformation_config.rag_guidance_file_path}")
             
-    
-        
+            return self.data_transformation_config.rag_guidance_file_path
+        except Exception as e:
+            raise CustomException(e, sys)
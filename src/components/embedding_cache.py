@@ -0,0 +1,52 @@
+import os
+import hashlib
+import sqlite3
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embedding wrapper with an on-disk cache keyed by the hash of the chunk text,
+    so unchanged chunks (even inside a changed PDF) are never re-embedded.
+    """
+    def __init__(self, embedding, cache_path, model_name):
+        self.embedding = embedding
+        self.model_name = model_name
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        self._conn = sqlite3.connect(cache_path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def embed_documents(self, texts):
+        keys = [self._key(text) for text in texts]
+        cached = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            cached.update({key: np.frombuffer(vector, dtype=np.float32).tolist() for key, vector in rows})
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            vectors = self.embedding.embed_documents([texts[i] for i in missing])
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(keys[i], np.asarray(vector, dtype=np.float32).tobytes()) for i, vector in zip(missing, vectors)]
+                )
+            for i, vector in zip(missing, vectors):
+                cached[keys[i]] = list(vector)
+
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text):
+        return self.embedding.embed_query(text)
@@ -0,0 +1,38 @@
+import numpy as np
+
+# Raw numeric inputs, in the order the kernels below expect them
+RAW_NUMERIC_FEATURES = ['Temparature', 'Humidity', 'Moisture', 'Nitrogen', 'Potassium', 'Phosphorous']
+DERIVED_FEATURES = ['soil_health_score']
+NUMERIC_FEATURES = RAW_NUMERIC_FEATURES + DERIVED_FEATURES
+
+SOIL_HEALTH_WEIGHTS = (0.2, 0.1, 0.2, 0.2, 0.15, 0.15)
+
+
+def add_derived_features(numeric):
+    """
+    (n, 6) raw numerics -> (n, 7) float64 with soil_health_score appended, for a
+    whole batch at once. Used inside the saved preprocessor (FunctionTransformer)
+    and by the compiled model, so training and serving share one formula.
+    """
+    numeric = np.asarray(numeric, dtype=np.float64)
+    features = np.empty((len(numeric), len(NUMERIC_FEATURES)), dtype=np.float64)
+    features[:, :len(RAW_NUMERIC_FEATURES)] = numeric
+    # accumulated column by column, in the same order as soil_health_score_one
+    score = features[:, len(RAW_NUMERIC_FEATURES)]
+    score[:] = 0.0
+    for column, weight in enumerate(SOIL_HEALTH_WEIGHTS):
+        score += numeric[:, column] * weight
+    return features
+
+
+def soil_health_score_one(values):
+    """Scalar counterpart of add_derived_features for one row, bit-identical to it."""
+    score = 0.0
+    for value, weight in zip(values, SOIL_HEALTH_WEIGHTS):
+        score += value * weight
+    return score
+
+
+def derived_feature_names(transformer, input_features):
+    """feature_names_out of the FunctionTransformer wrapping add_derived_features."""
+    return np.asarray(list(input_features) + DERIVED_FEATURES, dtype=object)
@@ -0,0 +1,186 @@
+import sys
+
+import numpy as np
+
+from src.components.feature_engineering import DERIVED_FEATURES, add_derived_features, soil_health_score_one
+from src.exception import CustomException
+from src.logger import logging
+
+
+class CompiledFertilizerModel:
+    """
+    Dependency-light inference artifact for the fertilizer classifier.
+
+    The fitted ColumnTransformer (derived features + StandardScaler, OneHotEncoder)
+    is reduced to plain arrays and applied as one fused step that writes straight
+    into the model input, and every tree of the DecisionTree/RandomForest is flattened
+    into shared node arrays. Only NumPy is needed to load and run it.
+    """
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.num_columns = [str(c) for c in arrays['num_columns']]
+        self.cat_columns = [str(c) for c in arrays['cat_columns']]
+        # artifacts exported before feature engineering moved into the preprocessor have none
+        self.derived_features = [str(c) for c in arrays['derived_features']] if 'derived_features' in arrays else []
+        self.mean = arrays['mean']
+        self.scale = arrays['scale']
+        self.classes = arrays['classes']
+        self.n_numeric = len(self.mean)
+        self.n_features = self.n_numeric + int(arrays['category_offsets'][-1])
+
+        categories = [str(c) for c in arrays['categories']]
+        offsets = arrays['category_offsets']
+        self.category_index = []
+        for i in range(len(self.cat_columns)):
+            start, end = int(offsets[i]), int(offsets[i + 1])
+            base = self.n_numeric + start
+            self.category_index.append({category: base + j for j, category in enumerate(categories[start:end])})
+
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.max_depth = int(arrays['max_depth'])
+
+        # plain lists make the single-row walk a few hundred nanoseconds per tree
+        self._left = self.left.tolist()
+        self._right = self.right.tolist()
+        self._feature = self.feature.tolist()
+        self._threshold = self.threshold.tolist()
+        self._value = self.value.tolist()
+        self._roots = self.roots.tolist()
+        self._mean = self.mean.tolist()
+        self._scale = self.scale.tolist()
+
+    @classmethod
+    def from_sklearn(cls, preprocessor, model):
+        try:
+            transformers = {name: (transformer, columns) for name, transformer, columns in preprocessor.transformers_}
+            scaler_pipeline, num_columns = transformers['num_pipeline']
+            encoder_pipeline, cat_columns = transformers['cat_pipeline']
+            scaler = scaler_pipeline[-1]
+            encoder = encoder_pipeline[-1]
+            derived = DERIVED_FEATURES if 'derived_features' in scaler_pipeline.named_steps else []
+
+            categories = [str(c) for column_categories in encoder.categories_ for c in column_categories]
+            category_offsets = np.cumsum([0] + [len(c) for c in encoder.categories_])
+
+            trees = model.estimators_ if hasattr(model, 'estimators_') else [model]
+            left, right, feature, threshold, value, roots = [], [], [], [], [], []
+            offset = 0
+            for estimator in trees:
+                tree = estimator.tree_
+                is_leaf = tree.children_left == -1
+                left.append(np.where(is_leaf, -1, tree.children_left + offset))
+                right.append(np.where(is_leaf, -1, tree.children_right + offset))
+                feature.append(np.where(is_leaf, 0, tree.feature))
+                threshold.append(tree.threshold)
+                leaf_value = tree.value[:, 0, :]
+                value.append(leaf_value / np.maximum(leaf_value.sum(axis=1, keepdims=True), 1e-12))
+                roots.append(offset)
+                offset += tree.node_count
+
+            arrays = {
+                'num_columns': np.array(num_columns, dtype=str),
+                'cat_columns': np.array(cat_columns, dtype=str),
+                'derived_features': np.array(derived, dtype=str),
+                'mean': np.asarray(scaler.mean_, dtype=np.float64),
+                'scale': np.asarray(scaler.scale_, dtype=np.float64),
+                'categories': np.array(categories, dtype=str),
+                'category_offsets': category_offsets.astype(np.int64),
+                'left': np.concatenate(left).astype(np.int64),
+                'right': np.concatenate(right).astype(np.int64),
+                'feature': np.concatenate(feature).astype(np.int64),
+                'threshold': np.concatenate(threshold).astype(np.float64),
+                'value': np.concatenate(value).astype(np.float64),
+                'roots': np.array(roots, dtype=np.int64),
+                'classes': np.asarray(model.classes_),
+                'max_depth': np.int64(max(estimator.tree_.max_depth for estimator in trees)),
+            }
+            return cls(arrays)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @classmethod
+    def load(cls, file_path):
+        with np.load(file_path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def save(self, file_path):
+        np.savez_compressed(file_path, **self.arrays)
+
+    def transform(self, numeric, categorical):
+        """
+        Fused derived features + scaler + one-hot step for a batch. numeric is
+        (n, len(num_columns)), categorical is one sequence of values per cat column.
+        Rows are scaled in float32 like sklearn's trees see them.
+        """
+        numeric = np.asarray(numeric, dtype=np.float64)
+        if self.derived_features:
+            numeric = add_derived_features(numeric)
+        features = np.zeros((len(numeric), self.n_features), dtype=np.float32)
+        features[:, :self.n_numeric] = (numeric - self.mean) / self.scale
+        for index, values in zip(self.category_index, categorical):
+            columns = np.array([index.get(str(v), -1) for v in values])
+            rows = np.nonzero(columns >= 0)[0]
+            features[rows, columns[rows]] = 1.0
+        return features
+
+    def predict_transformed(self, features):
+        """Vectorized walk of every tree over a (n, n_features) float32 matrix."""
+        rows = np.arange(len(features))
+        proba = np.zeros((len(features), self.value.shape[1]))
+        for root in self.roots:
+            node = np.full(len(features), root, dtype=np.int64)
+            for _ in range(self.max_depth):
+                go_left = features[rows, self.feature[node]] <= self.threshold[node]
+                child = np.where(go_left, self.left[node], self.right[node])
+                node = np.where(child == -1, node, child)
+            proba += self.value[node]
+        return self.classes[np.argmax(proba, axis=1)]
+
+    def predict(self, numeric, categorical):
+        return self.predict_transformed(self.transform(numeric, categorical))
+
+    def predict_one(self, record):
+        """Single row from a {column: value} mapping, pure Python, no arrays built."""
+        values = [float(record[column]) for column in self.num_columns]
+        if self.derived_features:
+            values.append(soil_health_score_one(values))
+        features = {}
+        for i, value in enumerate(values):
+            # float32 rounding keeps split decisions identical to sklearn
+            features[i] = float(np.float32((value - self._mean[i]) / self._scale[i]))
+        for column, index in zip(self.cat_columns, self.category_index):
+            position = index.get(str(record[column]))
+            if position is not None:
+                features[position] = 1.0
+
+        left, right, feature, threshold = self._left, self._right, self._feature, self._threshold
+        proba = None
+        for root in self._roots:
+            node = root
+            while left[node] != -1:
+                node = left[node] if features.get(feature[node], 0.0) <= threshold[node] else right[node]
+            leaf = self._value[node]
+            proba = list(leaf) if proba is None else [p + v for p, v in zip(proba, leaf)]
+        return self.classes[max(range(len(proba)), key=proba.__getitem__)].item()
+
+
+def verify_parity(compiled, preprocessor, model, frame):
+    """Raise if the compiled artifact disagrees with preprocessor + model on any row of frame."""
+    try:
+        expected = model.predict(preprocessor.transform(frame))
+        numeric = frame[compiled.num_columns].to_numpy(dtype=np.float64)
+        categorical = [frame[column].tolist() for column in compiled.cat_columns]
+        batch = compiled.predict(numeric, categorical)
+        single = np.array([compiled.predict_one(record) for record in frame.to_dict('records')])
+        mismatches = int((batch != expected).sum() + (single != expected).sum())
+        if mismatches:
+            raise ValueError(f"Compiled model disagrees with sklearn on {mismatches} predictions")
+        logging.info(f"Compiled model matches sklearn on {len(frame)} rows")
+        return len(frame)
+    except Exception as e:
+        raise CustomException(e, sys)
@@ -2,7 +2,8 @@ import os
 import sys
 from src.logger import logging
 from src.exception import CustomException
-from src.utils import save_obj, evalution_model
+from src.utils import save_obj, load_obj, read_split, evalution_model
+from src.components.model_compiler import CompiledFertilizerModel, verify_parity
 
 from dataclasses import dataclass
 from sklearn.metrics import mean_squared_error, r2_score
@@ -19,42 +20,81 @@ from sklearn.model_selection import RandomizedSearchCV
 # from catboost import CatBoostClassifier
 # from xgboost import XGBClassifier
 import warnings
+import numpy as np
+import pandas as pd
 
 @dataclass
 class ModelTrainingConfig:
     train_model_file_path =os.path.join('artifact', 'model.pkl')
+    compiled_model_file_path =os.path.join('artifact', 'model_compiled.npz')
+    preprocessor_obj_file_path =os.path.join('artifact', 'preprocessor.pkl')
+    parity_data_path =os.path.join('artifact', 'test.parquet')
+    model_cache_dir =os.path.join('artifact', 'model_cache')
+    n_jobs =int(os.getenv("MODEL_SELECTION_N_JOBS", str(os.cpu_count() or 1)))
+    search_n_iter =int(os.getenv("MODEL_SELECTION_N_ITER", "10"))
+    # streaming (out-of-core) training mode
+    streaming_chunk_size =int(os.getenv("TRAINING_CHUNK_SIZE", "50000"))
+    streaming_epochs =int(os.getenv("TRAINING_EPOCHS", "5"))
+    # a run below this test accuracy never replaces the saved model
+    min_model_score =0.6
     
 class ModelTraining:
     def __init__(self): 
         self.model_train_config=ModelTrainingConfig()
         
     def initiate_model_trainer(self, train_array, test_array):
+        """
+        train_array / test_array are (features, target) pairs, features dense or CSR;
+        a dense array with the target as its last column is still accepted.
+        """
         try:
             logging.info("Split Train and Test input data")
-            x_train, y_train, x_test, y_test=(
-                train_array[:, :-1],
-                train_array[:, -1],
-                test_array[:, :-1],
-                test_array[:, -1]                
-            )
+            if isinstance(train_array, tuple):
+                (x_train, y_train), (x_test, y_test)=train_array, test_array
+            else:
+                x_train, y_train, x_test, y_test=(
+                    train_array[:, :-1],
+                    train_array[:, -1],
+                    test_array[:, :-1],
+                    test_array[:, -1]                
+                )
             
             models={
                 "Decision Tree":DecisionTreeClassifier(),
                 "Random Forest":RandomForestClassifier()
             }
             
-            model_report:dict=evalution_model(X_train=x_train, X_test=x_test, y_train=y_train, y_test=y_test, models=models)
+            params={
+                "Decision Tree":{
+                    "criterion":["gini", "entropy", "log_loss"],
+                    "max_depth":[None, 4, 6, 8, 12],
+                    "min_samples_leaf":[1, 2, 4]
+                },
+                "Random Forest":{
+                    "n_estimators":[50, 100, 200],
+                    "max_depth":[None, 6, 10],
+                    "max_features":["sqrt", "log2", None]
+                }
+            }
+            
+            model_report:dict=evalution_model(
+                X_train=x_train, X_test=x_test, y_train=y_train, y_test=y_test, models=models, params=params,
+                n_jobs=self.model_train_config.n_jobs,
+                cache_dir=self.model_train_config.model_cache_dir,
+                n_iter=self.model_train_config.search_n_iter
+            )
             
-            best_model_score=max(sorted(model_report.values()))
+            model_scores={name: result["test_accuracy"] for name, result in model_report.items()}
+            best_model_score=max(sorted(model_scores.values()))
             
-            best_model_name=list(model_report.keys())[
-                list(model_report.values()).index(best_model_score)
+            best_model_name=list(model_scores.keys())[
+                list(model_scores.values()).index(best_model_score)
             ]
             
             best_model= models[best_model_name]
             
-            if best_model_score< 0.6:
-                raise CustomException("No best model found")
+            if best_model_score< self.model_train_config.min_model_score:
+                raise ValueError(f"No best model found, best test accuracy {best_model_score}")
             logging.info(f"Best found model on both training and testing dataset")
             
             save_obj(
@@ -62,6 +102,8 @@ class ModelTraining:
                 obj=best_model
             )
             
+            self.export_compiled_model(best_model)
+            
             predicted=best_model.predict(x_test)
             accuracy=accuracy_score(y_test, predicted)
             return accuracy
@@ -69,3 +111,74 @@ class ModelTraining:
         
         except Exception as e:
             raise CustomException(e, sys)
+    
+    def initiate_streaming_model_trainer(self, train, test):
+        """
+        Train an incremental SGD classifier over memmapped (features, target) pairs,
+        chunk by chunk, so only streaming_chunk_size rows are in memory at a time.
+        Chunks are visited in a shuffled order each epoch.
+        
+        A run below min_model_score keeps the saved model. SGD has no compiled form,
+        so a saved run removes model_compiled.npz and is served by the sklearn backend.
+        """
+        try:
+            from sklearn.linear_model import SGDClassifier
+            
+            x_train, y_train=train
+            x_test, y_test=test
+            chunk_size=self.model_train_config.streaming_chunk_size
+            starts=np.arange(0, len(x_train), chunk_size)
+            classes=np.unique(y_train)
+            rng=np.random.default_rng(42)
+            
+            model=SGDClassifier(loss="log_loss", random_state=42)
+            for epoch in range(self.model_train_config.streaming_epochs):
+                for start in rng.permutation(starts):
+                    model.partial_fit(x_train[start:start+chunk_size], y_train[start:start+chunk_size], classes=classes)
+                logging.info(f"Streaming training epoch {epoch+1} done")
+            
+            correct=0
+            for start in range(0, len(x_test), chunk_size):
+                correct+=int((model.predict(x_test[start:start+chunk_size]) == y_test[start:start+chunk_size]).sum())
+            accuracy=correct/max(len(x_test), 1)
+            logging.info(f"Streaming model test accuracy: {accuracy}")
+            
+            # same guard as initiate_model_trainer: a worse run must not overwrite model.pkl
+            if accuracy< self.model_train_config.min_model_score:
+                raise ValueError(f"Streaming model test accuracy {accuracy} is below {self.model_train_config.min_model_score}, keeping the saved model")
+            
+            save_obj(
+                file_path=self.model_train_config.train_model_file_path,
+                obj=model
+            )
+            self.export_compiled_model(model)
+            return accuracy
+        except Exception as e:
+            raise CustomException(e, sys)
+    
+    def export_compiled_model(self, model):
+        """Write the NumPy-only inference artifact and check it against the sklearn path."""
+        try:
+            if not hasattr(model, 'tree_') and not hasattr(model, 'estimators_'):
+                # only tree models compile; the previous artifact belongs to the replaced
+                # model, so it is removed rather than served next to the new model.pkl
+                compiled_path=self.model_train_config.compiled_model_file_path
+                if os.path.exists(compiled_path):
+                    os.remove(compiled_path)
+                    logging.info(f"Removed {compiled_path}: it was compiled from the previous model")
+                logging.info(f"{type(model).__name__} has no compiled form; "
+                             f"FERTILIZER_BACKEND=compiled serves the sklearn model until one is compiled")
+                return None
+            
+            preprocessor=load_obj(self.model_train_config.preprocessor_obj_file_path)
+            compiled=CompiledFertilizerModel.from_sklearn(preprocessor, model)
+            
+            parity_df=read_split(self.model_train_config.parity_data_path)
+            parity_df=parity_df.drop(columns=["Fertilizer_Name"], errors="ignore")
+            verify_parity(compiled, preprocessor, model, parity_df)
+            
+            compiled.save(self.model_train_config.compiled_model_file_path)
+            logging.info(f"Compiled model saved at {self.model_train_config.compiled_model_file_path}")
+            return self.model_train_config.compiled_model_file_path
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import pickle
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from src.logger import logging
+
+
+class RagManifest:
+    """
+    Records which PDFs are in the vector index: file name -> content hash and the
+    ids of the chunks it contributed, so a rebuild only touches what changed.
+    """
+    def __init__(self, manifest_path, embedding_model_name, index_type="flat"):
+        self.manifest_path = manifest_path
+        self.embedding_model_name = embedding_model_name
+        self.index_type = index_type
+        self.files = {}
+
+    @classmethod
+    def load(cls, manifest_path, embedding_model_name, index_type="flat"):
+        manifest = cls(manifest_path, embedding_model_name, index_type)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as file_obj:
+                data = json.load(file_obj)
+            # vectors from another embedding model or index layout cannot be reused
+            if (data.get('embedding_model') == embedding_model_name
+                    and data.get('index_type', 'flat') == index_type):
+                manifest.files = data.get('files', {})
+        return manifest
+
+    def diff(self, current_hashes):
+        """Split the current {file: sha256} into (added_or_changed, removed) file names."""
+        changed = [name for name, digest in current_hashes.items()
+                   if self.files.get(name, {}).get('sha256') != digest]
+        removed = [name for name, entry in self.files.items()
+                   if current_hashes.get(name) != entry.get('sha256')]
+        return sorted(changed), sorted(removed)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file_obj:
+            json.dump({'embedding_model': self.embedding_model_name, 'index_type': self.index_type,
+                       'files': self.files}, file_obj, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def chunk_ids_for(file_name, file_digest, chunks):
+    # the file name is part of the id so identical copies of a PDF stay independent
+    return [f"{file_name}:{file_digest[:16]}:{index}" for index in range(len(chunks))]
+
+
+def parse_pdf_chunks(pdf_file, chunk_size=1000, chunk_overlap=200):
+    """Parse and split one PDF; runs inside a worker process. Returns (file, page count, chunks)."""
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    pages = PyPDFLoader(pdf_file).load()
+    return pdf_file, len(pages), splitter.split_documents(pages)
+
+
+def iter_pdf_chunks(pdf_files, workers, chunk_size=1000, chunk_overlap=200):
+    """
+    Parse PDFs in a process pool and yield (file, page count, chunks) as each one
+    finishes. At most 2 * workers files are in flight, so memory does not grow
+    with the size of the corpus.
+    """
+    pdf_files = list(pdf_files)
+    if workers <= 1:
+        for pdf_file in pdf_files:
+            yield parse_pdf_chunks(pdf_file, chunk_size, chunk_overlap)
+        return
+
+    pending_files = iter(pdf_files)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for pdf_file in pending_files:
+            in_flight.add(executor.submit(parse_pdf_chunks, pdf_file, chunk_size, chunk_overlap))
+            if len(in_flight) >= 2 * workers:
+                break
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                next_file = next(pending_files, None)
+                if next_file is not None:
+                    in_flight.add(executor.submit(parse_pdf_chunks, next_file, chunk_size, chunk_overlap))
+                yield future.result()
+
+
+class IngestionStats:
+    """Throughput counters for the RAG transformation stage."""
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.files = 0
+        self.pages = 0
+        self.chunks = 0
+
+    def rates(self):
+        elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+        return self.pages / elapsed, self.chunks / elapsed
+
+    def log(self, prefix="RAG ingestion"):
+        pages_per_sec, chunks_per_sec = self.rates()
+        logging.info(f"{prefix}: {self.files} files, {self.pages} pages, {self.chunks} chunks "
+                     f"({pages_per_sec:.1f} pages/sec, {chunks_per_sec:.1f} chunks/sec)")
+
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+
+def index_needs_training(index_type):
+    return index_type in ("ivf_flat", "ivf_pq")
+
+
+def build_faiss_index(index_type, train_vectors, nlist=100, pq_m=16, pq_nbits=8, hnsw_m=32, hnsw_ef_construction=200):
+    """
+    Create an empty (trained where needed) L2 FAISS index of the requested type.
+    IVF layouts are trained on train_vectors; nlist is capped so every list gets
+    enough training points, and a sample too small for PQ falls back to flat.
+    """
+    import faiss
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type}, expected one of {INDEX_TYPES}")
+    train_vectors = np.ascontiguousarray(train_vectors, dtype=np.float32)
+    dim = train_vectors.shape[1]
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m)
+        index.hnsw.efConstruction = hnsw_ef_construction
+        return index
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+
+    n_train = len(train_vectors)
+    if index_type == "ivf_pq" and (n_train < 2 ** pq_nbits or dim % pq_m):
+        logging.info(f"{n_train} training vectors are not enough for IVF-PQ (m={pq_m}, nbits={pq_nbits}), using flat")
+        return faiss.IndexFlatL2(dim)
+    nlist = max(1, min(nlist, n_train // 39))
+    quantizer = faiss.IndexFlatL2(dim)
+    if index_type == "ivf_pq":
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_nbits)
+    else:
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    index.train(train_vectors)
+    logging.info(f"trained {index_type} index with nlist={nlist} on {n_train} vectors")
+    return index
+
+
+def set_search_params(index, nprobe=None, ef_search=None):
+    """Apply query-time knobs: nprobe for IVF layouts, efSearch for HNSW."""
+    import faiss
+
+    # the downcast wrapper does not own the index, so the caller keeps using the original
+    typed_index = faiss.downcast_index(index)
+    if nprobe and isinstance(typed_index, faiss.IndexIVF):
+        typed_index.nprobe = nprobe
+    if ef_search and isinstance(typed_index, faiss.IndexHNSW):
+        typed_index.hnsw.efSearch = ef_search
+    return index
+
+
+def load_vector_store(folder_path, embedding, mmap=False, nprobe=None, ef_search=None):
+    """
+    Load a saved langchain FAISS store. With mmap=True the index file is memory
+    mapped read-only instead of being copied into process memory.
+    """
+    import faiss
+    from langchain_community.vectorstores import FAISS
+
+    index_path = os.path.join(folder_path, "index.faiss")
+    index = None
+    if mmap:
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError as e:
+            logging.info(f"memory-mapped load not supported for this index, reading it fully: {e}")
+    if index is None:
+        index = faiss.read_index(index_path)
+    index = set_search_params(index, nprobe, ef_search)
+
+    with open(os.path.join(folder_path, "index.pkl"), "rb") as file_obj:
+        docstore, index_to_docstore_id = pickle.load(file_obj)
+    return FAISS(embedding, index, docstore, index_to_docstore_id)
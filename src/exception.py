@@ -1,6 +1,6 @@
 import sys
 
-from src.logger import logging
+from src.logger import configure_logging, logging
 
 def exception_message_detail_info(error, execption_message:sys):
     _,_,exc_tb = execption_message.exc_info()
@@ -18,6 +18,7 @@ class CustomException(Exception):
     
 #testing the code of loging
 if __name__ =="__main__":
+    configure_logging()
     try:
         a=1/0
     except Exception as e:
@@ -1,17 +1,144 @@
+import atexit
+import json
 import logging
 import os
+import queue
+from dataclasses import dataclass
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
-logs_path = os.path.join(os.getcwd(), "logs", LOG_FILE)
-os.makedirs(logs_path, exist_ok=True)
+LOG_FORMAT = "[%(asctime)s] %(lineno)d %(name)s - %(levelname)s - %(message)s"
+LOG_TIMESTAMP = datetime.now().strftime('%m_%d_%Y_%H_%M_%S')
 
-LOG_FILE_PATH = os.path.join(logs_path, LOG_FILE)
 
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[%(asctime)s] %(lineno)d %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-)
+@dataclass
+class LoggerConfig:
+    log_dir: str = os.getenv("LOG_DIR", os.path.join(os.getcwd(), "logs"))
+    level: str = os.getenv("LOG_LEVEL", "INFO")
+    log_format: str = os.getenv("LOG_FORMAT", "text")  # text | json
+    max_bytes: int = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    backup_count: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    queue_size: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "thread": record.threadName,
+            "module": record.module,
+            "lineno": record.lineno,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener thread; when the queue is full the record is dropped, never waited on."""
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogQueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        # at shutdown waiting is fine; the sentinel must not be dropped on a full queue
+        self.queue.put(self._sentinel)
+
+
+def log_file_path(config: LoggerConfig, pid=None):
+    """logs/<start time>_<pid>.log, so every worker process writes (and rotates) its own file."""
+    return os.path.join(config.log_dir, f"{LOG_TIMESTAMP}_{pid or os.getpid()}.log")
+
+
+def build_file_handler(config: LoggerConfig, path=None):
+    os.makedirs(config.log_dir, exist_ok=True)
+    handler = RotatingFileHandler(
+        path or log_file_path(config), maxBytes=config.max_bytes, backupCount=config.backup_count,
+        encoding="utf-8", delay=True  # pool workers that never log leave no empty file behind
+    )
+    handler.setFormatter(JsonFormatter() if config.log_format == "json" else logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+_queue_handler = None
+_listener = None
+_started = False
+_hooks_registered = False
+LOG_FILE_PATH = None
+
+
+def configure_logging(config: LoggerConfig = None):
+    """
+    Route the root logger through a bounded queue to a rotating file written by a
+    listener thread, so callers only pay for an enqueue. Called by the entry points
+    (app, gateway, training); importing this module configures nothing. Safe to
+    call again: the previous listener is stopped and its handler replaced.
+    """
+    global _queue_handler, _listener, _started, _hooks_registered, LOG_FILE_PATH
+    config = config or LoggerConfig()
+    root = logging.getLogger()
+    if _queue_handler is not None:
+        root.removeHandler(_queue_handler)
+    stop_logging()
+
+    LOG_FILE_PATH = log_file_path(config)
+    file_handler = build_file_handler(config, LOG_FILE_PATH)
+    log_queue = queue.Queue(maxsize=config.queue_size)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _listener = LogQueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    _started = True
+
+    root.addHandler(_queue_handler)
+    root.setLevel(config.level.upper())
+    if not _hooks_registered:
+        atexit.register(stop_logging)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_after_fork_in_child)
+        _hooks_registered = True
+    return _listener
+
+
+def stop_logging():
+    """Flush the queue to disk; registered with atexit by configure_logging()."""
+    global _started
+    if _listener is None:
+        return
+    if _started:
+        _listener.stop()
+        _started = False
+    for handler in _listener.handlers:
+        handler.close()
+
+
+def dropped_records():
+    """Records this process discarded because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def _after_fork_in_child():
+    # the listener thread does not survive fork(); the child gets its own queue, thread and file
+    global _listener, _started
+    if _listener is None:
+        return
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    _started = False
+    configure_logging()
+
 # if __name__=="__main__":
-#     logging.info("Logging has Started")
\ No newline at end of file
+#     logging.info("Logging has Started")
@@ -0,0 +1,194 @@
+import os
+import re
+import sys
+import json
+import codecs
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import FERTILIZER_LABELS
+from src.pipeline.model_registry import get_model_registry
+
+
+# API field names (same as the /prediction form) mapped to training column names,
+# keyed by normalize_column() so "Soil Type", "soil_type" and "Humidity " all match
+BATCH_COLUMN_ALIASES = {
+    'temperature': 'Temparature',
+    'temparature': 'Temparature',
+    'humidity': 'Humidity',
+    'moisture': 'Moisture',
+    'soil_type': 'Soil_Type',
+    'crop_type': 'Crop_Type',
+    'nitrogen': 'Nitrogen',
+    'potassium': 'Potassium',
+    'phosphorous': 'Phosphorous',
+}
+NUMERIC_COLUMNS = ['Temparature', 'Humidity', 'Moisture', 'Nitrogen', 'Potassium', 'Phosphorous']
+CATEGORICAL_COLUMNS = ['Soil_Type', 'Crop_Type']
+
+
+JSON_WHITESPACE = re.compile(r'\s*')
+
+
+def normalize_column(name):
+    return re.sub(r'[\s_]+', '_', str(name).strip().lower())
+
+
+def iter_json_array(file_obj, block_size=1 << 16):
+    """
+    Yield the objects of a top-level JSON array one by one, reading file_obj in blocks.
+
+    Only the unread part of the current block and the object being decoded are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer, pos, eof = "", 0, False
+    state = "open"  # open -> first -> item -> separator -> item ... -> closed
+
+    while True:
+        pos = JSON_WHITESPACE.match(buffer, pos).end()
+        if pos == len(buffer):
+            if eof:
+                break
+            block = file_obj.read(block_size)
+            eof = not block
+            buffer, pos = text.decode(block, final=eof), 0
+            continue
+
+        char = buffer[pos]
+        if state == "open":
+            if char != "[":
+                raise ValueError("JSON body must be an array of objects")
+            state, pos = "first", pos + 1
+        elif char == "]" and state in ("first", "separator"):
+            state, pos = "closed", pos + 1
+        elif state == "separator":
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' in the JSON array, got {char!r}")
+            state, pos = "item", pos + 1
+        elif state in ("first", "item"):
+            if char != "{":
+                raise ValueError("JSON body must be an array of objects")
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # the object may be cut at the block boundary: read on and decode it again
+                if eof:
+                    raise
+                block = file_obj.read(block_size)
+                eof = not block
+                buffer, pos = buffer[pos:] + text.decode(block, final=eof), 0
+                continue
+            yield record
+            state = "separator"
+        else:
+            raise ValueError("Unexpected data after the JSON array")
+
+    if state != "closed":
+        raise ValueError("JSON array is not closed")
+
+
+def iter_ndjson(file_obj):
+    """Yield one object per non-empty line of an NDJSON stream."""
+    for line in file_obj:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("Each NDJSON line must be an object")
+        yield record
+
+
+@dataclass
+class BatchPredictionConfig:
+    chunk_size: int = int(os.getenv("BATCH_PREDICTION_CHUNK_SIZE", "5000"))
+
+
+class BatchPredictPipeline:
+    """
+    Scores many rows with one preprocessor.transform/model.predict pass per chunk.
+
+    Inputs are consumed as an iterator of DataFrame chunks and results are yielded
+    back as NDJSON lines, so memory stays bounded by the chunk size.
+    """
+    def __init__(self, registry=None, config: BatchPredictionConfig = None):
+        self.config = config or BatchPredictionConfig()
+        self.artifacts = (registry or get_model_registry()).get()
+        self.labels = np.array([FERTILIZER_LABELS[i] for i in sorted(FERTILIZER_LABELS)], dtype=object)
+
+    def iter_records(self, records):
+        records = iter(records)
+        while True:
+            chunk = list(itertools.islice(records, self.config.chunk_size))
+            if not chunk:
+                return
+            yield pd.DataFrame.from_records(chunk)
+
+    def iter_json(self, file_obj):
+        yield from self.iter_records(iter_json_array(file_obj))
+
+    def iter_ndjson(self, file_obj):
+        yield from self.iter_records(iter_ndjson(file_obj))
+
+    def iter_csv(self, file_obj):
+        yield from pd.read_csv(file_obj, chunksize=self.config.chunk_size)
+
+    def iter_parquet(self, file_obj):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(file_obj)
+        for batch in parquet_file.iter_batches(batch_size=self.config.chunk_size):
+            yield batch.to_pandas()
+
+    def iter_upload(self, file_obj, filename: str = "", content_type: str = ""):
+        filename = filename.lower()
+        if content_type.startswith(("application/x-ndjson", "application/jsonl")) or filename.endswith((".ndjson", ".jsonl")):
+            return self.iter_ndjson(file_obj)
+        if content_type.startswith("application/json") or filename.endswith(".json"):
+            return self.iter_json(file_obj)
+        if filename.endswith((".parquet", ".pq")):
+            return self.iter_parquet(file_obj)
+        return self.iter_csv(file_obj)
+
+    def prepare_features(self, chunk):
+        chunk = chunk.rename(columns=lambda c: BATCH_COLUMN_ALIASES.get(normalize_column(c), str(c).strip()))
+        missing = [c for c in NUMERIC_COLUMNS + CATEGORICAL_COLUMNS if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"Missing columns in batch input: {missing}")
+
+        features = chunk[NUMERIC_COLUMNS + CATEGORICAL_COLUMNS].copy()
+        features[NUMERIC_COLUMNS] = features[NUMERIC_COLUMNS].astype(float)
+        return features
+
+    def predict_chunk(self, chunk):
+        try:
+            features = self.prepare_features(chunk)
+            compiled = self.artifacts.compiled_model
+            if compiled is not None:
+                preds = compiled.predict(
+                    features[compiled.num_columns].to_numpy(dtype=np.float64),
+                    [features[column].tolist() for column in compiled.cat_columns]
+                )
+            else:
+                data_scaled = self.artifacts.preprocessor.transform(features)
+                preds = self.artifacts.model.predict(data_scaled)
+            return self.labels[np.asarray(preds, dtype=int)]
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def stream_ndjson(self, chunks):
+        row = 0
+        for chunk in chunks:
+            labels = self.predict_chunk(chunk)
+            results = [{"row": row + i, "prediction": label} for i, label in enumerate(labels)]
+            if 'id' in chunk.columns:
+                for result, row_id in zip(results, chunk['id'].tolist()):
+                    result["id"] = row_id
+            yield "".join(json.dumps(result, default=str) + "\n" for result in results)
+            row += len(chunk)
+        logging.info(f"Batch prediction scored {row} rows")
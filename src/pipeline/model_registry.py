@@ -0,0 +1,203 @@
+import os
+import sys
+import json
+import threading
+from dataclasses import dataclass, field
+
+from src.utils import load_obj
+from src.exception import CustomException
+from src.logger import logging
+from src.metrics import timed
+
+
+@dataclass
+class ModelRegistryConfig:
+    model_file_path: str = os.path.join('artifact', 'model.pkl')
+    preprocessor_file_path: str = os.path.join('artifact', 'preprocessor.pkl')
+    vectorstore_path: str = os.path.join('artifact', 'vectorstore')
+    rag_guidance_file_path: str = os.path.join('artifact', 'rag_guidance.json')
+    compiled_model_file_path: str = os.path.join('artifact', 'model_compiled.npz')
+    # "sklearn" serves model.pkl + preprocessor.pkl, "compiled" the NumPy-only artifact
+    # (or the sklearn files while there is none, e.g. after streaming training)
+    backend: str = os.getenv("FERTILIZER_BACKEND", "sklearn")
+    embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    vectorstore_mmap: bool = os.getenv("RAG_INDEX_MMAP", "0") == "1"
+    vectorstore_nprobe: int = int(os.getenv("RAG_NPROBE", "8"))
+    vectorstore_ef_search: int = int(os.getenv("RAG_EF_SEARCH", "64"))
+    reload_interval_seconds: float = float(os.getenv("MODEL_RELOAD_INTERVAL", "5"))
+
+
+@dataclass(frozen=True)
+class ModelArtifacts:
+    """One immutable, fully loaded generation of the serving artifacts."""
+    model: object
+    preprocessor: object
+    rag_guidance: dict
+    compiled_model: object = None
+    fingerprint: tuple = field(default=())
+
+
+class ModelRegistry:
+    """
+    Loads model.pkl, preprocessor.pkl and the precomputed RAG guidance once and
+    shares them read-only across requests. The FAISS vectorstore (and with it the
+    embedding model) is only loaded on the first free-text question.
+
+    Requests grab the current ModelArtifacts once through get() and use that
+    object for the whole call. A reload builds a complete new generation first
+    and only then swaps the reference, so in-flight requests keep the old one.
+    """
+    def __init__(self, config: ModelRegistryConfig = None):
+        self.config = config or ModelRegistryConfig()
+        self._artifacts = None
+        self._vectorstore = None
+        self._embedding = None
+        self._load_lock = threading.Lock()
+        self._vectorstore_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher = None
+
+    def _watched_files(self):
+        model_files = [self.config.model_file_path, self.config.preprocessor_file_path]
+        if self.config.backend == "compiled":
+            # the sklearn files too: they are served when the compiled artifact is missing
+            model_files = [self.config.compiled_model_file_path] + model_files
+        return model_files + [
+            self.config.rag_guidance_file_path,
+            os.path.join(self.config.vectorstore_path, 'index.faiss'),
+            os.path.join(self.config.vectorstore_path, 'index.pkl'),
+        ]
+
+    def _fingerprint(self):
+        fingerprint = []
+        for path in self._watched_files():
+            try:
+                stat = os.stat(path)
+                fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                fingerprint.append((path, None, None))
+        return tuple(fingerprint)
+
+    def _load_artifacts(self, fingerprint):
+        model = preprocessor = compiled_model = None
+        if self.config.backend == "compiled" and os.path.exists(self.config.compiled_model_file_path):
+            from src.components.model_compiler import CompiledFertilizerModel
+
+            compiled_model = CompiledFertilizerModel.load(self.config.compiled_model_file_path)
+        else:
+            if self.config.backend == "compiled":
+                # only tree ensembles are compiled (streaming training saves an SGDClassifier)
+                logging.info(f"No compiled model at {self.config.compiled_model_file_path}, serving the sklearn model")
+            model = load_obj(file_path=self.config.model_file_path)
+            preprocessor = load_obj(file_path=self.config.preprocessor_file_path)
+        rag_guidance = {}
+        if os.path.exists(self.config.rag_guidance_file_path):
+            with open(self.config.rag_guidance_file_path, 'r', encoding='utf-8') as file_obj:
+                rag_guidance = json.load(file_obj)
+        else:
+            logging.info("No precomputed RAG guidance found, falling back to vector search")
+        return ModelArtifacts(
+            model=model,
+            preprocessor=preprocessor,
+            rag_guidance=rag_guidance,
+            compiled_model=compiled_model,
+            fingerprint=fingerprint,
+        )
+
+    def _swap_in_new_generation(self):
+        fingerprint = self._fingerprint()
+        with timed("artifact_load"):
+            artifacts = self._load_artifacts(fingerprint)
+        # single reference assignment is atomic, readers never see a half-loaded generation
+        self._artifacts = artifacts
+        self._vectorstore = None
+        logging.info("Model registry loaded artifacts")
+        return artifacts
+
+    def load(self):
+        try:
+            with self._load_lock:
+                return self._swap_in_new_generation()
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get(self) -> ModelArtifacts:
+        artifacts = self._artifacts
+        if artifacts is not None:
+            return artifacts
+        try:
+            with self._load_lock:
+                if self._artifacts is None:
+                    return self._swap_in_new_generation()
+                return self._artifacts
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_vectorstore(self):
+        """FAISS vectorstore for free-text questions, loaded on first use."""
+        vectorstore = self._vectorstore
+        if vectorstore is not None:
+            return vectorstore
+        try:
+            with self._vectorstore_lock:
+                if self._vectorstore is None:
+                    from langchain_huggingface import HuggingFaceEmbeddings
+                    from src.components.rag_indexing import load_vector_store
+
+                    with timed("vectorstore_load"):
+                        if self._embedding is None:
+                            self._embedding = HuggingFaceEmbeddings(model_name=self.config.embedding_model_name)
+                        self._vectorstore = load_vector_store(
+                            self.config.vectorstore_path, self._embedding,
+                            mmap=self.config.vectorstore_mmap,
+                            nprobe=self.config.vectorstore_nprobe,
+                            ef_search=self.config.vectorstore_ef_search
+                        )
+                    logging.info("Model registry loaded vectorstore")
+                return self._vectorstore
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def reload_if_changed(self):
+        current = self._artifacts
+        fingerprint = self._fingerprint()
+        if current is not None and current.fingerprint == fingerprint:
+            return False
+        logging.info("Artifact change detected, reloading model registry")
+        self.load()
+        return True
+
+    def _watch(self):
+        while not self._stop_event.wait(self.config.reload_interval_seconds):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                # keep serving the previous generation if the new files are half written
+                logging.info(f"Model registry reload failed, keeping current artifacts: {e}")
+
+    def start_watching(self):
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, name="model-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.config.reload_interval_seconds + 1)
+            self._watcher = None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Process wide registry shared by every PredictPipeline."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
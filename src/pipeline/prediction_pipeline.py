@@ -1,15 +1,12 @@
 import sys
-import pandas as pd
 import numpy as np
-from src.utils import load_obj
 from src.exception import CustomException
 from src.logger import logging
+from src.metrics import timed
+from src.utils import FERTILIZER_LABELS, fertilizer_guidance_query
+from src.pipeline.model_registry import get_model_registry
 # from langchain_community.document_loaders import PyPDFLoader
 # from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-
-from langchain_google_genai import ChatGoogleGenerativeAI
 # from langchain.chains.combine_documents import create_stuff_documents_chain
 # from langchain.chains import create_retrieval_chain
 # from langchain_core.prompts import ChatPromptTemplate
@@ -22,31 +19,61 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _is_data_frame(obj):
+    # pandas is only imported by the DataFrame paths; if it was never loaded, obj cannot be one
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(obj, pd.DataFrame)
+
+
 class PredictPipeline:
-    def __init__(self):
-        pass
+    def __init__(self, registry=None):
+        # artifacts come from the shared registry, one snapshot per pipeline so a
+        # hot reload in the middle of a request cannot mix model generations
+        self.registry = registry or get_model_registry()
+        self.artifacts = self.registry.get()
     
     def predict(self, features):
+        """features is a raw DataFrame, or an already transformed (CSR or dense) matrix."""
         try:
-            model_path = os.path.join("artifact", "model.pkl")
-            preprocessor = os.path.join("artifact", "preprocessor.pkl")
-            model = load_obj(file_path=model_path)
-            preprocessor = load_obj(file_path=preprocessor)
-            data_scaled = preprocessor.transform(features)
-            preds = model.predict(data_scaled)
+            compiled = self.artifacts.compiled_model
+            if not _is_data_frame(features):
+                with timed("model_predict"):
+                    if compiled is not None:
+                        dense = features.toarray() if hasattr(features, "toarray") else features
+                        preds = compiled.predict_transformed(np.asarray(dense, dtype=np.float32))
+                    else:
+                        preds = self.artifacts.model.predict(features)
+            elif compiled is not None:
+                with timed("model_predict"):
+                    preds = compiled.predict(
+                        features[compiled.num_columns].to_numpy(dtype=np.float64),
+                        [features[column].tolist() for column in compiled.cat_columns]
+                    )
+            else:
+                model = self.artifacts.model
+                preprocessor = self.artifacts.preprocessor
+                with timed("preprocess"):
+                    data_scaled = preprocessor.transform(features)
+                with timed("model_predict"):
+                    preds = model.predict(data_scaled)
             pred_label = int(preds[0])
             
-            a = {
-                0: 'Urea', 
-                1: 'DAP', 
-                2: '14-35-14', 
-                3: '28-28', 
-                4: '17-17-17', 
-                5: '20-20',  
-                6: '10-26-26'
-            }
+            self.ans = FERTILIZER_LABELS[pred_label]
+            return self.ans
+        
+        except Exception as e:
+            raise CustomException(e, sys)
+    
+    def predict_record(self, data):
+        """Single CustomData row; the compiled backend scores it without building a DataFrame."""
+        try:
+            compiled = self.artifacts.compiled_model
+            if compiled is None:
+                return self.predict(data.get_data_as_data_frame())
             
-            self.ans = a[pred_label]
+            with timed("model_predict"):
+                pred_label = int(compiled.predict_one(data.get_data_as_dict()))
+            self.ans = FERTILIZER_LABELS[pred_label]
             return self.ans
         
         except Exception as e:
@@ -55,19 +82,20 @@ class PredictPipeline:
     
     # Commented out RAG-related functionality
 
-    def rag_predict(self):
+    @timed("rag_predict")
+    def rag_predict(self, fertilizer=None):
         try:
-            vector_db_path = "artifact/vectorstore"
-            embedding = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+            fertilizer = fertilizer or self.ans
             
-            # Load vectorstore
-            vectorstore = FAISS.load_local(vector_db_path, embedding, allow_dangerous_deserialization=True)
+            # The query can only take one of the FERTILIZER_LABELS values, so its
+            # passages are precomputed at training time and served as a lookup
+            passages = self.artifacts.rag_guidance.get(fertilizer)
+            if passages:
+                return passages[0]
             
             # Prepare query dynamically
-            query = f"How to use this {self.ans} fertilizer?"
-            
-            result=vectorstore.similarity_search(query=query)
-            return result[0].page_content
+            query = fertilizer_guidance_query(fertilizer)
+            return self.rag_query(query)
             
             # # Setup LLM
             # llm = ChatGoogleGenerativeAI(model="gemini-1.5-pro")
@@ -94,9 +122,28 @@ class PredictPipeline:
         except Exception as e:
             raise CustomException(e, sys)
     
+    @timed("rag_query")
+    def rag_query(self, question):
+        """Full vector search, used for free-text questions and labels without precomputed guidance."""
+        try:
+            vectorstore = self.registry.get_vectorstore()
+            result=vectorstore.similarity_search(query=question)
+            return result[0].page_content
+        except Exception as e:
+            raise CustomException(e, sys)
+    
 
 
 class CustomData:
+    """
+    One /prediction row with the raw inputs only. soil_health_score is derived by
+    the saved preprocessor (or the compiled model), the same way as at training time.
+    """
+    __slots__ = ('Temperature', 'Humidity', 'Moisture', 'Soil_Type', 'Crop_Type', 'Nitrogen', 'Potassium', 'Phosphorous')
+    
+    # training column names, in the order of get_data_as_row()
+    COLUMNS = ['Temparature', 'Humidity', 'Moisture', 'Soil_Type', 'Crop_Type', 'Nitrogen', 'Potassium', 'Phosphorous']
+    
     def __init__(self, Temperature,
                  Humidity,
                  Moisture,
@@ -115,31 +162,21 @@ class CustomData:
         self.Nitrogen = float(Nitrogen)
         self.Potassium = float(Potassium)
         self.Phosphorous = float(Phosphorous)
+    
+    def get_data_as_row(self):
+        return [self.Temperature, self.Humidity, self.Moisture, self.Soil_Type, self.Crop_Type,
+                self.Nitrogen, self.Potassium, self.Phosphorous]
         
-        # 🔹 Now arithmetic works fine
-        self.soil_health_score = (
-            (self.Temperature * 0.2) +
-            (self.Humidity * 0.1) +
-            (self.Moisture * 0.2) +
-            (self.Nitrogen * 0.2) +
-            (self.Potassium * 0.15) +
-            (self.Phosphorous * 0.15)
-        )
+    def get_data_as_dict(self):
+        """One row keyed by the training column names."""
+        return dict(zip(self.COLUMNS, self.get_data_as_row()))
         
     def get_data_as_data_frame(self):
+        """One-row DataFrame for the sklearn backend, whose ColumnTransformer selects columns by name."""
         try:
-            custom_data_input_dict = {
-                'Temparature': [self.Temperature],
-                'Humidity': [self.Humidity],
-                'Moisture': [self.Moisture],
-                'Soil_Type': [self.Soil_Type],
-                'Crop_Type': [self.Crop_Type],
-                'Nitrogen': [self.Nitrogen],
-                'Potassium': [self.Potassium],
-                'Phosphorous': [self.Phosphorous],
-                'soil_health_score': [self.soil_health_score]
-            }
-            return pd.DataFrame(custom_data_input_dict)
+            import pandas as pd
+
+            return pd.DataFrame([self.get_data_as_row()], columns=self.COLUMNS)
         
         except Exception as e:
             raise CustomException(e, sys)
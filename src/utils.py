@@ -1,13 +1,61 @@
 import os
 import sys
+import time
+import hashlib
 from src.exception import CustomException
 from src.logger import logging
 import numpy as np
-import pandas as pd
 import dill
 
-from sklearn.metrics import accuracy_score, classification_report, ConfusionMatrixDisplay, precision_score, recall_score, f1_score, roc_auc_score, roc_curve
+FERTILIZER_LABELS = {
+    0: 'Urea', 
+    1: 'DAP', 
+    2: '14-35-14', 
+    3: '28-28', 
+    4: '17-17-17', 
+    5: '20-20',  
+    6: '10-26-26'
+}
 
+def fertilizer_guidance_query(fertilizer_name):
+    """Retrieval query used both when precomputing guidance and at serving time."""
+    return f"How to use this {fertilizer_name} fertilizer?"
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file_obj:
+        for block in iter(lambda: file_obj.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_split(file_path):
+    """Load a train/test split; Parquet splits are memory-mapped instead of re-parsed."""
+    import pandas as pd
+
+    if file_path.endswith(".parquet"):
+        return pd.read_parquet(file_path, memory_map=True)
+    return pd.read_csv(file_path)
+
+def iter_split_batches(file_path, batch_size):
+    """Yield a split as DataFrames of at most batch_size rows without loading all of it."""
+    import pandas as pd
+
+    if file_path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        
+        for batch in pq.ParquetFile(file_path, memory_map=True).iter_batches(batch_size=batch_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(file_path, chunksize=batch_size)
+
+def split_num_rows(file_path):
+    import pandas as pd
+
+    if file_path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        
+        return pq.ParquetFile(file_path).metadata.num_rows
+    return sum(len(batch) for batch in pd.read_csv(file_path, chunksize=100000, usecols=[0]))
 
 def save_obj(file_path, obj):
     try:
@@ -21,20 +69,79 @@ def save_obj(file_path, obj):
     except Exception as e:
         raise CustomException(e, sys)
 
-def evalution_model(X_train, y_train, X_test, y_test, models):
+def _fit_candidate(name, model, param_grid, X_train, y_train, X_test, y_test, n_iter):
+    """Fit one candidate (with a randomized search when it has a grid); runs in a worker process."""
+    from sklearn.metrics import accuracy_score
+    from sklearn.model_selection import RandomizedSearchCV
+
+    started = time.perf_counter()
+    best_params = None
+    if param_grid:
+        search = RandomizedSearchCV(model, param_grid, n_iter=n_iter, cv=3, random_state=42, n_jobs=1)
+        search.fit(X_train, y_train)
+        model = search.best_estimator_
+        best_params = search.best_params_
+    else:
+        model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - started
+
+    y_test_pred = model.predict(X_test)
+    return name, {
+        "model": model,
+        "test_accuracy": accuracy_score(y_test, y_test_pred),
+        "fit_time_seconds": fit_time,
+        "best_params": best_params,
+    }
+
+def evalution_model(X_train, y_train, X_test, y_test, models, params=None, n_jobs=1, cache_dir=None, n_iter=10):
+    """
+    Fit every candidate in models (in place) and report its test accuracy and fit time.
+    
+    Candidates run across a process pool of n_jobs workers. With cache_dir set, each
+    fitted candidate is stored under a hash of (data, estimator params, search grid),
+    so re-running with one new candidate only fits that one.
+    """
     try:
+        import joblib
+        from concurrent.futures import ProcessPoolExecutor
+        
+        params = params or {}
         report = {}
+        pending = []
+        data_key = joblib.hash((X_train, y_train, X_test, y_test))
         for name, model in models.items():
+            cache_path = None
+            if cache_dir:
+                candidate_key = joblib.hash((data_key, type(model).__name__, model.get_params(), params.get(name), n_iter))
+                safe_name = "".join(ch if ch.isalnum() else "_" for ch in name)
+                cache_path = os.path.join(cache_dir, f"{safe_name}_{candidate_key}.pkl")
+            if cache_path and os.path.exists(cache_path):
+                report[name] = load_obj(cache_path)
+                report[name]["cached"] = True
+                logging.info(f"{name}: loaded fitted candidate from cache")
+            else:
+                pending.append((name, model, params.get(name), cache_path))
+        
+        jobs = [(name, model, grid, X_train, y_train, X_test, y_test, n_iter) for name, model, grid, _ in pending]
+        if n_jobs > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(jobs))) as executor:
+                results = list(executor.map(_fit_candidate, *zip(*jobs)))
+        else:
+            results = [_fit_candidate(*job) for job in jobs]
+        
+        cache_paths = {name: cache_path for name, _, _, cache_path in pending}
+        for name, result in results:
             logging.info(f"Training model: {name}")
-            model.fit(X_train, y_train)
-            
-            y_test_pred = model.predict(X_test)
-            test_accuracy = accuracy_score(y_test, y_test_pred)
-            
-            logging.info(f"{name} test accuracy: {test_accuracy}")
-            report[name] = test_accuracy
-            
-        return report
+            if cache_paths[name]:
+                save_obj(cache_paths[name], result)
+            report[name] = dict(result, cached=False)
+        
+        for name in models:
+            models[name] = report[name].pop("model")
+            logging.info(f"{name} test accuracy: {report[name]['test_accuracy']} "
+                         f"(fit {report[name]['fit_time_seconds']:.2f}s, cached={report[name]['cached']})")
+        
+        return {name: report[name] for name in models}
     except Exception as e:
         raise CustomException(e, sys)
         
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+# app.py and gateway.py call configure_logging(), which opens a log file; keep test runs out of ./logs
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="agriguard_test_logs_"))
@@ -0,0 +1,134 @@
+import io
+import json
+import os
+
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.fertilizer import FertilizerService, build_fertilizer_router
+from src.pipeline.batch_prediction import (
+    BatchPredictPipeline, BatchPredictionConfig, iter_json_array, normalize_column
+)
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.utils import FERTILIZER_LABELS
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET = os.path.join(REPO_ROOT, "Ferlilizer_Data", "Fertilizer Prediction.csv")
+
+
+def artifact(name):
+    return os.path.join(REPO_ROOT, "artifact", name)
+
+
+def build_registry(backend):
+    return ModelRegistry(ModelRegistryConfig(
+        model_file_path=artifact("model.pkl"),
+        preprocessor_file_path=artifact("preprocessor.pkl"),
+        vectorstore_path=artifact("vectorstore"),
+        rag_guidance_file_path=artifact("rag_guidance.json"),
+        compiled_model_file_path=artifact("model_compiled.npz"),
+        backend=backend,
+    ))
+
+
+@pytest.fixture(scope="module", params=["sklearn", "compiled"])
+def registry(request):
+    return build_registry(request.param)
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.include_router(build_fertilizer_router(FertilizerService(build_registry("sklearn"))))
+    with TestClient(app) as client:
+        yield client
+
+
+def read_ndjson(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+@pytest.mark.parametrize("name", ["Soil Type", "soil_type", "SOIL  TYPE", " soil_type "])
+def test_column_names_normalise_to_one_alias_key(name):
+    assert normalize_column(name) == "soil_type"
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 1 << 16])
+def test_json_array_parses_across_block_boundaries(block_size):
+    records = pd.read_csv(DATASET).head(12).to_dict(orient="records")
+    body = ("\ufeff[\n" + ",\n ".join(json.dumps(record) for record in records) + "\n]\n").encode("utf-8")
+    assert list(iter_json_array(io.BytesIO(body), block_size=block_size)) == records
+
+
+@pytest.mark.parametrize("body", [b'{"a": 1}', b'[1, 2]', b'[{"a": 1} {"a": 2}]', b'[{"a": 1},', b'[{"a": 1}] x'])
+def test_malformed_json_arrays_are_rejected(body):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.BytesIO(body), block_size=4))
+
+
+def test_stream_yields_one_ndjson_chunk_per_input_chunk(registry):
+    pipeline = BatchPredictPipeline(registry, BatchPredictionConfig(chunk_size=16))
+    with open(DATASET, newline="") as file_obj:
+        parts = list(pipeline.stream_ndjson(pipeline.iter_csv(file_obj)))
+
+    rows = [json.loads(line) for part in parts for line in part.splitlines()]
+    assert len(parts) == 7  # 99 rows in chunks of 16
+    assert [row["row"] for row in rows] == list(range(99))
+    assert {row["prediction"] for row in rows} <= set(FERTILIZER_LABELS.values())
+
+
+def test_chunked_and_single_chunk_predictions_agree(registry):
+    frame = pd.read_csv(DATASET)
+    small = BatchPredictPipeline(registry, BatchPredictionConfig(chunk_size=10))
+    large = BatchPredictPipeline(registry, BatchPredictionConfig(chunk_size=1000))
+    assert "".join(small.stream_ndjson([frame.iloc[i:i + 10] for i in range(0, len(frame), 10)])) == \
+        "".join(large.stream_ndjson([frame]))
+
+
+def test_dataset_csv_upload_with_spaced_headers(client):
+    with open(DATASET, "rb") as file_obj:
+        response = client.post("/prediction/batch", files={"file": ("fertilizer.csv", file_obj, "text/csv")})
+    rows = read_ndjson(response.text)
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert len(rows) == 99
+    assert all("error" not in row for row in rows)
+
+
+def test_json_records_keep_their_ids(client):
+    record = {"temperature": 26, "humidity": 52, "moisture": 38, "soil_type": "Sandy", "crop_type": "Maize",
+              "nitrogen": 37, "potassium": 0, "phosphorous": 0}
+    response = client.post("/prediction/batch", json=[{**record, "id": "a"}, {**record, "id": "b"}])
+    rows = read_ndjson(response.text)
+    assert [(row["row"], row["id"]) for row in rows] == [(0, "a"), (1, "b")]
+    assert rows[0]["prediction"] == rows[1]["prediction"]
+
+
+def test_parquet_upload_matches_csv_upload(client):
+    parquet = io.BytesIO()
+    pd.read_csv(DATASET).to_parquet(parquet, index=False)
+    parquet.seek(0)
+    parquet_rows = read_ndjson(client.post(
+        "/prediction/batch", files={"file": ("fertilizer.parquet", parquet, "application/octet-stream")}
+    ).text)
+    with open(DATASET, "rb") as file_obj:
+        csv_rows = read_ndjson(client.post("/prediction/batch", files={"file": ("fertilizer.csv", file_obj, "text/csv")}).text)
+    assert len(parquet_rows) == 99
+    assert parquet_rows == csv_rows
+
+
+def test_ndjson_body_is_scored_line_by_line(client):
+    records = pd.read_csv(DATASET).head(5).to_dict(orient="records")
+    body = "\n".join(json.dumps(record) for record in records) + "\n"
+    response = client.post("/prediction/batch", content=body.encode(), headers={"content-type": "application/x-ndjson"})
+    rows = read_ndjson(response.text)
+    assert [row["row"] for row in rows] == list(range(5))
+    assert all("error" not in row for row in rows)
+
+
+def test_bad_input_ends_the_stream_with_an_error_line(client):
+    response = client.post("/prediction/batch", content=b"Temparature,Humidity\n1,2\n", headers={"content-type": "text/csv"})
+    rows = read_ndjson(response.text)
+    assert len(rows) == 1
+    assert "Missing columns" in rows[0]["error"]
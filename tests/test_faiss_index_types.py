@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from src.components.rag_indexing import INDEX_TYPES, build_faiss_index, set_search_params
+
+DIM = 32
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    # clustered vectors, like sentence embeddings of a few topics
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(8, DIM)) * 4
+    vectors = centers[rng.integers(0, len(centers), size=600)] + rng.normal(size=(600, DIM))
+    queries = vectors[rng.choice(len(vectors), size=50, replace=False)] + rng.normal(scale=0.05, size=(50, DIM))
+    return vectors.astype(np.float32), queries.astype(np.float32)
+
+
+def top1(index_type, vectors, queries, **params):
+    index = build_faiss_index(index_type, vectors, nlist=16, pq_m=8)
+    index.add(vectors)
+    set_search_params(index, **params)
+    _, ids = index.search(queries, 1)
+    return ids[:, 0]
+
+
+@pytest.mark.parametrize("index_type", [t for t in INDEX_TYPES if t != "flat"])
+def test_index_types_return_the_flat_top1(corpus, index_type):
+    vectors, queries = corpus
+    expected = top1("flat", vectors, queries)
+    # exhaustive probing for IVF, a wide beam for HNSW; PQ is lossy, so it only has to agree mostly
+    found = top1(index_type, vectors, queries, nprobe=16, ef_search=128)
+    agreement = np.mean(found == expected)
+    assert agreement >= (0.8 if index_type == "ivf_pq" else 1.0)
+
+
+def test_ivf_index_is_trained_with_a_capped_nlist(corpus):
+    vectors, _ = corpus
+    index = faiss.downcast_index(build_faiss_index("ivf_flat", vectors[:100], nlist=100))
+    assert index.is_trained
+    assert index.nlist == 100 // 39
+
+
+def test_small_sample_falls_back_to_flat_for_pq(corpus):
+    vectors, _ = corpus
+    assert isinstance(build_faiss_index("ivf_pq", vectors[:100], pq_m=8), faiss.IndexFlatL2)
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.components.feature_engineering import RAW_NUMERIC_FEATURES, add_derived_features, soil_health_score_one
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.prediction_pipeline import CustomData, PredictPipeline
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET = os.path.join(REPO_ROOT, "Ferlilizer_Data", "Fertilizer Prediction.csv")
+
+
+def artifact(name):
+    return os.path.join(REPO_ROOT, "artifact", name)
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    df = pd.read_csv(DATASET)
+    df.columns = df.columns.str.strip()
+    df.columns = df.columns.str.replace(" ", "_")
+    return df
+
+
+def legacy_soil_health_score(df):
+    # the column data_ingestion used to add before the split
+    return (
+        df['Temparature']*0.2 +
+        df['Humidity']*0.1 +
+        df['Moisture']*0.2 +
+        df['Nitrogen']*0.2 +
+        df['Potassium']*0.15 +
+        df['Phosphorous']*0.15
+    )
+
+
+def test_derived_features_reproduce_the_legacy_soil_health_score(dataset):
+    features = add_derived_features(dataset[RAW_NUMERIC_FEATURES])
+
+    np.testing.assert_array_equal(features[:, :len(RAW_NUMERIC_FEATURES)], dataset[RAW_NUMERIC_FEATURES].to_numpy(float))
+    np.testing.assert_array_equal(features[:, -1], legacy_soil_health_score(dataset).to_numpy())
+
+
+def test_single_row_score_is_bit_identical_to_the_batch(dataset):
+    batch = add_derived_features(dataset[RAW_NUMERIC_FEATURES])[:, -1]
+    single = [soil_health_score_one(row) for row in dataset[RAW_NUMERIC_FEATURES].to_numpy(float).tolist()]
+    np.testing.assert_array_equal(np.array(single), batch)
+
+
+def test_compiled_single_row_path_agrees_with_the_saved_preprocessor(dataset):
+    def pipeline(backend):
+        return PredictPipeline(ModelRegistry(ModelRegistryConfig(
+            model_file_path=artifact("model.pkl"),
+            preprocessor_file_path=artifact("preprocessor.pkl"),
+            vectorstore_path=artifact("vectorstore"),
+            rag_guidance_file_path=artifact("rag_guidance.json"),
+            compiled_model_file_path=artifact("model_compiled.npz"),
+            backend=backend,
+        )))
+
+    sklearn_pipeline, compiled_pipeline = pipeline("sklearn"), pipeline("compiled")
+    assert compiled_pipeline.artifacts.compiled_model is not None
+    for row in dataset.head(200).itertuples(index=False):
+        data = CustomData(
+            Temperature=row.Temparature, Humidity=row.Humidity, Moisture=row.Moisture, Soil_Type=row.Soil_Type,
+            Crop_Type=row.Crop_Type, Nitrogen=row.Nitrogen, Potassium=row.Potassium, Phosphorous=row.Phosphorous,
+        )
+        assert compiled_pipeline.predict_record(data) == sklearn_pipeline.predict_record(data)
@@ -0,0 +1,68 @@
+import gc
+import importlib
+import os
+
+import pytest
+import torch
+from fastapi.testclient import TestClient
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CNN_DIR = os.path.join(REPO_ROOT, "CNN-model-created")
+LEAF_IMAGE = os.path.join(CNN_DIR, "uploaded_image.jpg")
+
+FORM = {"temperature": 26, "humidity": 52, "moisture": 38, "crop_type": "Maize", "soil_type": "Sandy",
+        "nitrogen": 37, "phosphorous": 0, "potassium": 0}
+
+
+@pytest.fixture(scope="module")
+def gateway_app(tmp_path_factory):
+    model_path = tmp_path_factory.mktemp("model") / "cnn_model.pth"
+    with pytest.MonkeyPatch.context() as patch:
+        # offline upstreams, and random CNN weights in place of the trained ones (not in the repo)
+        patch.setenv("LLM_BACKEND", "stub")
+        patch.setenv("TRANSLATOR_BACKEND", "stub")
+        patch.setenv("CNN_MODEL_PATH", str(model_path))
+        patch.chdir(REPO_ROOT)
+        patch.syspath_prepend(CNN_DIR)
+        from core.predict import CLASS_NAME, CustomeCnnModel
+
+        torch.manual_seed(0)
+        torch.save(CustomeCnnModel(input_dim=128, num_classes=len(CLASS_NAME)).state_dict(), model_path)
+        app = importlib.import_module("gateway").create_app()
+        try:
+            yield app
+        finally:
+            gc.unfreeze()
+
+
+@pytest.fixture(scope="module")
+def client(gateway_app):
+    with TestClient(gateway_app) as client:
+        yield client
+
+
+def test_both_apis_answer_from_one_process(client):
+    fertilizer = client.post("/prediction", data=FORM).json()
+    assert "error" not in fertilizer and fertilizer["prediction"]
+
+    with open(LEAF_IMAGE, "rb") as file_obj:
+        disease = client.post("/classify_image", files={"image": ("leaf.jpg", file_obj, "image/jpeg")},
+                              data={"language": "English"})
+    assert disease.status_code == 200
+    assert disease.json()["marked_image"].startswith("data:image/jpeg;base64,")
+
+
+def test_services_share_one_cpu_pool(gateway_app, client):
+    executor = gateway_app.state.cpu_executor
+    assert gateway_app.state.fertilizer_service.executor is executor
+    assert gateway_app.state.disease_service.image_executor is executor
+
+
+def test_one_metrics_endpoint_covers_both_services(client):
+    client.post("/prediction", data=FORM)
+    with open(LEAF_IMAGE, "rb") as file_obj:
+        client.post("/classify_image", files={"image": ("leaf.jpg", file_obj, "image/jpeg")})
+    text = client.get("/metrics").text
+    assert 'fertilizer_stage_seconds_count{stage="model_predict"}' in text
+    assert 'disease_stage_seconds_count{stage="cnn_forward"}' in text
+    assert 'gateway_http_requests_total{method="POST",route="/classify_image",status="200"}' in text
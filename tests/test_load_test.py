@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from benchmarks import load_test
+from src.api.fertilizer import FertilizerService, build_fertilizer_router
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def artifact(name):
+    return os.path.join(REPO_ROOT, "artifact", name)
+
+
+def level(endpoint, concurrency, p95_ms, throughput_rps, errors=0):
+    return {"endpoint": endpoint, "concurrency": concurrency, "p95_ms": p95_ms, "throughput_rps": throughput_rps,
+            "errors": errors}
+
+
+async def run_level_against(app, endpoint, concurrency, total):
+    args = argparse.Namespace(repeat_images=False, language="English")
+    make_request = load_test.build_requests(args)[endpoint]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+        return await load_test.run_level(client, make_request, concurrency, total, warmup=1, pid=os.getpid())
+
+
+@pytest.fixture
+def fertilizer_app(monkeypatch):
+    # the request bodies are read from repository-relative paths
+    monkeypatch.chdir(REPO_ROOT)
+    service = FertilizerService(ModelRegistry(ModelRegistryConfig(
+        model_file_path=artifact("model.pkl"),
+        preprocessor_file_path=artifact("preprocessor.pkl"),
+        vectorstore_path=artifact("vectorstore"),
+        rag_guidance_file_path=artifact("rag_guidance.json"),
+        compiled_model_file_path=artifact("model_compiled.npz"),
+        backend="sklearn",
+    )))
+    app = FastAPI()
+    app.include_router(build_fertilizer_router(service))
+    service.start()
+    yield app
+    service.stop()
+
+
+@pytest.mark.parametrize("endpoint", ["prediction", "rag_info"])
+def test_level_against_the_in_process_app(fertilizer_app, endpoint):
+    result = asyncio.run(run_level_against(fertilizer_app, endpoint, concurrency=4, total=12))
+
+    assert result["requests"] == 12 and result["errors"] == 0
+    assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"] <= result["max_ms"]
+    assert result["throughput_rps"] > 0
+
+
+def test_error_bodies_count_as_errors(monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)
+    app = FastAPI()
+
+    @app.post("/prediction")
+    def prediction():
+        return {"error": "model not loaded"}
+
+    result = asyncio.run(run_level_against(app, "prediction", concurrency=2, total=6))
+    assert result["errors"] == 6
+
+
+def test_regressions_against_a_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": [
+        level("prediction", 1, p95_ms=10.0, throughput_rps=100.0),
+        level("prediction", 8, p95_ms=20.0, throughput_rps=400.0),
+        level("rag_info", 1, p95_ms=5.0, throughput_rps=200.0),
+    ]}))
+    results = [
+        level("prediction", 1, p95_ms=11.0, throughput_rps=90.0),      # within the 20% tolerance
+        level("prediction", 8, p95_ms=30.0, throughput_rps=250.0),     # slower and fewer requests/s
+        level("rag_info", 1, p95_ms=5.0, throughput_rps=200.0, errors=1),
+        level("classify_image", 1, p95_ms=50.0, throughput_rps=20.0),  # not in the baseline
+    ]
+
+    assert load_test.regressions(results, baseline, tolerance=0.2) == [
+        "prediction c=8: p95 20.0 -> 30.0 ms",
+        "prediction c=8: throughput 400.0 -> 250.0 req/s",
+        "rag_info c=1: errors 0 -> 1",
+    ]
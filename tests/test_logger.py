@@ -0,0 +1,42 @@
+import logging
+import os
+import subprocess
+import sys
+import threading
+
+from src import logger
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_the_logger_configures_nothing(tmp_path):
+    script = (
+        "import logging, threading, src.logger as logger;"
+        "print(len(logging.getLogger().handlers), threading.active_count(), logger.LOG_FILE_PATH)"
+    )
+    env = dict(os.environ, LOG_DIR=str(tmp_path))
+    output = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True)
+    assert output.stdout.split() == ["0", "1", "None"]
+    assert os.listdir(tmp_path) == []
+
+
+def test_configure_logging_replaces_the_previous_listener(tmp_path):
+    config = logger.LoggerConfig(log_dir=str(tmp_path))
+    root = logging.getLogger()
+    try:
+        first = logger.configure_logging(config)
+        threads = threading.active_count()
+        second = logger.configure_logging(config)
+        assert first is not second
+        assert threading.active_count() == threads and logger._started
+        assert sum(isinstance(handler, logger.NonBlockingQueueHandler) for handler in root.handlers) == 1
+
+        logging.getLogger("test_logger").warning("written by the listener")
+        logger.stop_logging()
+        assert not logger._started
+        logger.stop_logging()  # a second stop (atexit after an explicit one) is a no-op
+        with open(logger.LOG_FILE_PATH, encoding="utf-8") as file_obj:
+            assert "written by the listener" in file_obj.read()
+        assert threading.active_count() == threads - 1
+    finally:
+        root.removeHandler(logger._queue_handler)
@@ -0,0 +1,72 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from src.metrics import instrument_app, stage_timer
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_stage_timers_are_separate_per_namespace_and_count_errors():
+    timed = stage_timer("test_a")
+
+    with timed("decode"):
+        pass
+
+    @stage_timer("test_b")("decode")
+    def fail():
+        raise ValueError("bad image")
+
+    with pytest.raises(ValueError):
+        fail()
+
+    assert sample("test_a_stage_seconds_count", stage="decode") == 1
+    assert sample("test_a_stage_errors_total", stage="decode") == 0
+    assert sample("test_b_stage_errors_total", stage="decode") == 1
+    assert sample("test_b_stage_in_flight", stage="decode") == 0
+
+
+def test_instrumented_app_labels_requests_by_route_template():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"item": item_id}
+
+    instrument_app(app, namespace="test_app")
+    with TestClient(app) as client:
+        client.get("/items/1")
+        client.get("/items/2")
+        body = client.get("/metrics").text
+
+    assert sample("test_app_http_requests_total", method="GET", route="/items/{item_id}", status="200") == 2
+    assert 'test_app_http_requests_total{method="GET",route="/items/{item_id}",status="200"} 2.0' in body
+
+
+@pytest.fixture
+def profiled_client():
+    app = FastAPI()
+    instrument_app(app, namespace="test_profiler")
+    with TestClient(app) as client:
+        yield client
+
+
+def test_profiler_routes_refuse_until_enabled_at_request_time(profiled_client, monkeypatch):
+    monkeypatch.delenv("PROFILER_ENABLED", raising=False)
+    monkeypatch.delenv("PROFILER_TOKEN", raising=False)
+    assert profiled_client.post("/profiler/start").status_code == 403
+
+    monkeypatch.setenv("PROFILER_ENABLED", "1")
+    assert profiled_client.post("/profiler/start", params={"interval_ms": 1}).json()["started"] is True
+    assert profiled_client.post("/profiler/stop").status_code == 200
+
+
+def test_profiler_token_is_required_when_configured(profiled_client, monkeypatch):
+    monkeypatch.setenv("PROFILER_ENABLED", "1")
+    monkeypatch.setenv("PROFILER_TOKEN", "s3cret")
+    assert profiled_client.post("/profiler/stop").status_code == 403
+    assert profiled_client.post("/profiler/stop", headers={"X-Profiler-Token": "wrong"}).status_code == 403
+    assert profiled_client.post("/profiler/stop", headers={"X-Profiler-Token": "s3cret"}).status_code == 200
@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from src.components.data_transformation import CATEGORICAL_FEATURES, DataTransformation
+from src.components.feature_engineering import RAW_NUMERIC_FEATURES
+from src.components.model_compiler import CompiledFertilizerModel, verify_parity
+from src.exception import CustomException
+from src.utils import load_obj, read_split
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def artifact(name):
+    return os.path.join(REPO_ROOT, "artifact", name)
+
+
+def synthetic_frame(rows, seed):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({column: rng.integers(0, 100, rows).astype(np.float64) for column in RAW_NUMERIC_FEATURES})
+    frame["Soil_Type"] = rng.choice(["Sandy", "Loamy", "Black", "Red", "Clayey"], rows)
+    frame["Crop_Type"] = rng.choice(["Maize", "Sugarcane", "Cotton", "Paddy", "Wheat"], rows)
+    return frame
+
+
+def compare(compiled, preprocessor, model, frame):
+    expected = model.predict(preprocessor.transform(frame))
+    batch = compiled.predict(frame[compiled.num_columns].to_numpy(dtype=np.float64),
+                             [frame[column].tolist() for column in compiled.cat_columns])
+    single = [compiled.predict_one(record) for record in frame.to_dict("records")]
+    return expected, batch, np.array(single)
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    train = synthetic_frame(600, seed=0)
+    target = (train["Nitrogen"] > 50).astype(int) * 3 + (train["Soil_Type"] == "Sandy").astype(int) * 2 \
+        + (train["Moisture"] + train["Humidity"] > 100).astype(int)
+    preprocessor = DataTransformation().get_transformed_object()
+    features = preprocessor.fit_transform(train[RAW_NUMERIC_FEATURES + CATEGORICAL_FEATURES])
+    return preprocessor, features, target.to_numpy()
+
+
+@pytest.mark.parametrize("model", [
+    DecisionTreeClassifier(random_state=0),
+    RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0),
+])
+def test_compiled_trees_match_sklearn_on_unseen_rows(fitted, model, tmp_path):
+    preprocessor, features, target = fitted
+    model.fit(features, target)
+    compiled = CompiledFertilizerModel.from_sklearn(preprocessor, model)
+    path = str(tmp_path / "model_compiled.npz")
+    compiled.save(path)
+    reloaded = CompiledFertilizerModel.load(path)
+
+    # fresh rows, integer features that land exactly on split thresholds, and an unseen category
+    frame = synthetic_frame(500, seed=1)
+    frame.loc[::7, "Crop_Type"] = "Barley"
+    for candidate in (compiled, reloaded):
+        expected, batch, single = compare(candidate, preprocessor, model, frame)
+        np.testing.assert_array_equal(batch, expected)
+        np.testing.assert_array_equal(single, expected)
+
+
+def test_shipped_compiled_artifact_matches_the_shipped_model():
+    preprocessor = load_obj(artifact("preprocessor.pkl"))
+    model = load_obj(artifact("model.pkl"))
+    compiled = CompiledFertilizerModel.load(artifact("model_compiled.npz"))
+    frame = pd.concat([read_split(artifact("train.parquet")), read_split(artifact("test.parquet"))])
+    frame = frame.drop(columns=["Fertilizer_Name"])
+    assert verify_parity(compiled, preprocessor, model, frame) == len(frame)
+
+
+def test_parity_check_rejects_a_diverging_artifact(fitted):
+    preprocessor, features, target = fitted
+    model = DecisionTreeClassifier(random_state=0).fit(features, target)
+    compiled = CompiledFertilizerModel.from_sklearn(preprocessor, model)
+    compiled.classes = compiled.classes[::-1].copy()
+    with pytest.raises(CustomException):
+        verify_parity(compiled, preprocessor, model, synthetic_frame(50, seed=2))
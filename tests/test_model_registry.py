@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+
+import dill
+import pytest
+
+from src.exception import CustomException
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+
+
+def write_obj(path, obj):
+    with open(path, "wb") as file_obj:
+        dill.dump(obj, file_obj)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    config = ModelRegistryConfig(
+        model_file_path=str(tmp_path / "model.pkl"),
+        preprocessor_file_path=str(tmp_path / "preprocessor.pkl"),
+        vectorstore_path=str(tmp_path / "vectorstore"),
+        rag_guidance_file_path=str(tmp_path / "rag_guidance.json"),
+        compiled_model_file_path=str(tmp_path / "model_compiled.npz"),
+        backend="sklearn",
+        reload_interval_seconds=0.05,
+    )
+    write_obj(config.model_file_path, {"generation": 1})
+    write_obj(config.preprocessor_file_path, {"generation": 1})
+    with open(config.rag_guidance_file_path, "w") as file_obj:
+        json.dump({"Urea": ["apply in split doses"]}, file_obj)
+    registry = ModelRegistry(config)
+    yield registry
+    registry.stop_watching()
+
+
+def bump(path, obj):
+    """Rewrite an artifact with a guaranteed different (mtime, size) fingerprint."""
+    write_obj(path, obj)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_artifacts_load_once_and_are_shared(registry):
+    first = registry.get()
+    assert first.model == {"generation": 1}
+    assert first.rag_guidance == {"Urea": ["apply in split doses"]}
+    assert registry.get() is first
+
+
+def test_concurrent_first_get_loads_a_single_generation(registry):
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(registry.get())) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(artifacts) for artifacts in seen}) == 1
+
+
+def test_reload_swaps_in_a_new_generation_and_leaves_the_old_one_intact(registry):
+    old = registry.get()
+    assert registry.reload_if_changed() is False
+
+    bump(registry.config.model_file_path, {"generation": 2})
+    assert registry.reload_if_changed() is True
+
+    new = registry.get()
+    assert new is not old
+    assert new.model == {"generation": 2}
+    # a request still holding the previous generation keeps a consistent view
+    assert old.model == {"generation": 1}
+    assert old.preprocessor == {"generation": 1}
+
+
+def test_failed_reload_keeps_serving_the_current_generation(registry):
+    current = registry.get()
+    with open(registry.config.model_file_path, "wb") as file_obj:
+        file_obj.write(b"half written")
+    with pytest.raises(CustomException):
+        registry.reload_if_changed()
+    assert registry.get() is current
+
+
+def test_watcher_picks_up_changed_artifacts(registry):
+    old = registry.get()
+    registry.start_watching()
+    bump(registry.config.preprocessor_file_path, {"generation": 2})
+    for _ in range(100):
+        if registry.get() is not old:
+            break
+        threading.Event().wait(0.05)
+    assert registry.get().preprocessor == {"generation": 2}
+
+
+def test_compiled_backend_serves_sklearn_while_there_is_no_compiled_artifact(registry):
+    config = registry.config
+    config.backend = "compiled"
+    artifacts = registry.load()
+    assert artifacts.compiled_model is None
+    assert artifacts.model == {"generation": 1}
+
+    # retraining rewrites model.pkl, which the compiled backend watches as well
+    bump(config.model_file_path, {"generation": 2})
+    assert registry.reload_if_changed() is True
+    assert registry.get().model == {"generation": 2}
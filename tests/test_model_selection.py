@@ -0,0 +1,63 @@
+import os
+
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from src.utils import evalution_model
+
+PARAMS = {"Decision Tree": {"max_depth": [2, 3, 4, None]}}
+
+
+@pytest.fixture(scope="module")
+def data():
+    X, y = make_classification(n_samples=300, n_features=8, n_informative=5, n_classes=3, random_state=0)
+    return X[:200], y[:200], X[200:], y[200:]
+
+
+def candidates():
+    return {
+        "Logistic Regression": LogisticRegression(max_iter=500),
+        "Decision Tree": DecisionTreeClassifier(random_state=0),
+        "K-Neighbors Classifier": KNeighborsClassifier(),
+    }
+
+
+def accuracies(report):
+    return {name: result["test_accuracy"] for name, result in report.items()}
+
+
+def test_parallel_selection_matches_the_serial_run(data):
+    serial = evalution_model(*data, candidates(), PARAMS, n_jobs=1, n_iter=4)
+    models = candidates()
+    parallel = evalution_model(*data, models, PARAMS, n_jobs=3, n_iter=4)
+
+    assert accuracies(parallel) == accuracies(serial)
+    assert parallel["Decision Tree"]["best_params"] == serial["Decision Tree"]["best_params"]
+    assert parallel["Logistic Regression"]["best_params"] is None
+    # the fitted estimators come back in place of the candidates
+    assert all(hasattr(model, "classes_") for model in models.values())
+
+
+def test_cache_only_fits_new_candidates(data, tmp_path):
+    cache_dir = str(tmp_path / "model_cache")
+    first = evalution_model(*data, candidates(), PARAMS, cache_dir=cache_dir, n_iter=4)
+    assert not any(result["cached"] for result in first.values())
+    assert len(os.listdir(cache_dir)) == 3
+
+    models = candidates()
+    models["Shallow Tree"] = DecisionTreeClassifier(max_depth=1, random_state=0)
+    second = evalution_model(*data, models, PARAMS, cache_dir=cache_dir, n_iter=4)
+    assert {name for name, result in second.items() if not result["cached"]} == {"Shallow Tree"}
+    assert {name: second[name]["test_accuracy"] for name in first} == accuracies(first)
+    assert hasattr(models["Decision Tree"], "classes_")
+
+
+def test_changed_data_misses_the_cache(data, tmp_path):
+    cache_dir = str(tmp_path / "model_cache")
+    X_train, y_train, X_test, y_test = data
+    evalution_model(X_train, y_train, X_test, y_test, candidates(), cache_dir=cache_dir)
+    report = evalution_model(X_train[:150], y_train[:150], X_test, y_test, candidates(), cache_dir=cache_dir)
+    assert not any(result["cached"] for result in report.values())
@@ -0,0 +1,48 @@
+import json
+import os
+
+import pytest
+
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.prediction_pipeline import CustomData, PredictPipeline
+from src.utils import FERTILIZER_LABELS
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUIDANCE_PATH = os.path.join(REPO_ROOT, "artifact", "rag_guidance.json")
+
+
+def artifact(name):
+    return os.path.join(REPO_ROOT, "artifact", name)
+
+
+@pytest.fixture
+def registry():
+    return ModelRegistry(ModelRegistryConfig(
+        model_file_path=artifact("model.pkl"),
+        preprocessor_file_path=artifact("preprocessor.pkl"),
+        vectorstore_path=artifact("vectorstore"),
+        rag_guidance_file_path=GUIDANCE_PATH,
+        compiled_model_file_path=artifact("model_compiled.npz"),
+        backend="sklearn",
+    ))
+
+
+def test_shipped_guidance_covers_every_label():
+    with open(GUIDANCE_PATH, encoding="utf-8") as file_obj:
+        guidance = json.load(file_obj)
+    assert set(guidance) == set(FERTILIZER_LABELS.values())
+    assert all(passages and all(isinstance(p, str) and p for p in passages) for passages in guidance.values())
+
+
+def test_prediction_with_guidance_never_loads_the_vectorstore(registry):
+    pipeline = PredictPipeline(registry)
+    pipeline.predict_record(CustomData(
+        Temperature=26, Humidity=52, Moisture=38, Soil_Type="Sandy", Crop_Type="Maize",
+        Nitrogen=37, Potassium=0, Phosphorous=0,
+    ))
+    assert pipeline.rag_predict()
+    for label in FERTILIZER_LABELS.values():
+        assert pipeline.rag_predict(label) == registry.get().rag_guidance[label][0]
+    # the embedding model and FAISS index stay off the request path
+    assert registry._vectorstore is None
+    assert registry._embedding is None
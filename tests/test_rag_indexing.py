@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import langchain_huggingface
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.components import data_transformation
+from src.components.data_transformation import DataTransformation
+from src.components.embedding_cache import CachedEmbeddings
+from src.components.rag_indexing import RagManifest, iter_pdf_chunks, load_vector_store
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUIDE_PDF = os.path.join(REPO_ROOT, "artifact", "rag_docs", "Fertilizer_Guide.pdf")
+
+
+class CountingEmbeddings(Embeddings):
+    """Stands in for the sentence-transformers model and records every text it embeds."""
+    embedded = []
+    batch_sizes = []
+
+    def __init__(self, model_name=None, encode_kwargs=None):
+        self.model_name = model_name
+
+    def embed_query(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+        return np.random.default_rng(seed).normal(size=16).astype(np.float32).tolist()
+
+    def embed_documents(self, texts):
+        CountingEmbeddings.embedded.extend(texts)
+        CountingEmbeddings.batch_sizes.append(len(texts))
+        return [self.embed_query(text) for text in texts]
+
+
+def split_lines(pdf_files, workers, chunk_size=1000, chunk_overlap=200):
+    """One chunk per line of a text file, in place of PDF parsing."""
+    for pdf_file in pdf_files:
+        with open(pdf_file, encoding="utf-8") as file_obj:
+            lines = [line.strip() for line in file_obj if line.strip()]
+        yield pdf_file, 1, [Document(page_content=line, metadata={"source": pdf_file}) for line in lines]
+
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    monkeypatch.setattr(langchain_huggingface, "HuggingFaceEmbeddings", CountingEmbeddings)
+    monkeypatch.setattr(data_transformation, "iter_pdf_chunks", split_lines)
+    CountingEmbeddings.embedded = []
+
+    docs = tmp_path / "rag_docs"
+    docs.mkdir()
+    transformation = DataTransformation()
+    config = transformation.data_transformation_config
+    config.rag_obj_file_path = str(tmp_path / "vectorstore")
+    config.rag_manifest_file_path = str(tmp_path / "vectorstore" / "manifest.json")
+    config.embedding_cache_file_path = str(tmp_path / "embedding_cache" / "embeddings.sqlite3")
+    config.rag_guidance_file_path = str(tmp_path / "rag_guidance.json")
+    config.rag_parse_workers = 1
+    config.faiss_index_type = "flat"
+
+    def write(name, *lines):
+        (docs / name).write_text("\n".join(lines), encoding="utf-8")
+
+    def build():
+        CountingEmbeddings.embedded = []
+        CountingEmbeddings.batch_sizes = []
+        transformation.initate_rag_transformation(str(docs))
+        with open(config.rag_manifest_file_path, encoding="utf-8") as file_obj:
+            manifest = json.load(file_obj)
+        store = load_vector_store(config.rag_obj_file_path, CountingEmbeddings())
+        texts = sorted(doc.page_content for doc in store.docstore._dict.values())
+        return manifest, texts, list(CountingEmbeddings.embedded)
+
+    return write, build, docs, config
+
+
+def test_incremental_rebuild_only_embeds_what_changed(rag):
+    write, build, docs, _ = rag
+    write("urea.pdf", "Urea is nitrogen rich", "Broadcast before irrigation")
+    write("dap.pdf", "DAP supplies N and P", "Apply in bands at sowing")
+
+    manifest, texts, embedded = build()
+    assert sorted(manifest["files"]) == ["dap.pdf", "urea.pdf"]
+    assert len(texts) == 4
+    assert sorted(embedded) == texts
+
+    # unchanged corpus: nothing is parsed or embedded
+    _, texts_again, embedded = build()
+    assert embedded == []
+    assert texts_again == texts
+
+    # one edited line in one PDF: only that chunk is embedded, the rest come from the cache
+    write("dap.pdf", "DAP supplies N and P", "Apply in bands near the seed")
+    manifest, texts, embedded = build()
+    assert embedded == ["Apply in bands near the seed"]
+    assert "Apply in bands at sowing" not in texts
+    assert len(texts) == 4
+    assert all(chunk_id.startswith("dap.pdf:") for chunk_id in manifest["files"]["dap.pdf"]["chunk_ids"])
+
+    # removed PDF: its chunks leave the index
+    os.remove(docs / "urea.pdf")
+    manifest, texts, embedded = build()
+    assert sorted(manifest["files"]) == ["dap.pdf"]
+    assert texts == ["Apply in bands near the seed", "DAP supplies N and P"]
+    assert embedded == []
+
+
+def test_manifest_of_another_embedding_model_forces_a_full_rebuild(rag):
+    write, build, _, config = rag
+    write("urea.pdf", "Urea is nitrogen rich")
+    build()
+
+    assert RagManifest.load(config.rag_manifest_file_path, config.embedding_model_name).files
+    assert RagManifest.load(config.rag_manifest_file_path, "another-model").files == {}
+    assert RagManifest.load(config.rag_manifest_file_path, config.embedding_model_name, "hnsw").files == {}
+
+
+def test_manifest_diff_splits_changed_and_removed():
+    manifest = RagManifest("unused.json", "model")
+    manifest.files = {"a.pdf": {"sha256": "1"}, "b.pdf": {"sha256": "2"}, "c.pdf": {"sha256": "3"}}
+    changed, removed = manifest.diff({"a.pdf": "1", "b.pdf": "20", "d.pdf": "4"})
+    assert changed == ["b.pdf", "d.pdf"]
+    assert removed == ["b.pdf", "c.pdf"]
+
+
+def test_embedding_cache_is_keyed_by_model_and_text(tmp_path):
+    cache_path = str(tmp_path / "embeddings.sqlite3")
+    cached = CachedEmbeddings(CountingEmbeddings(), cache_path, "model-a")
+    CountingEmbeddings.embedded = []
+    first = cached.embed_documents(["urea", "dap", "urea"])
+    assert CountingEmbeddings.embedded == ["urea", "dap", "urea"]
+
+    CountingEmbeddings.embedded = []
+    reopened = CachedEmbeddings(CountingEmbeddings(), cache_path, "model-a")
+    assert reopened.embed_documents(["dap", "urea"]) == [first[1], first[0]]
+    assert CountingEmbeddings.embedded == []
+    assert (reopened.hits, reopened.misses) == (2, 0)
+
+    other_model = CachedEmbeddings(CountingEmbeddings(), cache_path, "model-b")
+    other_model.embed_documents(["urea"])
+    assert CountingEmbeddings.embedded == ["urea"]
+
+
+def test_chunks_are_embedded_in_bounded_batches(rag):
+    write, build, _, config = rag
+    config.embedding_batch_size = 3
+    write("urea.pdf", *[f"urea line {i}" for i in range(5)])
+    write("dap.pdf", *[f"dap line {i}" for i in range(6)])
+
+    _, texts, embedded = build()
+    assert len(texts) == len(embedded) == 11
+    assert max(CountingEmbeddings.batch_sizes) <= 3
+    assert sum(CountingEmbeddings.batch_sizes) == 11
+
+
+def test_process_pool_parses_every_pdf_once_like_the_serial_path(tmp_path):
+    pdf_files = []
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        shutil.copy(GUIDE_PDF, tmp_path / name)
+        pdf_files.append(str(tmp_path / name))
+
+    def parsed(workers):
+        return sorted(
+            (os.path.basename(pdf_file), pages, [doc.page_content for doc in chunks])
+            for pdf_file, pages, chunks in iter_pdf_chunks(pdf_files, workers, chunk_size=500, chunk_overlap=50)
+        )
+
+    serial = parsed(1)
+    assert [name for name, _, _ in serial] == ["a.pdf", "b.pdf", "c.pdf"]
+    assert all(pages > 0 and chunks for _, pages, chunks in serial)
+    assert parsed(2) == serial
+
+
+def test_training_entry_points_do_not_import_langchain():
+    script = (
+        "import sys, src.pipeline.taining_pipeline, src.components.data_ingestion;"
+        "print(sorted({name.split('.')[0] for name in sys.modules} & {'langchain_core', 'torch', 'faiss'}))"
+    )
+    output = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from sklearn.tree import DecisionTreeClassifier
+
+from src.components.data_transformation import DataTransformation, TARGET_COLUMN
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET = os.path.join(REPO_ROOT, "Ferlilizer_Data", "Fertilizer Prediction.csv")
+
+
+@pytest.fixture(scope="module")
+def splits(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("splits")
+    frame = pd.read_csv(DATASET)
+    frame.columns = [column.strip().replace(" ", "_") for column in frame.columns]
+    train_path, test_path = str(tmp_path / "train.parquet"), str(tmp_path / "test.parquet")
+    frame.iloc[20:].to_parquet(train_path, index=False)
+    frame.iloc[:20].to_parquet(test_path, index=False)
+
+    transformation = DataTransformation()
+    transformation.data_transformation_config.preprocessor_obj_file_path = str(tmp_path / "preprocessor.pkl")
+    train, test, _ = transformation.initate_data_transformation(train_path, test_path)
+    return frame, train, test, transformation
+
+
+def test_transformed_features_are_float32_csr_with_a_separate_target(splits):
+    frame, (x_train, y_train), (x_test, y_test), _ = splits
+    assert sparse.isspmatrix_csr(x_train) and sparse.isspmatrix_csr(x_test)
+    assert x_train.dtype == np.float32
+    assert x_train.shape[0] == len(y_train) == len(frame) - 20
+    assert y_test.ndim == 1 and len(y_test) == 20
+
+
+def test_csr_output_equals_the_dense_layout(splits):
+    frame, (x_train, _), (x_test, _), transformation = splits
+    dense = transformation.get_transformed_object()
+    dense.sparse_threshold = 0
+    dense.fit(frame.iloc[20:].drop(columns=[TARGET_COLUMN]))
+    expected = dense.transform(frame.iloc[:20].drop(columns=[TARGET_COLUMN]))
+
+    assert isinstance(expected, np.ndarray)
+    np.testing.assert_allclose(x_test.toarray(), expected.astype(np.float32))
+
+
+def test_model_trained_on_csr_predicts_like_one_trained_on_dense(splits):
+    _, (x_train, y_train), (x_test, _), _ = splits
+    on_csr = DecisionTreeClassifier(random_state=0).fit(x_train, y_train)
+    on_dense = DecisionTreeClassifier(random_state=0).fit(x_train.toarray(), y_train)
+    np.testing.assert_array_equal(on_csr.predict(x_test), on_dense.predict(x_test.toarray()))
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.components.data_transformation import DataTransformation, TARGET_COLUMN
+from src.components.model_trainer import ModelTraining
+from src.exception import CustomException
+from src.utils import load_obj
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET = os.path.join(REPO_ROOT, "Ferlilizer_Data", "Fertilizer Prediction.csv")
+
+
+@pytest.fixture
+def trainer(tmp_path):
+    trainer = ModelTraining()
+    config = trainer.model_train_config
+    config.train_model_file_path = str(tmp_path / "model.pkl")
+    config.compiled_model_file_path = str(tmp_path / "model_compiled.npz")
+    config.streaming_chunk_size = 64
+    config.streaming_epochs = 3
+    for path in (config.train_model_file_path, config.compiled_model_file_path):
+        with open(path, "wb") as file_obj:
+            file_obj.write(b"previous run")
+    return trainer
+
+
+def split(features, target, test_size=100):
+    return (features[test_size:], target[test_size:]), (features[:test_size], target[:test_size])
+
+
+def read(path):
+    with open(path, "rb") as file_obj:
+        return file_obj.read()
+
+
+def test_streaming_run_below_the_accuracy_guard_keeps_the_saved_artifacts(trainer):
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(600, 5)).astype(np.float32)
+    target = rng.integers(0, 7, 600)  # unlearnable
+    with pytest.raises(CustomException, match="keeping the saved model"):
+        trainer.initiate_streaming_model_trainer(*split(features, target))
+
+    config = trainer.model_train_config
+    assert read(config.train_model_file_path) == b"previous run"
+    assert read(config.compiled_model_file_path) == b"previous run"
+
+
+def test_accepted_streaming_run_replaces_the_model_and_drops_the_compiled_artifact(trainer):
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(600, 5)).astype(np.float32)
+    target = (features[:, 0] > 0).astype(int)
+    accuracy = trainer.initiate_streaming_model_trainer(*split(features, target))
+
+    config = trainer.model_train_config
+    assert accuracy >= config.min_model_score
+    assert type(load_obj(config.train_model_file_path)).__name__ == "SGDClassifier"
+    assert not os.path.exists(config.compiled_model_file_path)
+
+
+def test_streaming_preprocessor_matches_the_in_memory_fit(tmp_path):
+    frame = pd.read_csv(DATASET)
+    frame.columns = [column.strip().replace(" ", "_") for column in frame.columns]
+    # rows ordered by soil type, so each chunk of 16 only sees some of the categories
+    frame = frame.sort_values("Soil_Type", kind="stable").reset_index(drop=True)
+    train_path = str(tmp_path / "train.parquet")
+    frame.to_parquet(train_path, index=False)
+
+    transformation = DataTransformation()
+    transformation.data_transformation_config.streaming_chunk_size = 16
+    streaming, classes = transformation.fit_streaming_preprocessor(train_path)
+    in_memory = transformation.get_transformed_object().fit(frame.drop(columns=[TARGET_COLUMN]))
+
+    features = frame.drop(columns=[TARGET_COLUMN])
+    np.testing.assert_allclose(streaming.transform(features).toarray(), in_memory.transform(features).toarray(), atol=1e-9)
+    encoder = streaming.named_transformers_["cat_pipeline"][-1]
+    assert [list(c) for c in encoder.categories_] == [sorted(frame[c].unique()) for c in ["Soil_Type", "Crop_Type"]]
+    assert list(classes) == sorted(frame[TARGET_COLUMN].unique())